@@ -3,7 +3,21 @@
 
 import logging
 from logging import NullHandler
-from pyrga.driver import RGAClient, RGAException
+from pyrga.driver import RGABatch, RGAClient, RGAException, Spectrum
+from pyrga.aio import AsyncRGAClient
+from pyrga.averaging import AveragedScan, ScanAverager, iter_averages
+from pyrga.capture import RawCapture, replay_capture
+from pyrga.composition import Composition, GasLibrary, decompose
+from pyrga.fleet import RGAFleet
+from pyrga.metrics import RGAMetrics
+from pyrga.monitor import ChangeDetector, LeakMonitor, MonitorEvent
+from pyrga.peaks import DriftTracker, Peaks, find_peaks
+from pyrga.planner import ScanPlan, estimate_scan_time, plan_scan, read_windows, schedule_windows
+from pyrga.rollup import MassRollup
+from pyrga.server import RemoteRGA, RGAServer
+from pyrga.simulator import PtySimulator, RGASimulator, SimulatedSerial
+from pyrga.storage import MassLog, SpectrumLog
+from pyrga.transport import AsyncTransport, MemoryTransport, SerialTransport, StreamTransport
 
 __version__ = '0.0.3'
 logging.getLogger(__name__).addHandler(NullHandler())
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""asyncio client for SRS RGA (Residual Gas Analyzer from Stanford Research Systems)."""
+
+import asyncio
+import logging
+
+from pyrga.driver import RGAException, _RGAClientBase
+
+
+class AsyncRGAClient(_RGAClientBase):
+    """AsyncRGAClient asyncio-native client object to communicate with SRS RGA
+
+    Asynchronous counterpart of :class:`~pyrga.driver.RGAClient` sharing its parameter validation and decoding.
+    Communication goes through a :class:`~pyrga.transport.AsyncTransport`, so a single event loop can drive many RGAs
+    without dedicating a thread to each serial port. Use :meth:`connect` instead of instantiating the class directly.
+    Each request/response transaction is atomic, so a single client can be shared between tasks.
+
+    :param transport: transport connected to RGA
+    :type transport: pyrga.transport.AsyncTransport
+
+    :raises RGAException: see :class:`~pyrga.driver.RGAClient`
+    """
+
+    def __init__(self, transport):
+        self.logger = logging.getLogger(__name__)
+        self._transport = transport
+        self._lock = asyncio.Lock()
+        self._amu_min = None
+        self._amu_max = None
+        self._amu_res = None
+
+    @classmethod
+    async def connect(
+        cls,
+        transport,
+        partial_sens_mA_per_Torr="default",
+        total_sens_mA_per_Torr="default",
+        electron_energy_eV="default",
+        ion_energy_eV="default",
+        plate_voltage_V="default",
+        emission_current_mA="default",
+        cedm_voltage_V=0,  # 0: set faraday cup operation by default instead of electron multiplier
+        noise_floor="default",
+    ):
+        """Connect to RGA over `transport` and initialize it, takes the same parameters as RGAClient."""
+        self = cls(transport)
+
+        # set model-dependent RGA parameters
+        self._set_device_model(await self.get_device_id())
+        self.logger.info("Connected to RGA model %s, id %s", self._device_model, self._device_id)
+        self._cdem_present = await self.get_cdem_presence()
+
+        # define filament status
+        self._filament_status = await self.get_filament_status()
+
+        # set adjustable RGA parameters
+        await self.set_cdem_voltage(cedm_voltage_V)
+        await self.set_electron_energy(electron_energy_eV)
+        await self.set_ion_energy(ion_energy_eV)
+        await self.set_plate_voltage(plate_voltage_V)
+        self.set_emission_current(emission_current_mA)  # this setter does NOT turn on the filament
+        await self.set_noise_floor(noise_floor)
+        await self.set_partial_sens(partial_sens_mA_per_Torr)
+        await self.set_total_sens(total_sens_mA_per_Torr)
+        await self.calibrate_all()
+        return self
+
+    async def close(self):
+        await self._transport.close()
+
+    async def calibrate_all(self):
+        self.logger.info("Zeroing ion detector and applying temperature compensation factors...")
+        async with self._lock:
+            await self._send_command("CA")
+            await self._transport.drain(self._DRAIN_QUIET_TIME)
+
+    async def read_spectrum(self, amu_min=1, amu_max=100, amu_res=10, as_array=False):
+        self.logger.info(
+            "Reading analog scan from %s amu to %s amu with %s steps/amu", amu_min, amu_max, amu_res,
+        )
+        if as_array:
+            self._check_numpy()
+        self._check_filament_on()
+        async with self._lock:  # another task must not change the mass range until the scan is decoded
+            if self._spectrogram_params_differ(amu_min, amu_max, amu_res):
+                await self._set_spectrogram_params(amu_min, amu_max, amu_res)
+            await self._send_command("SC", "1")
+            spectrum_bytes = self._spectrum_bytes()
+            timeout = self._measurement_timeout(spectrum_bytes)
+            buffer_bytes = await self._read_exactly(spectrum_bytes, timeout)
+            return self._decode_spectrum(buffer_bytes, as_array)
+
+    async def read_histogram(self, amu_min=1, amu_max=100, as_array=False):
+        self.logger.info("Reading histogram scan from %s amu to %s amu", amu_min, amu_max)
+        if as_array:
+            self._check_numpy()
+        self._check_filament_on()
+        async with self._lock:
+            if self._amu_min != amu_min or self._amu_max != amu_max:
+                await self._set_spectrogram_params(amu_min, amu_max, self._amu_res or self._AMU_RES_MIN)
+            await self._send_command("HS", "1")
+            histogram_bytes = self._histogram_bytes()
+            timeout = self._measurement_timeout(histogram_bytes)
+            buffer_bytes = await self._read_exactly(histogram_bytes, timeout)
+            return self._decode_histogram(buffer_bytes, as_array)
+
+    async def read_mass(self, amu):
+        self.logger.info("Reading a single scan of amu mass number %s", amu)
+        self._validate_mass(amu)
+        self._check_filament_on()
+        async with self._lock:
+            await self._send_command("MR", amu)
+            current_bytes = await self._read_exactly(4, self._measurement_timeout(4))
+        return self._decode_mass(amu, current_bytes)
+
+    async def get_device_id(self):
+        self.logger.info("Querying device ID...")
+        return await self._query("ID")
+
+    async def get_cdem_presence(self):
+        self.logger.info("Querying CDEM presence...")
+        async with self._lock:
+            await self._send_command("EM", "?")
+            status_bytes = await self._read_exactly(3, self._READ_TIMEOUT)
+        return self._parse_cdem_presence(status_bytes)
+
+    async def set_partial_sens(self, partial_sens_mA_per_Torr):
+        self.logger.info(
+            "Setting partial pressure sensitivity factor to %s...", partial_sens_mA_per_Torr,
+        )
+        if partial_sens_mA_per_Torr == "default":
+            self._partial_sens_mA_per_Torr = await self.get_partial_sens()
+        else:
+            self._partial_sens_mA_per_Torr = self._validate_partial_sens(partial_sens_mA_per_Torr)
+
+    async def get_partial_sens(self):
+        self.logger.info("Querying partial pressure sensitivity factor stored in RGA...")
+        return float(await self._query("SP"))
+
+    async def set_total_sens(self, total_sens_mA_per_Torr):
+        self.logger.info("Setting total pressure sensitivity factor to %s...", total_sens_mA_per_Torr)
+        if total_sens_mA_per_Torr == "default":
+            self._total_sens_mA_per_Torr = await self.get_total_sens()
+        else:
+            self._total_sens_mA_per_Torr = self._validate_total_sens(total_sens_mA_per_Torr)
+
+    async def get_total_sens(self):
+        self.logger.info("Querying total pressure sensitivity factor stored in RGA...")
+        return float(await self._query("ST"))
+
+    async def set_electron_energy(self, electron_energy_eV):
+        self.logger.info("Setting electron energy to %s...", electron_energy_eV)
+        async with self._lock:
+            readback = await self._set_with_readback("EE", self._validate_electron_energy(electron_energy_eV))
+            self._check_readback("Electron energy", readback, self._electron_energy_eV, " eV")
+
+    async def get_electron_energy(self):
+        self.logger.info("Querying electron energy...")
+        return int(await self._query("EE"))
+
+    async def set_ion_energy(self, ion_energy_eV):
+        self.logger.info("Setting ion energy to %s...", ion_energy_eV)
+        async with self._lock:
+            value = self._validate_ion_energy(ion_energy_eV)
+            readback = await self._set_with_readback("IE", value, self._parse_ion_energy)
+            self._check_readback("Ion energy", readback, self._ion_energy_eV, " eV")
+
+    async def get_ion_energy(self):
+        self.logger.debug("Querying ion energy...")
+        return self._parse_ion_energy(await self._query("IE"))
+
+    async def set_plate_voltage(self, plate_voltage_V):
+        self.logger.info("Setting focus plate voltage to %s...", plate_voltage_V)
+        async with self._lock:
+            readback = await self._set_with_readback("VF", self._validate_plate_voltage(plate_voltage_V))
+            self._check_readback("Focus plate voltage", readback, self._plate_voltage_V, " V")
+
+    async def get_plate_voltage(self):
+        self.logger.info("Querying focus plate voltage...")
+        return int(await self._query("VF"))
+
+    async def set_spectrogram_params(self, amu_min, amu_max, amu_res):
+        self.logger.debug(
+            "Setting spectrogram parameters: min=%s, max=%s, steps=%s", amu_min, amu_max, amu_res,
+        )
+        async with self._lock:
+            await self._set_spectrogram_params(amu_min, amu_max, amu_res)
+
+    async def _set_spectrogram_params(self, amu_min, amu_max, amu_res):
+        """Set and verify the mass range, the caller holds the lock."""
+        self._validate_spectrogram_params(amu_min, amu_max, amu_res)
+        await self._send_command("MI", self._amu_min)
+        await self._send_command("MF", self._amu_max)
+        await self._send_command("SA", self._amu_res)
+        self._check_spectrogram_params_readback(await self._get_spectrogram_params())
+
+    async def get_spectrogram_params(self):
+        self.logger.info("Querying spectrogram parameters...")
+        async with self._lock:
+            return await self._get_spectrogram_params()
+
+    async def _get_spectrogram_params(self):
+        mi = int(await self._query_locked("MI"))
+        mf = int(await self._query_locked("MF"))
+        sa = int(await self._query_locked("SA"))
+        return (mi, mf, sa)
+
+    def set_emission_current(self, emission_current_mA):
+        self.logger.info("Setting emission current to %s...", emission_current_mA)
+        self._validate_emission_current(emission_current_mA)
+
+    async def get_emission_current(self):
+        self.logger.info("Querying filament current...")
+        return float(await self._query("FL"))
+
+    async def get_filament_status(self):
+        self.logger.info("Querying filament status...")
+        return self._is_filament_current_on(await self.get_emission_current())
+
+    async def turn_on_filament(self):
+        self.logger.info(
+            "Turning on filament with electron emission current %s mA...", self._emission_current_mA,
+        )
+        async with self._lock:
+            self._filament_status = True
+            self._check_emission_current_readback(await self._set_with_readback("FL", self._emission_current_mA, float))
+
+    async def turn_off_filament(self):
+        self.logger.info("Turning off the filament: setting electron emission to 0...")
+        self._filament_status = False
+        try:
+            async with self._lock:
+                filament_current_mA = await self._set_with_readback("FL", 0.0, float)
+            if not self._is_filament_current_on(filament_current_mA):
+                self.logger.info("Filament is confirmed to be off: %s mA", filament_current_mA)
+                return True
+        except Exception:  # catching all to guarantee delivery of the error message
+            pass
+        error_msg = "Cannot confirm that the filament is off! Turn off RGA before venting the system!"
+        self.logger.error(error_msg)
+        raise RGAException(error_msg)
+
+    async def set_cdem_voltage(self, cedm_voltage_V):
+        if not self._cdem_present:
+            self.logger.info("No CDEM installed, not setting CDEM voltage")
+            return
+        self.logger.info("Setting CEDM voltage to %s...", cedm_voltage_V)
+        async with self._lock:
+            readback = await self._set_with_readback("HV", self._validate_cdem_voltage(cedm_voltage_V))
+            self._check_cdem_voltage_readback(readback)
+
+    async def get_cdem_voltage(self):
+        if not self._cdem_present:
+            self.logger.info("No CDEM installed, not querying CDEM voltage")
+            return False
+        self.logger.info("Querying CDEM voltage...")
+        return int(await self._query("HV"))
+
+    async def set_noise_floor(self, noise_floor):
+        self.logger.info(
+            "Setting noise floor to %s... (0 - max averaging, 7 - min averaging)", noise_floor,
+        )
+        async with self._lock:
+            readback = await self._set_with_readback("NF", self._validate_noise_floor(noise_floor))
+            self._check_readback("Noise floor", readback, self._noise_floor)
+
+    async def get_noise_floor(self):
+        self.logger.info("Querying noise floor setting...")
+        return int(await self._query("NF"))
+
+    async def _set_with_readback(self, cmd, value, parse=int):
+        """Send a setting followed by its query, return the parsed readback value. The caller holds the lock, so
+        that setpoint, setting and verification are not interleaved with other tasks."""
+        await self._send_command(cmd, value)
+        return parse(await self._query_locked(cmd))
+
+    async def _query(self, cmd):
+        async with self._lock:
+            return await self._query_locked(cmd)
+
+    async def _query_locked(self, cmd):
+        await self._send_command(cmd, "?")
+        line = await self._read_line(self._READ_TIMEOUT)
+        await self._read_exactly(1, self._READ_TIMEOUT)  # extra byte due to \n\r line termination
+        try:
+            buffer_ascii = line.decode("ascii").strip()
+        except UnicodeDecodeError:
+            raise RGAException("Failed to receive buffer line")
+        self.logger.debug("Received line: '%s'", buffer_ascii)
+        return buffer_ascii
+
+    async def _read_exactly(self, length_bytes, timeout):
+        try:
+            return await self._transport.read_exactly(length_bytes, timeout)
+        except RGAException:
+            await self._drain()
+            raise
+
+    async def _read_line(self, timeout):
+        try:
+            return await self._transport.read_line(timeout)
+        except RGAException:
+            await self._drain()
+            raise
+
+    async def _drain(self):
+        """Discard the rest of a response cut off by an error, so that it is not taken for the next reply."""
+        self.logger.debug("Drained %s bytes from transport", await self._transport.drain(self._DRAIN_QUIET_TIME))
+
+    async def _send_command(self, cmd, value=""):
+        full_cmd = self._format_command(cmd, value)
+        self.logger.debug("Sending command '%s'...", full_cmd)
+        await self._transport.write(full_cmd.encode())
+        if self._reports_status(cmd, value):
+            self.logger.debug("Checking status byte...")
+            self._parse_status_byte(await self._read_exactly(3, self._READ_TIMEOUT))
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Host-side averaging of fast (high noise floor) spectra and single mass readings with per-point uncertainties."""
+
+import collections
+
+from pyrga.driver import RGAException, Spectrum, _RGAClientBase, np
+
+AveragedScan = collections.namedtuple(
+    "AveragedScan", ["amu", "pressures", "deviations", "uncertainties", "count", "total"]
+)
+AveragedScan.__doc__ = """
+Result of :class:`ScanAverager`: mean `pressures` of `count` scans at each point of the `amu` axis, their sample
+standard `deviations` and the `uncertainties` (standard errors) of the means, as numpy arrays. Deviations and
+uncertainties are NaN until two scans are averaged. `total` is the mean total pressure, None if not reported.
+"""
+
+
+class ScanAverager:
+    """ScanAverager accumulates the running mean and variance of each point of repeated scans
+
+    Scans are added one at a time (or as stacks of many scans at once) with Welford's algorithm, vectorized over all
+    points, so the result is available at any time without storing the scans. Averaging N scans at a high noise floor
+    reduces the noise of the mean by about sqrt(N), which allows to trade latency for noise while results keep coming,
+    instead of committing to a single slow scan at a low noise floor. Requires numpy.
+
+    :param amu: mass axis of the scans, taken from the first scan added if None, defaults to None
+    :type amu: list or numpy.ndarray
+
+    :raises RGAException: if a scan does not match the mass axis
+    """
+
+    def __init__(self, amu=None):
+        _RGAClientBase._check_numpy()
+        self.amu = None if amu is None else np.array(amu, dtype=float)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self._mean = None
+        self._m2 = None  # sum of squared deviations from the mean of each point
+        self._total_count = 0
+        self._total_mean = 0.0
+
+    def add(self, scan):
+        """
+        Add a scan, either (amu, pressures, total) as returned by read_spectrum(), read_histogram() and read_plan(), or
+        the pressures alone (a single reading of read_mass() is accepted as well).
+        """
+        amu, pressures, total = scan if isinstance(scan, (tuple, Spectrum)) else (None, scan, None)
+        pressures = np.atleast_1d(np.asarray(pressures, dtype=float))
+        self._check_axis(amu, pressures.shape[0])
+        self.count += 1
+        if self._mean is None:
+            self._mean = pressures.copy()
+            self._m2 = np.zeros_like(pressures)
+        else:
+            delta = pressures - self._mean
+            self._mean += delta / self.count
+            self._m2 += delta * (pressures - self._mean)
+        self._add_total(total, 1)
+
+    def add_many(self, pressures, totals=None):
+        """Add a stack of scans with one scan per row (e.g. pressures returned by a log query) at once."""
+        pressures = np.atleast_2d(np.asarray(pressures, dtype=float))
+        self._check_axis(None, pressures.shape[1])
+        count = pressures.shape[0]
+        if not count:
+            return
+        mean = pressures.mean(axis=0)
+        m2 = ((pressures - mean) ** 2).sum(axis=0)
+        if self._mean is None:
+            self._mean, self._m2 = mean, m2
+        else:  # pairwise combination of the running and the new statistics (Chan et al.)
+            delta = mean - self._mean
+            combined = self.count + count
+            self._mean = self._mean + delta * (count / combined)
+            self._m2 = self._m2 + m2 + delta ** 2 * (self.count * count / combined)
+        self.count += count
+        if totals is not None:
+            totals = [t for t in totals if t is not None]
+            if totals:
+                self._add_total(sum(totals) / len(totals), len(totals))
+
+    def _check_axis(self, amu, points):
+        if self._mean is not None and points != self._mean.shape[0]:
+            raise RGAException("Scan has %s points, averaged scans have %s" % (points, self._mean.shape[0]))
+        if amu is not None:
+            amu = np.asarray(amu, dtype=float)
+            if self.amu is not None and not np.array_equal(amu, self.amu):
+                raise RGAException("Mass axis of the scan differs from the averaged scans")
+            if amu.shape != (points,):
+                raise RGAException("Scan has %s points, mass axis has %s" % (points, amu.size))
+            if self.amu is None:
+                self.amu = amu.copy()
+        elif self.amu is not None and points != self.amu.shape[0]:
+            raise RGAException("Scan has %s points, mass axis has %s" % (points, self.amu.shape[0]))
+
+    def _add_total(self, total, count):
+        if total is None:
+            return
+        self._total_count += count
+        self._total_mean += (total - self._total_mean) * (count / self._total_count)
+
+    def result(self):
+        """Return :class:`AveragedScan` of the scans added so far, None if there are none."""
+        if self._mean is None:
+            return None
+        if self.count > 1:
+            deviations = np.sqrt(self._m2 / (self.count - 1))
+            uncertainties = deviations / np.sqrt(self.count)
+        else:
+            deviations = np.full_like(self._mean, np.nan)
+            uncertainties = deviations.copy()
+        total = self._total_mean if self._total_count else None
+        return AveragedScan(self.amu, self._mean.copy(), deviations, uncertainties, self.count, total)
+
+
+def iter_averages(scans, count=None, uncertainty=None, amu=None):
+    """
+    Average `scans` (an iterable of scans accepted by :meth:`ScanAverager.add`, e.g. iter_spectra() of a client
+    with `as_array=True`) and yield :class:`AveragedScan` after every scan, so intermediate results are available
+    early. Stop after `count` scans and/or as soon as the uncertainty of every point is not larger than
+    `uncertainty` (in units of the pressures), closing `scans` if it is a generator (which stops the scan in
+    progress). Run until `scans` is exhausted if neither is given.
+    """
+    averager = ScanAverager(amu)
+    try:
+        for scan in scans:
+            averager.add(scan)
+            result = averager.result()
+            yield result
+            if count is not None and result.count >= count:
+                return
+            if uncertainty is not None and result.count > 1 and np.nanmax(result.uncertainties) <= uncertainty:
+                return
+    finally:
+        close = getattr(scans, "close", None)
+        if close is not None:
+            close()
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""Binary capture of raw measurement frames received from RGA, and replay of captures through the decoder."""
+
+import io
+import struct
+import threading
+import time
+
+from pyrga.driver import RGAException, _RGAClientBase
+
+_MAGIC = b"PYRGARAW1\n"
+# timestamp, command, amu_min, amu_max, amu_res (0 for HS and MR), noise floor, partial and total sensitivity in
+# mA/Torr at the time of capture, payload length in bytes
+_RECORD = struct.Struct("<d2sHHBBddI")
+_COMMANDS = (b"SC", b"HS", b"MR")
+
+
+class RawCapture:
+    """RawCapture appends raw measurement frames received by a client to a compact binary file
+
+    Every analog scan (SC), histogram scan (HS) and single mass read (MR) is recorded with its timestamp, mass range,
+    noise floor and sensitivities in effect, followed by the ion currents exactly as sent by RGA (little-endian int32
+    in units of 1e-16 A). Pass the capture to :class:`~pyrga.driver.RGAClient` and use :func:`replay_capture` to decode
+    the file again, e.g. with corrected sensitivity factors. An existing capture is appended to, and a single capture
+    can be shared by several clients.
+
+    :param path: path of the capture file
+    :type path: str
+    :param buffering: size of the write buffer in bytes, frames reach the file when it is full or on :meth:`flush`,
+    defaults to 1 MiB
+    :type buffering: int
+
+    :raises RGAException: if `path` exists and is not a capture file
+    """
+
+    def __init__(self, path, buffering=1024 * 1024):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "ab", buffering=buffering)
+        if self._file.tell() == 0:
+            self._file.write(_MAGIC)
+        else:
+            with open(path, "rb") as existing:
+                if existing.read(len(_MAGIC)) != _MAGIC:
+                    self._file.close()
+                    raise RGAException("File is not a pyrga capture: %s" % path)
+        self.frames = 0
+
+    def record(
+        self, command, amu_min, amu_max, amu_res, noise_floor, partial_sens, total_sens, payload, timestamp=None
+    ):
+        """Append a frame, `payload` is any bytes-like object holding the currents received for `command`."""
+        header = _RECORD.pack(
+            time.time() if timestamp is None else timestamp,
+            command.encode(),
+            amu_min,
+            amu_max,
+            amu_res or 0,
+            noise_floor or 0,
+            partial_sens,
+            total_sens,
+            len(payload),
+        )
+        with self._lock:
+            self._file.write(header)
+            self._file.write(payload)
+            self.frames += 1
+
+    def flush(self):
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _ReplayDecoder(_RGAClientBase):
+    """Decoding state of a client restored from the header of each captured frame."""
+
+    def __init__(self, partial_sens, total_sens):
+        self._partial_sens_override = partial_sens
+        self._total_sens_override = total_sens
+        if partial_sens is not None:
+            self._validate_partial_sens(partial_sens)
+        if total_sens is not None:
+            self._validate_total_sens(total_sens)
+
+    def restore(self, amu_min, amu_max, amu_res, partial_sens, total_sens):
+        self._amu_min = amu_min
+        self._amu_max = amu_max
+        self._amu_res = amu_res or None
+        override = self._partial_sens_override
+        self._partial_sens_mA_per_Torr = partial_sens if override is None else override
+        override = self._total_sens_override
+        self._total_sens_mA_per_Torr = total_sens if override is None else override
+
+
+def replay_capture(path, partial_sens_mA_per_Torr=None, total_sens_mA_per_Torr=None, as_array=False):
+    """
+    Generator decoding frames of a :class:`RawCapture` file in order with the decoder of the client, as fast as they
+    are read from disk. Sensitivities default to the ones recorded with each frame, specify them to reprocess the
+    capture with corrected calibration.
+    Yield (timestamp, command, result) tuples where result is :class:`~pyrga.driver.Spectrum` of 'SC' and 'HS'
+    scans, like read_spectrum() and read_histogram(), and (amu, pressure) of 'MR' reads, the mass and the partial
+    pressure returned by read_mass().
+    """
+    if as_array:
+        _RGAClientBase._check_numpy()
+    decoder = _ReplayDecoder(partial_sens_mA_per_Torr, total_sens_mA_per_Torr)
+    with open(path, "rb", buffering=io.DEFAULT_BUFFER_SIZE * 64) as capture:
+        if capture.read(len(_MAGIC)) != _MAGIC:
+            raise RGAException("File is not a pyrga capture: %s" % path)
+        while True:
+            header = capture.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return  # end of file, or a frame cut off by a crash while capturing
+            timestamp, command, amu_min, amu_max, amu_res, _, partial, total, length = _RECORD.unpack(header)
+            payload = capture.read(length)
+            if len(payload) < length:
+                return
+            if command not in _COMMANDS:
+                raise RGAException("Unknown command %s in capture %s" % (command, path))
+            decoder.restore(amu_min, amu_max, amu_res, partial, total)
+            if command == b"SC":
+                result = decoder._decode_spectrum(payload, as_array)  # pylint: disable=W0212
+            elif command == b"HS":
+                result = decoder._decode_histogram(payload, as_array)  # pylint: disable=W0212
+            else:
+                result = (amu_min, decoder._current_to_partial_pressure(payload))  # pylint: disable=W0212
+            if command != b"MR":
+                result.timestamp = timestamp
+            yield (timestamp, command.decode(), result)
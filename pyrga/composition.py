@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""Gas composition from spectra by non-negative least squares fit of cracking patterns, vectorized over many spectra."""
+
+import collections
+
+from pyrga.driver import RGAException, Spectrum, _RGAClientBase, np
+
+# Typical 70 eV cracking patterns (peak heights relative to the base peak = 100) and sensitivities relative to N2,
+# use values calibrated on the actual RGA for quantitative results.
+DEFAULT_GASES = collections.OrderedDict(
+    [
+        ("H2", ({2: 100.0, 1: 2.0}, 0.44)),
+        ("He", ({4: 100.0}, 0.14)),
+        ("CH4", ({16: 100.0, 15: 85.8, 14: 15.6, 13: 7.7, 12: 2.4}, 1.6)),
+        ("H2O", ({18: 100.0, 17: 21.2, 16: 0.9}, 0.9)),
+        ("Ne", ({20: 100.0, 22: 9.9}, 0.23)),
+        ("N2", ({28: 100.0, 14: 7.2, 29: 0.7}, 1.0)),
+        ("CO", ({28: 100.0, 12: 4.7, 16: 1.7, 29: 1.2, 14: 0.8}, 1.05)),
+        ("O2", ({32: 100.0, 16: 11.4, 34: 0.4}, 0.86)),
+        ("Ar", ({40: 100.0, 20: 14.6, 36: 0.3}, 1.2)),
+        ("CO2", ({44: 100.0, 28: 11.4, 16: 9.6, 12: 8.7, 22: 1.9, 45: 1.2}, 1.4)),
+    ]
+)
+
+Composition = collections.namedtuple("Composition", ["gases", "pressures", "residuals"])
+Composition.__doc__ = """
+Result of :func:`decompose`: names of the `gases`, their partial `pressures` (one row per spectrum, one column per
+gas) and the RMS `residuals` of the fit of each spectrum, all in units of the spectra.
+"""
+
+
+class GasLibrary:
+    """GasLibrary holds cracking patterns and sensitivity factors of the gases a spectrum is decomposed into
+
+    Spectra converted with the N2 sensitivity of RGA (the default of :class:`~pyrga.driver.RGAClient`) are modeled
+    as sum over gases of `pressure * sensitivity * pattern[amu] / pattern[base peak]`.
+
+    :param gases: mapping of gas names to (pattern, sensitivity) where pattern maps integer masses to relative peak
+    heights and sensitivity is relative to N2, defaults to DEFAULT_GASES
+    :type gases: dict
+    """
+
+    def __init__(self, gases=None):
+        self._gases = collections.OrderedDict()
+        for name, (pattern, sensitivity) in (DEFAULT_GASES if gases is None else gases).items():
+            self.add(name, pattern, sensitivity)
+
+    @property
+    def names(self):
+        return list(self._gases)
+
+    @property
+    def masses(self):
+        return sorted(set(amu for pattern, _ in self._gases.values() for amu in pattern))
+
+    def add(self, name, pattern, sensitivity=1.0):
+        """Add (or replace) gas `name` with cracking `pattern` {amu: relative height} and relative `sensitivity`."""
+        if not pattern or any(not isinstance(amu, int) or height < 0 for amu, height in pattern.items()):
+            raise RGAException("Pattern must map integer masses to non-negative peak heights, specified: %s" % pattern)
+        if not isinstance(sensitivity, (float, int)) or sensitivity <= 0:
+            raise RGAException("Sensitivity must be a positive number, specified: %s" % sensitivity)
+        self._gases[name] = (dict(pattern), float(sensitivity))
+
+    def remove(self, name):
+        del self._gases[name]
+
+    def matrix(self, masses):
+        """Response matrix of the library, one row per mass of `masses` and one column per gas."""
+        _RGAClientBase._check_numpy()
+        rows = {amu: i for i, amu in enumerate(masses)}
+        response = np.zeros((len(rows), len(self._gases)))
+        for column, (pattern, sensitivity) in enumerate(self._gases.values()):
+            base = max(pattern.values())
+            for amu, height in pattern.items():
+                if amu in rows:
+                    response[rows[amu], column] = sensitivity * height / base
+        return response
+
+
+def _integer_columns(amu):
+    amu = np.asarray(amu, dtype=float)
+    columns = np.flatnonzero(np.abs(amu - np.round(amu)) < 1e-6)
+    return columns, np.round(amu[columns]).astype(int)
+
+
+def _solve_passive(gram, target, passive):
+    """Unconstrained least squares restricted to the passive variables of each column, grouped by passive set."""
+    solution = np.zeros_like(target)
+    patterns, inverse = np.unique(passive.T, axis=0, return_inverse=True)
+    order = np.argsort(inverse.ravel(), kind="stable")
+    groups = np.split(order, np.cumsum(np.bincount(inverse.ravel(), minlength=len(patterns)))[:-1])
+    for pattern, columns in zip(patterns, groups):
+        variables = np.flatnonzero(pattern)
+        if variables.size and columns.size:
+            solution[np.ix_(variables, columns)] = np.linalg.lstsq(
+                gram[np.ix_(variables, variables)], target[np.ix_(variables, columns)], rcond=None
+            )[0]
+    return solution
+
+
+def _make_feasible(gram, target, passive, x):
+    """Shrink passive sets until the restricted least squares solutions are non-negative (Lawson-Hanson inner loop)."""
+    while True:
+        z = _solve_passive(gram, target, passive)
+        infeasible = passive & (z <= 0)
+        columns = infeasible.any(axis=0)
+        x[:, ~columns] = z[:, ~columns]
+        if not columns.any():
+            return x, passive
+        xc, zc = x[:, columns], z[:, columns]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            alpha = np.where(infeasible[:, columns], xc / (xc - zc), np.inf).min(axis=0)
+        xc = xc + alpha * (zc - xc)
+        passive[:, columns] &= xc > 0
+        x[:, columns] = np.where(passive[:, columns], xc, 0.0)
+
+
+def nnls(response, observations, max_iter=None, tol=1e-10):
+    """
+    Solve min ||response @ x - y|| subject to x >= 0 for every column y of `observations` at once.
+    Lawson-Hanson active set method with columns sharing the same passive set solved together (fast combinatorial
+    NNLS), so the cost grows with the number of distinct passive sets rather than with the number of columns.
+    Return solutions as columns of an array.
+    """
+    _RGAClientBase._check_numpy()
+    observations = np.asarray(observations, dtype=float)
+    norms = np.linalg.norm(response, axis=0)
+    norms[norms == 0] = 1.0
+    scaled = response / norms
+    gram = scaled.T @ scaled
+    target = scaled.T @ observations
+    threshold = tol * np.maximum(np.abs(target).max(axis=0), np.finfo(float).tiny)
+    # start from the positive part of the unconstrained solution
+    passive = _solve_passive(gram, target, np.ones(target.shape, dtype=bool)) > 0
+    x, passive = _make_feasible(gram, target, passive, np.zeros_like(target))
+    for _ in range(3 * gram.shape[0] if max_iter is None else max_iter):
+        gradient = target - gram @ x
+        violated = ~passive & (gradient > threshold)
+        columns = np.flatnonzero(violated.any(axis=0))
+        if not columns.size:
+            break
+        entering = np.argmax(np.where(violated[:, columns], gradient[:, columns], -np.inf), axis=0)
+        sub_passive = passive[:, columns]
+        sub_passive[entering, np.arange(columns.size)] = True
+        x[:, columns], passive[:, columns] = _make_feasible(gram, target[:, columns], sub_passive, x[:, columns])
+    return x / norms[:, None]
+
+
+def decompose(spectra, amu=None, library=None, max_iter=None, tol=1e-10):
+    """
+    Fit partial pressures of the gases of `library` (default gases if None) to `spectra`.
+
+    `spectra` is either a single spectrum as returned by read_spectrum() or read_histogram() (or an (amu, pressures,
+    total) tuple), or a 2D array with one spectrum per row (e.g. pressures returned by
+    :meth:`~pyrga.storage.SpectrumLog.query`) with the mass axis given as `amu`. Only points at integer masses are
+    used, so analog scans are sampled at their peak positions. All spectra are fitted at once.
+    Return :class:`Composition`.
+    """
+    _RGAClientBase._check_numpy()
+    single = isinstance(spectra, Spectrum) or isinstance(spectra, tuple) and len(spectra) == 3
+    if single:
+        amu, pressures = spectra[0], np.asarray(spectra[1], dtype=float)[None, :]
+    else:
+        pressures = np.atleast_2d(np.asarray(spectra, dtype=float))
+    if amu is None or len(amu) != pressures.shape[1]:
+        raise RGAException("Mass axis must be specified and match the length of the spectra")
+    library = GasLibrary() if library is None else library
+    columns, masses = _integer_columns(amu)
+    observations = pressures[:, columns].T
+    response = library.matrix(masses)
+    solution = nnls(response, observations, max_iter, tol)
+    residuals = np.sqrt(np.mean((response @ solution - observations) ** 2, axis=0))
+    return Composition(library.names, solution.T, residuals)
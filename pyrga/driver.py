@@ -1,58 +1,118 @@
 # -*- coding: utf-8 -*-
 """Python client for SRS RGA (Residual Gas Analyzer from Stanford Research Systems)."""
 
+import array
+import contextlib
+import functools
+import heapq
+import itertools
 import logging
+import queue
 import struct
+import threading
 import time
 import serial
 
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only required for array outputs
+    np = None
+
 
 def seq(start, stop, step):
     return [start + step * i for i in range(int(round((stop - start) / step)))] + [stop]
 
 
+@functools.lru_cache(maxsize=64)
+def amu_axis(amu_min, amu_max, amu_res=None):
+    """
+    Mass axis of a scan as a tuple, cached for each (amu_min, amu_max, amu_res) combination.
+    Analog scans have amu_res steps per amu rounded to 0.01 amu, histogram scans (amu_res=None) have integer masses.
+    """
+    if amu_res is None:
+        return tuple(range(amu_min, amu_max + 1))
+    return tuple(round(x, 2) for x in seq(amu_min, amu_max, 1.0 / amu_res))
+
+
+@functools.lru_cache(maxsize=64)
+def amu_axis_array(amu_min, amu_max, amu_res=None):
+    """Read-only numpy array version of :func:`amu_axis`, shared between scans with identical parameters."""
+    axis = np.array(amu_axis(amu_min, amu_max, amu_res), dtype=float)
+    axis.flags.writeable = False
+    return axis
+
+
 class RGAException(Exception):
     pass
 
 
-class RGAClient:
-    """RGAClient primary client object to communicate with SRS RGA
+class Spectrum:
+    """Spectrum result of analog and histogram scans (and of planned single mass reads)
 
-    The :class:`~.RGAClient` object holds information necessary to connect to SRS RGA via serial interface.
-    Requests to read data, set and query parameters can be made to RGA directly through the client.
+    Partial pressures are stored in an array('d') (or a numpy array for array outputs) and the mass axis is shared by
+    all scans with the same (amu_min, amu_max, amu_res), see :func:`amu_axis` and :func:`amu_axis_array`, so keeping
+    many scans in memory costs little more than 8 bytes per point. Each scan carries the time it was received and the
+    sensitivities used to convert currents to pressures. For compatibility with earlier versions, a spectrum unpacks
+    and indexes like the (amu, pressures, total) tuple.
 
-    :param com_port: serial port to be used for communication with RGA (e.g. '/dev/ttyUSB0' or 'COM4')
-    :type com_port: str
-    :param partial_sens_mA_per_Torr: partial pressure sensitivity to be used when converting ion current to pressure,
-    in units of mA/Torr, defaults to 'default' (value is queried from RGA)
+    :param amu: mass axis of the scan in units of amu
+    :type amu: tuple or numpy.ndarray
+    :param pressures: partial pressures in units of Torr
+    :type pressures: array.array or numpy.ndarray
+    :param total: total pressure in units of Torr
+    :type total: float
+    :param timestamp: time the scan was received in units of s since epoch
+    :type timestamp: float
+    :param partial_sens_mA_per_Torr: partial pressure sensitivity used to convert the currents
     :type partial_sens_mA_per_Torr: float
-    :param total_sens_mA_per_Torr: total pressure sensitivity to be used when converting ion current to pressure,
-    in units of mA/Torr, defaults to 'default' (value is queried from RGA)
+    :param total_sens_mA_per_Torr: total pressure sensitivity used to convert the currents
     :type total_sens_mA_per_Torr: float
-    :param electron_energy_eV: electron impact ionization energy in units of eV, limits: [25, 105], defaults to 70
-    :type electron_energy_eV: int
-    :param ion_energy_eV: energy of ions in the anode grid cage in units of eV, choices: 8 or 12, defaults to 12
-    :type ion_energy_eV: int
-    :param plate_voltage_V: negative bias voltage of the focus plate in units of V, limits: [0, 150], defaults to 90
-    :type plate_voltage_V: int
-    :param emission_current_mA: requested electron emission current in units of mA, limits: [0.00, 3.50] with step
-    of 0.02, e.g. allowed values: 0.00, 0.02, 0.04... (zero value turns off the filament), defaults to 1.00
-    :type emission_current_mA: float
-    :param cedm_voltage_V: negative high voltage across the electron multiplier (CDEM) in units of V, this setting only
-    works in RGA heads with the CDEM option installed, limits: [0, 2490] (zero value turns off the electron multiplier
-    and enables Faraday cup detection), defaults to 0 (Faraday cup detection)
-    :type cedm_voltage_V: int
-    :param noise_floor: electrometer’s noise-floor, sets the rate and detection limit for ion current measurements,
-    lower noise-floor means cleaner baselines and lower detection limits but longer measurement and scanning times,
-    limits: [0, 7], defaults to 4
-    :type noise_floor: int
+    """
 
-    :raises RGAException:
-        - if can't communicate with RGA via specified serial port
-        - if can't query RGA parameters
-        - if any of parameters are of a wrong type or out of bounds
-        - if set parameter differs from reported readback value
-        - if reported status byte contains active error bits
+    __slots__ = ("amu", "pressures", "total", "timestamp", "partial_sens_mA_per_Torr", "total_sens_mA_per_Torr")
+
+    def __init__(
+        self, amu, pressures, total, timestamp=None, partial_sens_mA_per_Torr=None, total_sens_mA_per_Torr=None
+    ):
+        self.amu = amu
+        self.pressures = pressures
+        self.total = total
+        self.timestamp = timestamp
+        self.partial_sens_mA_per_Torr = partial_sens_mA_per_Torr
+        self.total_sens_mA_per_Torr = total_sens_mA_per_Torr
+
+    def __iter__(self):
+        return iter((self.amu, self.pressures, self.total))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return (self.amu, self.pressures, self.total)[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, (Spectrum, tuple)) or len(other) != 3:
+            return NotImplemented
+        return all(_values_equal(a, b) for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "Spectrum(%s to %s amu, %s points, total=%s, timestamp=%s)" % (
+            self.amu[0], self.amu[-1], len(self.amu), self.total, self.timestamp,
+        )
+
+
+def _values_equal(a, b):
+    if not hasattr(a, "__len__") or not hasattr(b, "__len__"):
+        return a == b
+    return len(a) == len(b) and all(x == y for x, y in zip(a, b))
+
+
+class _RGAClientBase:
+    """
+    Protocol constants, parameter validation and decoding shared by :class:`~.RGAClient` and
+    :class:`~pyrga.aio.AsyncRGAClient`. Nothing in here performs any I/O.
     """
 
     _STATUS_ERROR_BITS = [
@@ -93,6 +153,630 @@ class RGAClient:
     _TOTAL_SENS_MIN = 0.0  # mA/Torr
     _TOTAL_SENS_MAX = 100.0  # mA/Torr
     _SRS_RGA_MODELS = ["SRSRGA100", "SRSRGA200", "SRSRGA300"]
+    _READ_TIMEOUT = 5.0  # s, replies to queries and status echoes, margin added to estimated read times
+    _READ_TIMEOUT_FACTOR = 3.0  # measurement read timeouts are this multiple of the estimated read time (+ margin)
+    _BAUDRATE = 28800
+    # approximate measurement time of a single point (single mass or a step of a scan) vs. noise floor setting, s
+    _POINT_TIMES = [0.4, 0.2, 0.1, 0.05, 0.025, 0.012, 0.006, 0.003]
+    _COMMAND_OVERHEAD = 0.02  # s, round-trip of a command on top of measurement and transfer times
+    # setpoint attribute and default of settings tracked when they are sent in a batch
+    _TRACKED_SETTINGS = {
+        "NF": ("_noise_floor", "_NOISE_FLOOR_DEFAULT"),
+        "EE": ("_electron_energy_eV", "_ELECTRON_ENERGY_DEFAULT"),
+        "IE": ("_ion_energy_eV", "_ION_ENERGY_DEFAULT"),
+        "VF": ("_plate_voltage_V", "_PLATE_VOLTAGE_DEFAULT"),
+        "HV": ("_cedm_voltage_V", "_CEDM_VOLTAGE_DEFAULT"),
+        "FL": ("_emission_current_mA", "_EMISSION_CURRENT_DEFAULT"),
+        "MI": ("_amu_min", None),
+        "MF": ("_amu_max", None),
+        "SA": ("_amu_res", None),
+    }
+    _INTERRUPT_POLL_TIME = 0.05  # s, longest blocking read while background acquisition is running
+    _SCAN_COUNT_MAX = 255  # max number of scans triggered by a single SC command
+    _DRAIN_QUIET_TIME = 0.2  # s, silence on serial port indicating that RGA stopped sending data
+
+    _metrics = None  # instrumentation hook, see pyrga.metrics.RGAMetrics
+    _last_command = None  # command that responses and decoding are attributed to by the hook
+    _capture = None  # raw frame recorder, see pyrga.capture.RawCapture
+
+    def _set_device_model(self, device_id):
+        self._device_id = device_id
+        for model in self._SRS_RGA_MODELS:
+            if model in self._device_id:
+                self._device_model = model
+                self._amu_scan_max = int(model.replace("SRSRGA", ""))
+                return
+        raise RGAException("Cannot query device model")
+
+    def _check_filament_on(self):
+        if not self._filament_status:
+            raise RGAException("Filament is off! Turn on filament first!")
+
+    def _validate_mass(self, amu):
+        if not isinstance(amu, int):
+            raise RGAException("AMU mass number must be an integer, specified: %s" % amu)
+        if amu < self._AMU_SCAN_MIN or amu > self._amu_scan_max:
+            raise RGAException(
+                "Specified mass is outside of allowed bounds [%s, %s]" % (self._AMU_SCAN_MIN, self._amu_scan_max)
+            )
+
+    def _validate_scan_count(self, count):
+        if count is not None and (not isinstance(count, int) or count < 1):
+            raise RGAException("Number of scans must be a positive integer or None, specified: %s" % count)
+
+    def _spectrogram_params_differ(self, amu_min, amu_max, amu_res):
+        return self._amu_min != amu_min or self._amu_max != amu_max or self._amu_res != amu_res
+
+    @classmethod
+    def _estimate_read_time(cls, points, noise_floor, length_bytes):
+        """Estimated time from sending a measurement command until `length_bytes` covering `points` are received."""
+        measurement = points * cls._POINT_TIMES[noise_floor]
+        transfer = length_bytes * 10.0 / cls._BAUDRATE  # 8 data bits, start and stop bits
+        return cls._COMMAND_OVERHEAD + max(measurement, transfer)  # points are sent as soon as they are measured
+
+    def _measurement_timeout(self, length_bytes):
+        """Read timeout of a measurement of `length_bytes` (4 bytes per point) at the current noise floor."""
+        points = max(length_bytes // 4 - 1, 1)  # scans end with total pressure
+        estimate = self._estimate_read_time(points, self._noise_floor, length_bytes)
+        return estimate * self._READ_TIMEOUT_FACTOR + self._READ_TIMEOUT
+
+    def _spectrum_bytes(self):
+        spectrum_len = (self._amu_max - self._amu_min) * self._amu_res + 1
+        return 4 * (spectrum_len + 1)  # final 4 bytes is total pressure
+
+    def _histogram_bytes(self):
+        histogram_len = self._amu_max - self._amu_min + 1
+        return 4 * (histogram_len + 1)  # final 4 bytes is total pressure
+
+    def _validate_partial_sens(self, partial_sens_mA_per_Torr):
+        if not isinstance(partial_sens_mA_per_Torr, (float, int)):
+            raise RGAException(
+                "Partial pressure sensitivity must be an int or float, specified: %s" % partial_sens_mA_per_Torr
+            )
+        if partial_sens_mA_per_Torr < self._PARTIAL_SENS_MIN or partial_sens_mA_per_Torr > self._PARTIAL_SENS_MAX:
+            raise RGAException(
+                "Partial pressure sensitivity setting is ouside of allowed bounds [%s, %s]" %
+                (self._PARTIAL_SENS_MIN, self._PARTIAL_SENS_MAX)
+            )
+        return partial_sens_mA_per_Torr
+
+    def _validate_total_sens(self, total_sens_mA_per_Torr):
+        if not isinstance(total_sens_mA_per_Torr, (float, int)):
+            raise RGAException(
+                "Total pressure sensitivity must be an integer or float, specified: %s" % total_sens_mA_per_Torr
+            )
+        if total_sens_mA_per_Torr < self._TOTAL_SENS_MIN or total_sens_mA_per_Torr > self._TOTAL_SENS_MAX:
+            raise RGAException(
+                "Total pressure sensitivity setting is ouside of allowed bounds [%s, %s]" %
+                (self._TOTAL_SENS_MIN, self._TOTAL_SENS_MAX)
+            )
+        return total_sens_mA_per_Torr
+
+    def _validate_electron_energy(self, electron_energy_eV):
+        """Validate and store electron energy setpoint, return value to be sent with EE command."""
+        if electron_energy_eV == "default":
+            self._electron_energy_eV = self._ELECTRON_ENERGY_DEFAULT
+            self.logger.debug("Default electron energy specified, setting value: %s eV...", self._electron_energy_eV)
+            return "*"
+        if not isinstance(electron_energy_eV, int):
+            raise RGAException("Electron energy must be an integer, specified: %s" % electron_energy_eV)
+        if electron_energy_eV < self._ELECTRON_ENERGY_MIN or electron_energy_eV > self._ELECTRON_ENERGY_MAX:
+            raise RGAException(
+                "Electron energy setting is ouside of allowed bounds [%s, %s]" %
+                (self._ELECTRON_ENERGY_MIN, self._ELECTRON_ENERGY_MAX)
+            )
+        self._electron_energy_eV = electron_energy_eV
+        return self._electron_energy_eV
+
+    def _validate_ion_energy(self, ion_energy_eV):
+        """Validate and store ion energy setpoint, return value to be sent with IE command."""
+        if ion_energy_eV == "default":
+            self._ion_energy_eV = self._ION_ENERGY_DEFAULT
+            self.logger.debug(
+                "Default ion energy specified, setting value: %s eV...", self._ion_energy_eV,
+            )
+            return "*"
+        if ion_energy_eV not in self._ION_ENERGIES_ALLOWED:
+            raise RGAException(
+                "Ion energy must be equal to one of allowed values: %s, specified: %s" %
+                (self._ION_ENERGIES_ALLOWED, ion_energy_eV)
+            )
+        self._ion_energy_eV = ion_energy_eV
+        return self._ION_ENERGIES_ALLOWED[self._ion_energy_eV]
+
+    def _parse_ion_energy(self, ie_ascii):
+        ie = int(ie_ascii)
+        return next(key for key, value in self._ION_ENERGIES_ALLOWED.items() if value == ie)
+
+    def _validate_plate_voltage(self, plate_voltage_V):
+        """Validate and store focus plate voltage setpoint, return value to be sent with VF command."""
+        if plate_voltage_V == "default":
+            self._plate_voltage_V = self._PLATE_VOLTAGE_DEFAULT
+            self.logger.debug(
+                "Default focus plate voltage specified, setting value: %s V...", self._plate_voltage_V,
+            )
+            return "*"
+        if not isinstance(plate_voltage_V, int):
+            raise RGAException("Focus plate voltage must be an integer, specified: %s" % plate_voltage_V)
+        if plate_voltage_V < self._PLATE_VOLTAGE_MIN or plate_voltage_V > self._PLATE_VOLTAGE_MAX:
+            raise RGAException(
+                "Focus plate voltage setting is outside of allowed bounds [%s, %s]" %
+                (self._PLATE_VOLTAGE_MIN, self._PLATE_VOLTAGE_MAX)
+            )
+        self._plate_voltage_V = plate_voltage_V
+        return -self._plate_voltage_V
+
+    def _validate_spectrogram_params(self, amu_min, amu_max, amu_res):
+        for amu in [amu_min, amu_max, amu_res]:
+            if not isinstance(amu, int):
+                raise RGAException("AMU values and resolution must be an integer, specified: %s" % amu)
+        if amu_min < self._AMU_SCAN_MIN or amu_max > self._amu_scan_max:
+            raise RGAException(
+                "AMU values are outside of allowed bounds [%s, %s], specified: min %s, max %s" %
+                (self._AMU_SCAN_MIN, self._amu_scan_max, amu_min, amu_max)
+            )
+        if amu_min >= amu_max:
+            raise RGAException(
+                "AMU min value must be lower than AMU max value, specified: min %s, max %s" %
+                (amu_min, amu_max)
+            )
+        if amu_res < self._AMU_RES_MIN or amu_res > self._AMU_RES_MAX:
+            raise RGAException(
+                "AMU resolution is outside of allowed bounds [%s, %s], specified: %s" %
+                (self._AMU_RES_MIN, self._AMU_RES_MAX, amu_res)
+            )
+        self._amu_min = amu_min
+        self._amu_max = amu_max
+        self._amu_res = amu_res
+
+    def _check_spectrogram_params_readback(self, readback):
+        (amu_min_readback, amu_max_readback, amu_res_readback,) = readback
+        if amu_min_readback != self._amu_min or amu_max_readback != self._amu_max or amu_res_readback != self._amu_res:
+            raise RGAException(
+                "Spectrogram parameters readback (%s, %s, %s) differ from setpoints (%s, %s, %s)" %
+                (amu_min_readback, amu_max_readback, amu_res_readback, self._amu_min, self._amu_max, self._amu_res)
+            )
+
+    def _validate_emission_current(self, emission_current_mA):
+        if emission_current_mA == "default":
+            self._emission_current_mA = self._EMISSION_CURRENT_DEFAULT
+            self.logger.debug(
+                "Default emission current specified, setting value: %s V...", self._emission_current_mA,
+            )
+            return
+        if not isinstance(emission_current_mA, (float, int)):
+            raise RGAException(
+                "Emission current setting must be an integer or float, specified: %s" % emission_current_mA
+            )
+        if (
+            float(emission_current_mA) < self._EMISSION_CURRENT_MIN
+            or float(emission_current_mA) > self._EMISSION_CURRENT_MAX
+        ):
+            raise RGAException(
+                "Emission current setting is ouside of allowed bounds [%s, %s]" %
+                (self._EMISSION_CURRENT_MIN, self._EMISSION_CURRENT_MAX)
+            )
+        if emission_current_mA not in self._EMISSION_CURRENTS_ALLOWED:
+            raise RGAException("Emission current setting must be specified with increment of 0.02 mA")
+        self._emission_current_mA = emission_current_mA
+
+    def _check_emission_current_readback(self, emission_current_mA_readback):
+        if (
+            emission_current_mA_readback < self._emission_current_mA - self._EMISSION_CURRENT_INC
+            or emission_current_mA_readback > self._emission_current_mA + self._EMISSION_CURRENT_INC
+        ):
+            raise RGAException(
+                "Emission current setting readback (%s mA) differs from setpoint (%s mA)" %
+                (emission_current_mA_readback, self._emission_current_mA)
+            )
+
+    def _is_filament_current_on(self, filament_current_mA):
+        return filament_current_mA >= 0.0 + self._EMISSION_CURRENT_INC
+
+    def _validate_cdem_voltage(self, cedm_voltage_V):
+        """Validate and store CDEM voltage setpoint, return value to be sent with HV command."""
+        if cedm_voltage_V == "default":
+            self._cedm_voltage_V = self._CEDM_VOLTAGE_DEFAULT
+            self.logger.debug(
+                "Default CDEM voltage specified, setting value: %s V...", self._cedm_voltage_V,
+            )
+            return "*"
+        if cedm_voltage_V == 0:  # Faraday cup detection
+            self.logger.debug("Turning off electron multiplier (Faraday cup detection)")
+        else:
+            if not isinstance(cedm_voltage_V, int):
+                raise RGAException("CDEM voltage must be an integer, specified: %s" % cedm_voltage_V)
+            if cedm_voltage_V < self._CEDM_VOLTAGE_MIN or cedm_voltage_V > self._CEDM_VOLTAGE_MAX:
+                raise RGAException(
+                    "CDEM voltage setting is outside of allowed bounds [%s, %s]" %
+                    (self._CEDM_VOLTAGE_MIN, self._CEDM_VOLTAGE_MAX)
+                )
+        self._cedm_voltage_V = cedm_voltage_V
+        return self._cedm_voltage_V
+
+    def _check_cdem_voltage_readback(self, cedm_voltage_V_readback):
+        if not self._cedm_voltage_V * 0.9 <= cedm_voltage_V_readback <= self._cedm_voltage_V * 1.1:
+            raise RGAException(
+                "CDEM voltage setting readback (%s V) differs from setpoint (%s V)" %
+                (cedm_voltage_V_readback, self._cedm_voltage_V)
+            )
+
+    def _validate_noise_floor(self, noise_floor):
+        """Validate and store noise floor setpoint, return value to be sent with NF command."""
+        if noise_floor == "default":
+            self._noise_floor = self._NOISE_FLOOR_DEFAULT
+            self.logger.debug(
+                "Default noise floor specified, setting value: %s V...", self._noise_floor,
+            )
+            return "*"
+        if noise_floor not in self._NOISE_FLOORS_ALLOWED:
+            raise RGAException(
+                "Noise floor must be equal to one of allowed values: %s, specified: %s" %
+                (self._NOISE_FLOORS_ALLOWED, noise_floor)
+            )
+        self._noise_floor = noise_floor
+        return self._noise_floor
+
+    @staticmethod
+    def _check_readback(setting, readback, setpoint, units=""):
+        if readback != setpoint:
+            raise RGAException(
+                "%s setting readback (%s%s) differs from setpoint (%s%s)" % (setting, readback, units, setpoint, units)
+            )
+
+    def _parse_cdem_presence(self, status_bytes):
+        status_byte = status_bytes[0]  # last two bytes are \n\r
+        bin_str = "{:08b}".format(status_byte)
+        if bin_str[7] == "1":
+            return False
+        return True
+
+    def _parse_status_byte(self, status_bytes):
+        status_byte = status_bytes[0]  # last two bytes are \n\r
+        bin_str = list(map(int, "{:08b}".format(status_byte)))
+        if not self._cdem_present:
+            bin_str[3] = 0
+        for s, e in zip(bin_str, self._STATUS_ERROR_BITS):
+            if s == "1" and e:
+                raise RGAException("Error %s reported in status echo!" % e)
+
+    def _format_command(self, cmd, value=""):
+        return "{}{}\r".format(cmd, value)
+
+    def _reports_status(self, cmd, value=""):
+        return "?" not in str(value) and cmd in self._STATUS_REPORTING_COMMANDS
+
+    def _record_metrics(self, operation, start, first_byte=None, **kwargs):
+        """Report operation started at `start` (and receiving data since `first_byte`) to the instrumentation hook."""
+        end = time.monotonic()
+        wait = (end if first_byte is None else first_byte) - start
+        self._metrics.record(operation, self._last_command, end - start, wait, **kwargs)
+
+    def _capture_frame(self, command, payload, amu_min, amu_max, amu_res=None):
+        self._capture.record(
+            command,
+            amu_min,
+            amu_max,
+            amu_res,
+            self._noise_floor,
+            self._partial_sens_mA_per_Torr,
+            self._total_sens_mA_per_Torr,
+            payload,
+        )
+
+    def _decode_spectrum(self, spectrum_bytes, as_array=False):
+        start = time.monotonic()
+        if self._capture is not None:
+            self._capture_frame("SC", spectrum_bytes, self._amu_min, self._amu_max, self._amu_res)
+        if as_array:
+            scan = self._decode_scan_array(spectrum_bytes, amu_axis_array(self._amu_min, self._amu_max, self._amu_res))
+        else:
+            scan = self._decode_scan(spectrum_bytes, amu_axis(self._amu_min, self._amu_max, self._amu_res))
+        if self._metrics is not None:
+            self._record_metrics("decode", start, start)
+        return scan
+
+    def _decode_histogram(self, histogram_bytes, as_array=False):
+        start = time.monotonic()
+        if self._capture is not None:
+            self._capture_frame("HS", histogram_bytes, self._amu_min, self._amu_max)
+        if as_array:
+            scan = self._decode_scan_array(histogram_bytes, amu_axis_array(self._amu_min, self._amu_max))
+        else:
+            scan = self._decode_scan(histogram_bytes, amu_axis(self._amu_min, self._amu_max))
+        if self._metrics is not None:
+            self._record_metrics("decode", start, start)
+        return scan
+
+    def _decode_scan(self, scan_bytes, scan_amu):
+        if len(scan_bytes) != 4 * (len(scan_amu) + 1):
+            raise RGAException(
+                "Cannot parse scan: %s bytes received for %s amu values and total pressure" %
+                (len(scan_bytes), len(scan_amu))
+            )
+        scan_currents = struct.unpack_from("<%si" % (len(scan_amu) + 1), scan_bytes)
+        partial_factor = self._CURRENT_MULTIPLIER / self._partial_sens_mA_per_Torr * 1000.0
+        scan_pres = array.array("d", [c * partial_factor for c in scan_currents[:-1]])
+        scan_pres_sum = scan_currents[-1] * self._CURRENT_MULTIPLIER / self._total_sens_mA_per_Torr * 1000.0
+        return self._spectrum(scan_amu, scan_pres, scan_pres_sum)
+
+    def _decode_scan_array(self, scan_bytes, scan_amu):
+        """
+        Vectorized version of :meth:`_decode_scan`, returns numpy arrays of amu values and partial pressures.
+        Currents are only viewed in `scan_bytes`, the returned pressures are a new array.
+        """
+        if len(scan_bytes) != 4 * (len(scan_amu) + 1):
+            raise RGAException(
+                "Cannot parse scan: %s bytes received for %s amu values and total pressure" %
+                (len(scan_bytes), len(scan_amu))
+            )
+        scan_currents = np.frombuffer(scan_bytes, dtype="<i4")
+        partial_factor = self._CURRENT_MULTIPLIER / self._partial_sens_mA_per_Torr * 1000.0
+        scan_pres = scan_currents[:-1] * partial_factor
+        scan_pres_sum = int(scan_currents[-1]) * self._CURRENT_MULTIPLIER / self._total_sens_mA_per_Torr * 1000.0
+        return self._spectrum(scan_amu, scan_pres, scan_pres_sum)
+
+    def _spectrum(self, scan_amu, scan_pres, scan_pres_sum):
+        return Spectrum(
+            scan_amu,
+            scan_pres,
+            scan_pres_sum,
+            time.time(),
+            self._partial_sens_mA_per_Torr,
+            self._total_sens_mA_per_Torr,
+        )
+
+    @staticmethod
+    def _check_numpy():
+        if np is None:
+            raise RGAException("numpy is required for array outputs, install it with 'pip install pyrga[numpy]'")
+
+    def _decode_bin_current(self, current_bytes):
+        """
+        Decode binary encoded ion current data from RGA to floating point format in units of A.
+        Binary encoding: little-endian integer representing a mantissa with an exponent of 1e-16 units of A.
+        """
+        try:  # TODO: too wide of an exception handler
+            return struct.unpack("<i", current_bytes)[0] * self._CURRENT_MULTIPLIER
+        except:
+            raise RGAException("Cannot decode binary current value %s" % current_bytes)
+
+    def _decode_mass(self, amu, current_bytes):
+        if self._capture is not None:
+            self._capture_frame("MR", current_bytes, amu, amu)
+        return self._current_to_partial_pressure(current_bytes)
+
+    def _current_to_partial_pressure(self, current_bytes):
+        return self._decode_bin_current(current_bytes) / self._partial_sens_mA_per_Torr * 1000.0
+
+    def _current_to_total_pressure(self, current_bytes):
+        return self._decode_bin_current(current_bytes) / self._total_sens_mA_per_Torr * 1000.0
+
+
+class RGABatch:
+    """RGABatch queues commands and queries to be sent to RGA in a single write
+
+    Responses (status echoes and query replies) are read and parsed in order once the batch is executed, which saves
+    a round-trip per command. Use :meth:`~.RGAClient.batch` to create a batch. Queued commands are not validated,
+    settings they change are taken over by the client once RGA accepts them. Measurement commands, which return binary
+    data, cannot be batched.
+
+    :param client: client to execute the batch with
+    :type client: RGAClient
+
+    :raises RGAException: if a measurement command (MR, SC, HS) is queued
+    """
+
+    _MEASUREMENT_CMDS = ["MR", "SC", "HS"]
+
+    def __init__(self, client):
+        self._client = client
+        self._entries = []
+        self.results = None
+
+    def command(self, cmd, value=""):
+        """Queue a command (e.g. 'NF', 2), return index of its result (None or status check) in the results list."""
+        self._check_not_measurement(cmd)
+        self._entries.append((cmd, value, None))
+        return len(self._entries) - 1
+
+    def query(self, cmd, parse=str):
+        """Queue a query (e.g. 'NF', int), return index of its result parsed with `parse` in the results list."""
+        self._check_not_measurement(cmd)
+        self._entries.append((cmd, "?", parse))
+        return len(self._entries) - 1
+
+    def execute(self):
+        """Send all queued commands in a single write, return list of results in the order of commands."""
+        entries, self._entries = self._entries, []
+        self.results = self._client._execute_batch(entries)  # pylint: disable=W0212
+        return self.results
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _check_not_measurement(self, cmd):
+        # binary payloads of measurements would be taken for the replies to the rest of the batch
+        if cmd.upper() in self._MEASUREMENT_CMDS:
+            raise RGAException("Measurement command %s cannot be batched, use the read methods of the client" % cmd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None and self._entries:
+            self.execute()
+
+
+# priorities of transactions on the serial link of RGAClient, lower values are granted first
+_SAFETY = 0
+_CONFIG = 1
+_MEASUREMENT = 2
+
+
+class _CommandArbiter:
+    """
+    Serializes transactions (a command and the responses to it) of threads sharing a client. Waiting transactions
+    are granted in order of priority, then arrival. A thread may nest transactions, which run as part of its
+    outermost one. A safety transaction waiting behind a measurement sets :attr:`preempt`, which the measurement
+    checks while waiting for data, so that it is aborted instead of delaying the safety command. A transaction can be
+    suspended while its owner is not using the link (e.g. a generator of scans waiting for its consumer), only safety
+    transactions are granted in the meantime and set :attr:`interrupted`. Other transactions of the owner of the
+    suspended one raise :class:`RGAException`, as the link is still in use by the suspended transaction.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._counter = itertools.count()
+        self._waiting = []  # heap of (priority, arrival, thread)
+        self._owner = None
+        self._depth = 0
+        self.priority = None  # priority of the transaction in progress
+        self.preempt = threading.Event()
+        self._suspended = None  # (thread, depth, priority) of the suspended transaction
+        self.interrupted = False  # a safety transaction ran while a transaction was suspended
+
+    @contextlib.contextmanager
+    def transaction(self, priority):
+        thread = threading.current_thread()
+        with self._condition:
+            if self._owner is thread:
+                self._depth += 1
+            else:
+                suspended_owner = self._suspended is not None and self._suspended[0] is thread
+                if suspended_owner and priority != _SAFETY:
+                    raise RGAException("Serial port is in use by scans streamed in this thread, close them first")
+                entry = (priority, next(self._counter), thread)
+                heapq.heappush(self._waiting, entry)
+                if priority == _SAFETY and self.priority == _MEASUREMENT:
+                    self.preempt.set()
+                # the owner of a suspended transaction must not wait behind transactions that wait for its resumption
+                while self._owner is not None or (self._waiting[0] is not entry and not suspended_owner) or (
+                    self._suspended is not None and priority != _SAFETY
+                ):
+                    self._condition.wait()
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                if self._suspended is not None and priority == _SAFETY:
+                    self.interrupted = True
+                self._owner = thread
+                self._depth = 1
+                self.priority = priority
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._owner = None
+                    self.priority = None
+                    self.preempt.clear()
+                    self._condition.notify_all()
+
+    def suspend(self):
+        """Suspend the transaction of the calling thread, letting safety transactions of other threads run."""
+        with self._condition:
+            self._suspended = (self._owner, self._depth, self.priority)
+            self._owner = None
+            self.priority = None
+            self._condition.notify_all()
+
+    def resume(self):
+        """Resume the suspended transaction in the calling thread, return True if it was interrupted meanwhile."""
+        with self._condition:
+            while self._owner is not None:
+                self._condition.wait()
+            _, self._depth, self.priority = self._suspended
+            self._owner = threading.current_thread()
+            self._suspended = None
+            interrupted, self.interrupted = self.interrupted, False
+            return interrupted
+
+
+def _serialized(priority):
+    """Decorator running a method of RGAClient as a single transaction of `priority` on the serial link."""
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._transaction(priority):  # pylint: disable=W0212
+                return method(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class _ReadPreempted(RGAException):
+    pass
+
+
+class RGAClient(_RGAClientBase):
+    """RGAClient primary client object to communicate with SRS RGA
+
+    The :class:`~.RGAClient` object holds information necessary to connect to SRS RGA via serial interface.
+    Requests to read data, set and query parameters can be made to RGA directly through the client.
+
+    A client can be shared between threads. Every request is a transaction on the serial link, requests of other
+    threads wait for it to complete and are then served in order of priority: turning off the filament first, then
+    settings and queries, then reads. Turning off the filament does not wait for a read of another thread in progress,
+    the read is aborted (and raises :class:`RGAException`) instead. Scans streamed by :meth:`iter_spectra` keep the
+    link until the generator is exhausted or closed, except for turning off the filament, which aborts the stream
+    while the consumer is busy as well (the generator raises :class:`RGAException` when resumed). Other requests of
+    the consuming thread raise :class:`RGAException` until then.
+
+    :param com_port: serial port to be used for communication with RGA (e.g. '/dev/ttyUSB0' or 'COM4'), or an already
+    opened pyserial-like object (e.g. :class:`~pyrga.simulator.SimulatedSerial`)
+    :type com_port: str or serial.Serial
+    :param partial_sens_mA_per_Torr: partial pressure sensitivity to be used when converting ion current to pressure,
+    in units of mA/Torr, defaults to 'default' (value is queried from RGA)
+    :type partial_sens_mA_per_Torr: float
+    :param total_sens_mA_per_Torr: total pressure sensitivity to be used when converting ion current to pressure,
+    in units of mA/Torr, defaults to 'default' (value is queried from RGA)
+    :type total_sens_mA_per_Torr: float
+    :param electron_energy_eV: electron impact ionization energy in units of eV, limits: [25, 105], defaults to 70
+    :type electron_energy_eV: int
+    :param ion_energy_eV: energy of ions in the anode grid cage in units of eV, choices: 8 or 12, defaults to 12
+    :type ion_energy_eV: int
+    :param plate_voltage_V: negative bias voltage of the focus plate in units of V, limits: [0, 150], defaults to 90
+    :type plate_voltage_V: int
+    :param emission_current_mA: requested electron emission current in units of mA, limits: [0.00, 3.50] with step
+    of 0.02, e.g. allowed values: 0.00, 0.02, 0.04... (zero value turns off the filament), defaults to 1.00
+    :type emission_current_mA: float
+    :param cedm_voltage_V: negative high voltage across the electron multiplier (CDEM) in units of V, this setting only
+    works in RGA heads with the CDEM option installed, limits: [0, 2490] (zero value turns off the electron multiplier
+    and enables Faraday cup detection), defaults to 0 (Faraday cup detection)
+    :type cedm_voltage_V: int
+    :param noise_floor: electrometer’s noise-floor, sets the rate and detection limit for ion current measurements,
+    lower noise-floor means cleaner baselines and lower detection limits but longer measurement and scanning times,
+    limits: [0, 7], defaults to 4
+    :type noise_floor: int
+    :param fast_connect: query the current RGA settings in one pass and only send the settings that differ from
+    requested values instead of setting and verifying each of them, defaults to False
+    :type fast_connect: bool
+    :param calibrate: run :meth:`calibrate_all` after connecting, defaults to True
+    :type calibrate: bool
+    :param state: settings snapshot returned by :meth:`get_state` of an earlier connection, used in fast-connect mode
+    instead of querying RGA if the device ID matches, defaults to None
+    :type state: dict
+    :param cache: answer getters with the last verified value of each setting instead of querying RGA (use
+    `refresh=True` to force a query), the cache is cleared on communication errors and on reconnect; emission current
+    is never cached as the filament may trip at any time, defaults to False
+    :type cache: bool
+    :param metrics: instrumentation hook recording timing of every command, read and decoded scan, e.g.
+    :class:`~pyrga.metrics.RGAMetrics`, defaults to None
+    :type metrics: pyrga.metrics.RGAMetrics
+    :param capture: recorder of the raw currents of every scan and single mass read, e.g.
+    :class:`~pyrga.capture.RawCapture`, defaults to None
+    :type capture: pyrga.capture.RawCapture
+
+    :raises RGAException:
+        - if can't communicate with RGA via specified serial port
+        - if can't query RGA parameters
+        - if any of parameters are of a wrong type or out of bounds
+        - if set parameter differs from reported readback value
+        - if reported status byte contains active error bits
+    """
 
     def __init__(
         self,
@@ -105,24 +789,56 @@ class RGAClient:
         emission_current_mA="default",
         cedm_voltage_V=0,  # 0: set faraday cup operation by default instead of electron multiplier
         noise_floor="default",
+        fast_connect=False,
+        calibrate=True,
+        state=None,
+        cache=False,
+        metrics=None,
+        capture=None,
     ):
         """Construct a new RGAClient object."""
         self.logger = logging.getLogger(__name__)
-        self._com_port = com_port
-        self.logger.info("Opening serial interface %s...", self._com_port)
-        try:  # TODO: too wide of an exception handler, make sure to be OS aware too (/dev/tty vs COM4)
-            self._com_obj = serial.Serial(
-                self._com_port, timeout=5, baudrate=28800, rtscts=1, bytesize=8, stopbits=1, parity="N",
-            )
-        except:
-            raise RGAException(
-                "Failed to open serial interface %s. Make sure that the following is true:"
-                "- correct serial interface is specified;"
-                "- correct cable is used;"
-                "- RGA is turned on." % self._com_port
-            )
+        self._cache = {} if cache else None
+        self._metrics = metrics
+        self._capture = capture
+        self._arbiter = _CommandArbiter()
+        self._acquisition_thread = None
+        self._acquisition_error = None
+        self._interrupt = threading.Event()
+        self.acquired = None  # queue of background acquisition results
+        self.dropped = 0  # number of results dropped from the full queue
+        self._scan_buffer = bytearray()  # reused by all scans, grown to the largest scan received so far
+        if isinstance(com_port, str):
+            self._com_port = com_port
+            self._com_obj = self._open_serial(com_port)
+        else:  # already opened pyserial-like object, e.g. serial.serial_for_url() or pyrga.simulator.SimulatedSerial
+            self._com_port = getattr(com_port, "port", None) or repr(com_port)
+            self._com_obj = com_port
         self.logger.debug("Serial interface object is ready: %s", self._com_obj)
 
+        # empties
+        self._amu_min = None
+        self._amu_max = None
+        self._amu_res = None
+
+        settings = {
+            "cedm_voltage_V": cedm_voltage_V,
+            "electron_energy_eV": electron_energy_eV,
+            "ion_energy_eV": ion_energy_eV,
+            "plate_voltage_V": plate_voltage_V,
+            "emission_current_mA": emission_current_mA,
+            "noise_floor": noise_floor,
+            "partial_sens_mA_per_Torr": partial_sens_mA_per_Torr,
+            "total_sens_mA_per_Torr": total_sens_mA_per_Torr,
+        }
+        if fast_connect:
+            self._connect_fast(settings, state)
+        else:
+            self._connect(settings)
+        if calibrate:
+            self.calibrate_all()
+
+    def _connect(self, settings):
         # set model-dependent RGA parameters
         self._set_device_id()
         self.logger.info(
@@ -134,79 +850,418 @@ class RGAClient:
         self._set_filament_status()
 
         # set adjustable RGA parameters
-        self.set_cdem_voltage(cedm_voltage_V)
-        self.set_electron_energy(electron_energy_eV)
-        self.set_ion_energy(ion_energy_eV)
-        self.set_plate_voltage(plate_voltage_V)
-        self.set_emission_current(emission_current_mA)  # this setter does NOT turn on the filament
-        self.set_noise_floor(noise_floor)
-        self.set_partial_sens(partial_sens_mA_per_Torr)
-        self.set_total_sens(total_sens_mA_per_Torr)
-        self.calibrate_all()
+        self.set_cdem_voltage(settings["cedm_voltage_V"])
+        self.set_electron_energy(settings["electron_energy_eV"])
+        self.set_ion_energy(settings["ion_energy_eV"])
+        self.set_plate_voltage(settings["plate_voltage_V"])
+        self.set_emission_current(settings["emission_current_mA"])  # this setter does NOT turn on the filament
+        self.set_noise_floor(settings["noise_floor"])
+        self.set_partial_sens(settings["partial_sens_mA_per_Torr"])
+        self.set_total_sens(settings["total_sens_mA_per_Torr"])
 
-        # empties
+    def _connect_fast(self, settings, state=None):
+        self._set_device_id()
+        self.logger.info(
+            "Connected to RGA model %s on port %s, id %s (fast connect)",
+            self._device_model, self._com_port, self._device_id,
+        )
+        if state is not None and state.get("device_id") == self._device_id:
+            self.logger.info("Resuming from settings snapshot of device %s", self._device_id)
+            current = state
+        else:
+            if state is not None:
+                self.logger.warning("Settings snapshot of device %s ignored", state.get("device_id"))
+            current = self._query_state()
+        self._cdem_present = current["cdem_present"]
+        self._set_filament_status()  # never trusted to a snapshot
+
+        # only send settings that differ from the current ones
+        setters = [
+            ("cedm_voltage_V", self._validate_cdem_voltage, self.set_cdem_voltage),
+            ("electron_energy_eV", self._validate_electron_energy, self.set_electron_energy),
+            ("ion_energy_eV", self._validate_ion_energy, self.set_ion_energy),
+            ("plate_voltage_V", self._validate_plate_voltage, self.set_plate_voltage),
+            ("noise_floor", self._validate_noise_floor, self.set_noise_floor),
+        ]
+        for key, validate, setter in setters:
+            if key == "cedm_voltage_V" and not self._cdem_present:
+                continue
+            validate(settings[key])  # stores the setpoint
+            if getattr(self, "_" + key) == current[key]:
+                self.logger.debug("RGA setting %s is already %s", key, current[key])
+            else:
+                setter(settings[key])
+        self.set_emission_current(settings["emission_current_mA"])  # this setter does NOT turn on the filament
+        for key, validate in [
+            ("partial_sens_mA_per_Torr", self._validate_partial_sens),
+            ("total_sens_mA_per_Torr", self._validate_total_sens),
+        ]:
+            value = current[key] if settings[key] == "default" else validate(settings[key])
+            setattr(self, "_" + key, value)
+
+    def _query_state(self):
+        self.logger.info("Querying RGA settings...")
+        state = {"device_id": self._device_id, "cdem_present": self.get_cdem_presence(refresh=True)}
+        self._cdem_present = state["cdem_present"]
+        queries = [
+            ("electron_energy_eV", "EE", int),
+            ("ion_energy_eV", "IE", self._parse_ion_energy),
+            ("plate_voltage_V", "VF", int),
+            ("noise_floor", "NF", int),
+            ("partial_sens_mA_per_Torr", "SP", float),
+            ("total_sens_mA_per_Torr", "ST", float),
+        ]
+        if self._cdem_present:
+            queries.append(("cedm_voltage_V", "HV", int))
+        batch = self.batch()
+        for _, cmd, parse in queries:
+            batch.query(cmd, parse)
+        for (key, cmd, _), value in zip(queries, batch.execute()):
+            state[key] = self._store_cached(cmd, value)
+        return state
+
+    def get_state(self):
+        """
+        Snapshot of the current settings known to the client (no communication with RGA), which can be passed to a
+        new client with `fast_connect=True` to skip querying them.
+        """
+        state = {
+            "device_id": self._device_id,
+            "cdem_present": self._cdem_present,
+            "electron_energy_eV": self._electron_energy_eV,
+            "ion_energy_eV": self._ion_energy_eV,
+            "plate_voltage_V": self._plate_voltage_V,
+            "noise_floor": self._noise_floor,
+            "emission_current_mA": self._emission_current_mA,
+            "partial_sens_mA_per_Torr": self._partial_sens_mA_per_Torr,
+            "total_sens_mA_per_Torr": self._total_sens_mA_per_Torr,
+        }
+        if self._cdem_present:
+            state["cedm_voltage_V"] = self._cedm_voltage_V
+        return state
+
+    @_serialized(_CONFIG)
+    def reconnect(self, calibrate=False):
+        """
+        Reopen serial port (if the client opened it) and restore current settings in fast-connect mode, e.g. after a
+        serial communication error. Settings of RGA are only changed if they differ from the ones known to the client.
+        """
+        self.logger.info("Reconnecting to RGA on port %s...", self._com_port)
+        self.invalidate_cache()
+        state = self.get_state()
+        settings = {key: value for key, value in state.items() if key not in ("device_id", "cdem_present")}
+        settings.setdefault("cedm_voltage_V", 0)
+        if isinstance(self._com_obj, serial.Serial):
+            try:
+                self._com_obj.close()
+            except Exception:  # pylint: disable=W0703
+                pass
+            self._com_obj = self._open_serial(self._com_port)
+        else:
+            self._drain_buffer()
         self._amu_min = None
         self._amu_max = None
         self._amu_res = None
+        self._connect_fast(settings)
+        if calibrate:
+            self.calibrate_all()
+
+    def close(self):
+        """Stop background acquisition and close the serial port."""
+        self._interrupt_acquisition()
+        self._com_obj.close()
+
+    def _open_serial(self, com_port):
+        self.logger.info("Opening serial interface %s...", com_port)
+        try:  # TODO: too wide of an exception handler, make sure to be OS aware too (/dev/tty vs COM4)
+            return serial.Serial(
+                com_port,
+                timeout=self._READ_TIMEOUT,
+                baudrate=self._BAUDRATE,
+                rtscts=1,
+                bytesize=8,
+                stopbits=1,
+                parity="N",
+            )
+        except:
+            raise RGAException(
+                "Failed to open serial interface %s. Make sure that the following is true:"
+                "- correct serial interface is specified;"
+                "- correct cable is used;"
+                "- RGA is turned on." % com_port
+            )
 
+    @_serialized(_CONFIG)
     def calibrate_all(self):
         self.logger.info("Zeroing ion detector and applying temperature compensation factors...")
         self._send_command("CA")
         self._flush_buffer()
 
-    def read_spectrum(self, amu_min=1, amu_max=100, amu_res=10):
+    @_serialized(_MEASUREMENT)
+    def read_spectrum(self, amu_min=1, amu_max=100, amu_res=10, as_array=False):
         self.logger.info(
             "Reading analog scan from %s amu to %s amu with %s steps/amu", amu_min, amu_max, amu_res,
         )
-        if not self._filament_status:
-            raise RGAException("Filament is off! Turn on filament first!")
-        if self._amu_min != amu_min or self._amu_max != amu_max or self._amu_res != amu_res:
-            self.set_spectrogram_params(amu_min, amu_max, amu_res)
-        spectrum_len = (self._amu_max - self._amu_min) * self._amu_res + 1
-        spectrum_bytes = 4 * (spectrum_len + 1)  # final 4 bytes is total pressure
+        if as_array:
+            self._check_numpy()
+        self._check_filament_on()
+        scan_bytes = self._prepare_spectra(amu_min, amu_max, amu_res)
         self._send_command("SC", "1")
-        buffer_bytes = self._read_buffer_chunked(spectrum_bytes, 1000)
-        return self._decode_spectrum(buffer_bytes)
+        return self._decode_spectrum(self._read_scan(scan_bytes), as_array)
+
+    def iter_spectra(self, amu_min=1, amu_max=100, amu_res=10, count=None, as_array=False):
+        """
+        Return generator of consecutive analog scans, each one yielded as soon as it is received.
+        Scans are triggered in batches of up to 255 with a single SC command, so there is no dead time between scans.
+        Runs indefinitely if `count` is None. Closing the generator early stops the scan in progress. Count and
+        filament status are checked right away, before the generator is started.
+        """
+        self.logger.info(
+            "Streaming %s analog scans from %s amu to %s amu with %s steps/amu",
+            "continuous" if count is None else count, amu_min, amu_max, amu_res,
+        )
+        self._validate_scan_count(count)
+        if as_array:
+            self._check_numpy()
+        self._check_filament_on()
+        prepare = functools.partial(self._prepare_spectra, amu_min, amu_max, amu_res)
+        return self._iter_scans("SC", prepare, self._decode_spectrum, count, as_array)
+
+    def _prepare_spectra(self, amu_min, amu_max, amu_res, noise_floor=None):
+        """Apply settings of analog scans that differ from the current ones, return length of a scan in bytes."""
+        if noise_floor is not None and noise_floor != self._noise_floor:
+            self.set_noise_floor(noise_floor)
+        if self._spectrogram_params_differ(amu_min, amu_max, amu_res):
+            self.set_spectrogram_params(amu_min, amu_max, amu_res)
+        return self._spectrum_bytes()
 
+    def _prepare_histograms(self, amu_min, amu_max, noise_floor=None):
+        """Apply settings of histogram scans that differ from the current ones, return length of a scan in bytes."""
+        if noise_floor is not None and noise_floor != self._noise_floor:
+            self.set_noise_floor(noise_floor)
+        if self._amu_min != amu_min or self._amu_max != amu_max:
+            # steps per amu are not used by histogram scans, keep the current setting if there is one
+            self.set_spectrogram_params(amu_min, amu_max, self._amu_res or self._AMU_RES_MIN)
+        return self._histogram_bytes()
+
+    def _iter_scans(self, cmd, prepare, decode, count, as_array):
+        """
+        Trigger SC or HS scans in batches of up to 255 and yield each one decoded as soon as it is received.
+        `prepare` applies the scan settings and returns the length of a scan in bytes, it runs in the transaction of
+        the scans, so that other threads cannot change the settings in between.
+        """
+        scans_left = count
+        scans_pending = 0
+        with self._transaction(_MEASUREMENT):  # held until the generator is exhausted or closed
+            scan_bytes = prepare()
+            try:
+                while scans_left is None or scans_left > 0:
+                    batch = self._SCAN_COUNT_MAX if scans_left is None else min(scans_left, self._SCAN_COUNT_MAX)
+                    self._send_command(cmd, batch)
+                    scans_pending = batch
+                    while scans_pending:
+                        scan_view = self._read_scan(scan_bytes)
+                        scans_pending -= 1
+                        if scans_left is not None:
+                            scans_left -= 1
+                        scan = decode(scan_view, as_array)
+                        self._arbiter.suspend()  # turning off the filament must not wait for the consumer
+                        try:
+                            yield scan
+                        finally:
+                            interrupted = self._arbiter.resume()
+                            if interrupted:
+                                scans_pending = 0  # aborted by the safety command
+                        if interrupted:
+                            raise _ReadPreempted("Scans aborted by a higher priority command")
+            except _ReadPreempted:
+                scans_pending = 0  # already aborted
+                raise
+            finally:
+                if scans_pending:
+                    self._abort_scan()
+
+    @_serialized(_MEASUREMENT)
+    def read_histogram(self, amu_min=1, amu_max=100, as_array=False):
+        self.logger.info("Reading histogram scan from %s amu to %s amu", amu_min, amu_max)
+        if as_array:
+            self._check_numpy()
+        self._check_filament_on()
+        scan_bytes = self._prepare_histograms(amu_min, amu_max)
+        self._send_command("HS", "1")
+        return self._decode_histogram(self._read_scan(scan_bytes), as_array)
+
+    @_serialized(_MEASUREMENT)
     def read_mass(self, amu):
         self.logger.info("Reading a single scan of amu mass number %s", amu)
-        if not isinstance(amu, int):
-            raise RGAException("AMU mass number must be an integer, specified: %s" % amu)
-        if amu < self._AMU_SCAN_MIN or amu > self._amu_scan_max:
-            raise RGAException(
-                "Specified mass is outside of allowed bounds [%s, %s]" % (self._AMU_SCAN_MIN, self._amu_scan_max)
-            )
-        if not self._filament_status:
-            raise RGAException("Filament is off! Turn on filament first!")
+        self._validate_mass(amu)
+        self._check_filament_on()
         self._send_command("MR", amu)
-        return self._current_to_partial_pressure(self._read_buffer_chunked(4, 10))
+        return self._decode_mass(amu, self._read_buffer_chunked(4, self._measurement_timeout(4)))
+
+    @_serialized(_MEASUREMENT)
+    def read_plan(self, plan, as_array=False):
+        """
+        Run read selected by :func:`~pyrga.planner.plan_scan`, setting its noise floor first if needed.
+        Return :class:`Spectrum` like read_spectrum() and read_histogram(), total is None for single mass reads.
+        """
+        self.logger.info("Running %s read planned to take %.3g s", plan.mode, plan.duration)
+        if plan.noise_floor != self._noise_floor:
+            self.set_noise_floor(plan.noise_floor)
+        if plan.mode == "analog":
+            return self.read_spectrum(plan.amu_min, plan.amu_max, plan.amu_res, as_array)
+        if plan.mode == "histogram":
+            return self.read_histogram(plan.amu_min, plan.amu_max, as_array)
+        if as_array:
+            self._check_numpy()
+        return self._masses_spectrum(plan.masses, [self.read_mass(amu) for amu in plan.masses], as_array)
+
+    def _masses_spectrum(self, masses, pressures, as_array):
+        if as_array:
+            return self._spectrum(np.array(masses, dtype=float), np.array(pressures), None)
+        return self._spectrum(tuple(masses), array.array("d", pressures), None)
+
+    def start_acquisition(self, plan, maxsize=16, block=False, as_array=False):
+        """
+        Run read selected by :func:`~pyrga.planner.plan_scan` continuously on a background thread, which owns the
+        serial port until :meth:`stop_acquisition` is called. Analog and histogram scans are triggered in batches, so
+        RGA is kept busy regardless of the consumers of the results.
+        Results are put into the :attr:`acquired` queue of up to `maxsize` items as :class:`Spectrum` objects, which
+        carry the time each of them was received. When the queue is full, the oldest result is dropped (and counted in
+        :attr:`dropped`), or acquisition waits for free space if `block` is True. Settings of the plan are applied by
+        the acquisition thread, returns once they are in place.
+        """
+        if self.is_acquiring():
+            raise RGAException("Acquisition is already running")
+        if as_array:
+            self._check_numpy()
+        self._check_filament_on()
+        ready = threading.Event()  # set by the acquisition thread once the settings of the plan are in place
+        if plan.mode == "analog":
+            prepare = self._signal_ready(
+                ready, self._prepare_spectra, plan.amu_min, plan.amu_max, plan.amu_res, plan.noise_floor
+            )
+            scans = self._iter_scans("SC", prepare, self._decode_spectrum, None, as_array)
+        elif plan.mode == "histogram":
+            prepare = self._signal_ready(ready, self._prepare_histograms, plan.amu_min, plan.amu_max, plan.noise_floor)
+            scans = self._iter_scans("HS", prepare, self._decode_histogram, None, as_array)
+        else:
+            prepare = self._signal_ready(ready, self._prepare_masses, plan.noise_floor)
+            scans = self._iter_masses(plan.masses, prepare, as_array)
+        self.logger.info("Starting background acquisition of %s reads...", plan.mode)
+        self.acquired = queue.Queue(maxsize)
+        self.dropped = 0
+        self._acquisition_error = None
+        self._interrupt.clear()
+        self._acquisition_thread = threading.Thread(
+            target=self._run_acquisition, args=(scans, block, ready), name="pyrga-acquisition", daemon=True
+        )
+        self._acquisition_thread.start()
+        ready.wait()
+        if self._acquisition_error is not None:  # settings of the plan failed
+            self.stop_acquisition()
 
-    def get_device_id(self):
+    def stop_acquisition(self):
+        """Stop background acquisition, raise the error that ended it early if there was one."""
+        self._interrupt_acquisition()
+        error, self._acquisition_error = self._acquisition_error, None
+        if error is not None:
+            raise error
+
+    def is_acquiring(self):
+        return self._acquisition_thread is not None and self._acquisition_thread.is_alive()
+
+    def _interrupt_acquisition(self):
+        if self._acquisition_thread is None:
+            return
+        self.logger.info("Stopping background acquisition...")
+        self._interrupt.set()
+        self._acquisition_thread.join()
+        self._acquisition_thread = None
+        self._interrupt.clear()
+
+    @staticmethod
+    def _signal_ready(ready, setup, *args):
+        def prepare():
+            result = setup(*args)
+            ready.set()
+            return result
+
+        return prepare
+
+    def _prepare_masses(self, noise_floor):
+        if noise_floor != self._noise_floor:
+            self.set_noise_floor(noise_floor)
+
+    def _iter_masses(self, masses, prepare, as_array):
+        while True:
+            with self._transaction(_MEASUREMENT):
+                if prepare is not None:
+                    prepare()
+                    prepare = None  # settings are kept, the port is owned by the acquisition thread
+                try:
+                    pressures = [self.read_mass(amu) for amu in masses]
+                except Exception:
+                    self._drain_buffer()  # discard a reading interrupted in progress, before others use the port
+                    raise
+            yield self._masses_spectrum(masses, pressures, as_array)
+
+    def _run_acquisition(self, scans, block, ready):
+        try:
+            for scan in scans:
+                self._publish(scan, block)
+                if self._interrupt.is_set():
+                    break
+        except Exception as exc:  # pylint: disable=W0703
+            if not self._interrupt.is_set():
+                self.logger.error("Background acquisition failed: %s", exc)
+                self._acquisition_error = exc
+        finally:
+            scans.close()  # stops the scan in progress
+            ready.set()  # ended before its settings were in place
+
+    def _publish(self, item, block):
+        while not self._interrupt.is_set():
+            try:
+                if block:
+                    self.acquired.put(item, timeout=self._INTERRUPT_POLL_TIME)
+                else:
+                    self.acquired.put_nowait(item)
+                return
+            except queue.Full:
+                if not block:
+                    self._drop_oldest()
+
+    def _drop_oldest(self):
+        try:
+            self.acquired.get_nowait()
+            self.dropped += 1
+        except queue.Empty:  # consumed in the meantime
+            pass
+
+    @_serialized(_CONFIG)
+    def get_device_id(self, refresh=False):
+        if self._is_cached("ID", refresh):
+            return self._cache["ID"]
         self.logger.info("Querying device ID...")
         self._send_command("ID", "?")
-        return self._read_buffer_line_ascii()
+        return self._store_cached("ID", self._read_buffer_line_ascii())
 
     def _set_device_id(self):
-        self._device_id = self.get_device_id()
-        for model in self._SRS_RGA_MODELS:
-            if model in self._device_id:
-                self._device_model = model
-                self._amu_scan_max = int(model.replace("SRSRGA", ""))
-                return
-        raise RGAException("Cannot query device model")
+        self._set_device_model(self.get_device_id(refresh=True))
 
     def _set_cdem_presence(self):
-        self._cdem_present = self.get_cdem_presence()
+        self._cdem_present = self.get_cdem_presence(refresh=True)
 
-    def get_cdem_presence(self):
+    @_serialized(_CONFIG)
+    def get_cdem_presence(self, refresh=False):
+        if self._is_cached("EM", refresh):
+            return self._cache["EM"]
         self.logger.info("Querying CDEM presence...")
         self._send_command("EM", "?")
-        status_byte = self._read_buffer_chunked(3, 10)[0]  # last two bytes are \n\r
-        bin_str = "{:08b}".format(status_byte)
-        if bin_str[7] == "1":
-            return False
-        return True
+        return self._store_cached("EM", self._parse_cdem_presence(self._read_buffer_chunked(3)))
 
+    @_serialized(_CONFIG)
     def set_partial_sens(self, partial_sens_mA_per_Torr):
         self.logger.info(
             "Setting partial pressure sensitivity factor to %s...", partial_sens_mA_per_Torr,
@@ -215,203 +1270,110 @@ class RGAClient:
             self.logger.debug("Default pressure sensitivity factor specified, querying value stored in RGA...")
             self._partial_sens_mA_per_Torr = self.get_partial_sens()
         else:
-            if not isinstance(partial_sens_mA_per_Torr, (float, int)):
-                raise RGAException(
-                    "Partial pressure sensitivity must be an int or float, specified: %s" % partial_sens_mA_per_Torr
-                )
-            if partial_sens_mA_per_Torr < self._PARTIAL_SENS_MIN or partial_sens_mA_per_Torr > self._PARTIAL_SENS_MAX:
-                raise RGAException(
-                    "Partial pressure sensitivity setting is ouside of allowed bounds [%s, %s]" %
-                    (self._PARTIAL_SENS_MIN, self._PARTIAL_SENS_MAX)
-                )
-            self._partial_sens_mA_per_Torr = partial_sens_mA_per_Torr
+            self._partial_sens_mA_per_Torr = self._validate_partial_sens(partial_sens_mA_per_Torr)
 
-    def get_partial_sens(self):
+    @_serialized(_CONFIG)
+    def get_partial_sens(self, refresh=False):
+        if self._is_cached("SP", refresh):
+            return self._cache["SP"]
         self.logger.info("Querying partial pressure sensitivity factor stored in RGA...")
         self._send_command("SP", "?")
-        return float(self._read_buffer_line_ascii())
+        return self._store_cached("SP", float(self._read_buffer_line_ascii()))
 
+    @_serialized(_CONFIG)
     def set_total_sens(self, total_sens_mA_per_Torr):
         self.logger.info("Setting total pressure sensitivity factor to %s...", total_sens_mA_per_Torr)
         if total_sens_mA_per_Torr == "default":
             self.logger.debug("Default pressure sensitivity factor specified, querying value stored in RGA...")
             self._total_sens_mA_per_Torr = self.get_total_sens()
         else:
-            if not isinstance(total_sens_mA_per_Torr, (float, int)):
-                raise RGAException(
-                    "Total pressure sensitivity must be an integer or float, specified: %s" % total_sens_mA_per_Torr
-                )
-            if total_sens_mA_per_Torr < self._TOTAL_SENS_MIN or total_sens_mA_per_Torr > self._TOTAL_SENS_MAX:
-                raise RGAException(
-                    "Total pressure sensitivity setting is ouside of allowed bounds [%s, %s]" %
-                    (self._TOTAL_SENS_MIN, self._TOTAL_SENS_MAX)
-                )
-            self._total_sens_mA_per_Torr = total_sens_mA_per_Torr
+            self._total_sens_mA_per_Torr = self._validate_total_sens(total_sens_mA_per_Torr)
 
-    def get_total_sens(self):
+    @_serialized(_CONFIG)
+    def get_total_sens(self, refresh=False):
+        if self._is_cached("ST", refresh):
+            return self._cache["ST"]
         self.logger.info("Querying total pressure sensitivity factor stored in RGA...")
         self._send_command("ST", "?")
-        return float(self._read_buffer_line_ascii())
+        return self._store_cached("ST", float(self._read_buffer_line_ascii()))
 
+    @_serialized(_CONFIG)
     def set_electron_energy(self, electron_energy_eV):
         self.logger.info("Setting electron energy to %s...", electron_energy_eV)
-        if electron_energy_eV == "default":
-            self._electron_energy_eV = self._ELECTRON_ENERGY_DEFAULT
-            self.logger.debug("Default electron energy specified, setting value: %s eV...", self._electron_energy_eV)
-            self._send_command("EE", "*")
-        else:
-            if not isinstance(electron_energy_eV, int):
-                raise RGAException("Electron energy must be an integer, specified: %s" % electron_energy_eV)
-            if electron_energy_eV < self._ELECTRON_ENERGY_MIN or electron_energy_eV > self._ELECTRON_ENERGY_MAX:
-                raise RGAException(
-                    "Electron energy setting is ouside of allowed bounds [%s, %s]" %
-                    (self._ELECTRON_ENERGY_MIN, self._ELECTRON_ENERGY_MAX)
-                )
-            self._electron_energy_eV = electron_energy_eV
-            self._send_command("EE", self._electron_energy_eV)
+        readback = self._set_with_readback("EE", self._validate_electron_energy(electron_energy_eV))
         self.logger.debug("Verifying set parameter...")
-        electron_energy_eV_readback = self.get_electron_energy()
-        if electron_energy_eV_readback != self._electron_energy_eV:
-            raise RGAException(
-                "Electron energy setting readback (%s eV) differs from setpoint (%s eV)" %
-                (electron_energy_eV_readback, self._electron_energy_eV)
-            )
+        self._check_readback("Electron energy", readback, self._electron_energy_eV, " eV")
 
-    def get_electron_energy(self):
+    @_serialized(_CONFIG)
+    def get_electron_energy(self, refresh=False):
+        if self._is_cached("EE", refresh):
+            return self._cache["EE"]
         self.logger.info("Querying electron energy...")
         self._send_command("EE", "?")
-        return int(self._read_buffer_line_ascii())
+        return self._store_cached("EE", int(self._read_buffer_line_ascii()))
 
+    @_serialized(_CONFIG)
     def set_ion_energy(self, ion_energy_eV):
         self.logger.info("Setting ion energy to %s...", ion_energy_eV)
-        if ion_energy_eV == "default":
-            self._ion_energy_eV = self._ION_ENERGY_DEFAULT
-            self.logger.debug(
-                "Default ion energy specified, setting value: %s eV...", self._ion_energy_eV,
-            )
-            self._send_command("IE", "*")
-        else:
-            if ion_energy_eV not in self._ION_ENERGIES_ALLOWED:
-                raise RGAException(
-                    "Ion energy must be equal to one of allowed values: %s, specified: %s" %
-                    (self._ION_ENERGIES_ALLOWED, ion_energy_eV)
-                )
-            self._ion_energy_eV = ion_energy_eV
-            self._send_command("IE", self._ION_ENERGIES_ALLOWED[self._ion_energy_eV])
+        readback = self._set_with_readback("IE", self._validate_ion_energy(ion_energy_eV), self._parse_ion_energy)
         self.logger.debug("Verifying set parameter...")
-        ion_energy_eV_readback = self.get_ion_energy()
-        if ion_energy_eV_readback != self._ion_energy_eV:
-            raise RGAException(
-                "Ion energy setting readback (%s eV) differs from setpoint (%s eV)" %
-                (ion_energy_eV_readback, self._ion_energy_eV)
-            )
+        self._check_readback("Ion energy", readback, self._ion_energy_eV, " eV")
 
-    def get_ion_energy(self):
+    @_serialized(_CONFIG)
+    def get_ion_energy(self, refresh=False):
+        if self._is_cached("IE", refresh):
+            return self._cache["IE"]
         self.logger.debug("Querying ion energy...")
         self._send_command("IE", "?")
-        ie = int(self._read_buffer_line_ascii())
-        return next(key for key, value in self._ION_ENERGIES_ALLOWED.items() if value == ie)
+        return self._store_cached("IE", self._parse_ion_energy(self._read_buffer_line_ascii()))
 
+    @_serialized(_CONFIG)
     def set_plate_voltage(self, plate_voltage_V):
         self.logger.info("Setting focus plate voltage to %s...", plate_voltage_V)
-        if plate_voltage_V == "default":
-            self._plate_voltage_V = self._PLATE_VOLTAGE_DEFAULT
-            self.logger.debug(
-                "Default focus plate voltage specified, setting value: %s V...", self._plate_voltage_V,
-            )
-            self._send_command("VF", "*")
-        else:
-            if not isinstance(plate_voltage_V, int):
-                raise RGAException("Focus plate voltage must be an integer, specified: %s" % plate_voltage_V)
-            if plate_voltage_V < self._PLATE_VOLTAGE_MIN or plate_voltage_V > self._PLATE_VOLTAGE_MAX:
-                raise RGAException(
-                    "Focus plate voltage setting is outside of allowed bounds [%s, %s]" %
-                    (self._PLATE_VOLTAGE_MIN, self._PLATE_VOLTAGE_MAX)
-                )
-            self._plate_voltage_V = plate_voltage_V
-            self._send_command("VF", -self._plate_voltage_V)
+        readback = self._set_with_readback("VF", self._validate_plate_voltage(plate_voltage_V))
         self.logger.debug("Verifying set parameter...")
-        plate_voltage_V_readback = self.get_plate_voltage()
-        if plate_voltage_V_readback != self._plate_voltage_V:
-            raise RGAException(
-                "Focus plate voltage setting readback (%s V) differs from setpoint (%s V)" %
-                (plate_voltage_V_readback, self._plate_voltage_V)
-            )
+        self._check_readback("Focus plate voltage", readback, self._plate_voltage_V, " V")
 
-    def get_plate_voltage(self):
+    @_serialized(_CONFIG)
+    def get_plate_voltage(self, refresh=False):
+        if self._is_cached("VF", refresh):
+            return self._cache["VF"]
         self.logger.info("Querying focus plate voltage...")
         self._send_command("VF", "?")
-        return int(self._read_buffer_line_ascii())
+        return self._store_cached("VF", int(self._read_buffer_line_ascii()))
 
+    @_serialized(_CONFIG)
     def set_spectrogram_params(self, amu_min, amu_max, amu_res):
         self.logger.debug(
             "Setting spectrogram parameters: min=%s, max=%s, steps=%s", amu_min, amu_max, amu_res,
         )
-        for amu in [amu_min, amu_max, amu_res]:
-            if not isinstance(amu, int):
-                raise RGAException("AMU values and resolution must be an integer, specified: %s" % amu)
-        if amu_min < self._AMU_SCAN_MIN or amu_max > self._amu_scan_max:
-            raise RGAException(
-                "AMU values are outside of allowed bounds [%s, %s], specified: min %s, max %s" %
-                (self._AMU_SCAN_MIN, self._amu_scan_max, amu_min, amu_max)
-            )
-        if amu_min >= amu_max:
-            raise RGAException(
-                "AMU min value must be lower than AMU max value, specified: min %s, max %s" %
-                (amu_min, amu_max)
-            )
-        if amu_res < self._AMU_RES_MIN or amu_res > self._AMU_RES_MAX:
-            raise RGAException(
-                "AMU resolution is outside of allowed bounds [%s, %s], specified: %s" %
-                (self._AMU_RES_MIN, self._AMU_RES_MAX, amu_res)
-            )
-        self._amu_min = amu_min
-        self._amu_max = amu_max
-        self._amu_res = amu_res
-        self._send_command("MI", self._amu_min)
-        self._send_command("MF", self._amu_max)
-        self._send_command("SA", self._amu_res)
+        self._validate_spectrogram_params(amu_min, amu_max, amu_res)
+        self._invalidate_cache("MI,MF,SA")
+        batch = self.batch()
+        batch.command("MI", self._amu_min)
+        batch.command("MF", self._amu_max)
+        batch.command("SA", self._amu_res)
+        readback = [batch.query(cmd, int) for cmd in ["MI", "MF", "SA"]]
+        results = batch.execute()
         self.logger.debug("Verifying set parameters...")
-        (amu_min_readback, amu_max_readback, amu_res_readback,) = self.get_spectrogram_params()
-        if amu_min_readback != self._amu_min or amu_max_readback != self._amu_max or amu_res_readback != self._amu_res:
-            raise RGAException(
-                "Spectrogram parameters readback (%s, %s, %s) differ from setpoints (%s, %s, %s)" %
-                (amu_min_readback, amu_max_readback, amu_res_readback, self._amu_min, self._amu_max, self._amu_res)
-            )
+        readback = self._store_cached("MI,MF,SA", tuple(results[i] for i in readback))
+        self._check_spectrogram_params_readback(readback)
 
-    def get_spectrogram_params(self):
+    @_serialized(_CONFIG)
+    def get_spectrogram_params(self, refresh=False):
+        if self._is_cached("MI,MF,SA", refresh):
+            return self._cache["MI,MF,SA"]
         self.logger.info("Querying spectrogram parameters...")
-        self._send_command("MI", "?")
-        mi = int(self._read_buffer_line_ascii())
-        self._send_command("MF", "?")
-        mf = int(self._read_buffer_line_ascii())
-        self._send_command("SA", "?")
-        sa = int(self._read_buffer_line_ascii())
-        return (mi, mf, sa)
+        batch = self.batch()
+        for cmd in ["MI", "MF", "SA"]:
+            batch.query(cmd, int)
+        return self._store_cached("MI,MF,SA", tuple(batch.execute()))
 
     def set_emission_current(self, emission_current_mA):
         self.logger.info("Setting emission current to %s...", emission_current_mA)
-        if emission_current_mA == "default":
-            self._emission_current_mA = self._EMISSION_CURRENT_DEFAULT
-            self.logger.debug(
-                "Default emission current specified, setting value: %s V...", self._emission_current_mA,
-            )
-        else:
-            if not isinstance(emission_current_mA, (float, int)):
-                raise RGAException(
-                    "Emission current setting must be an integer or float, specified: %s" % emission_current_mA
-                )
-            if (
-                float(emission_current_mA) < self._EMISSION_CURRENT_MIN
-                or float(emission_current_mA) > self._EMISSION_CURRENT_MAX
-            ):
-                raise RGAException(
-                    "Emission current setting is ouside of allowed bounds [%s, %s]" %
-                    (self._EMISSION_CURRENT_MIN, self._EMISSION_CURRENT_MAX)
-                )
-            if emission_current_mA not in self._EMISSION_CURRENTS_ALLOWED:
-                raise RGAException("Emission current setting must be specified with increment of 0.02 mA")
+        self._validate_emission_current(emission_current_mA)
 
+    @_serialized(_CONFIG)
     def get_emission_current(self):
         self.logger.info("Querying filament current...")
         self._send_command("FL", "?")
@@ -422,10 +1384,9 @@ class RGAClient:
 
     def get_filament_status(self):
         self.logger.info("Querying filament status...")
-        if self.get_emission_current() < 0.0 + self._EMISSION_CURRENT_INC:
-            return False
-        return True
+        return self._is_filament_current_on(self.get_emission_current())
 
+    @_serialized(_CONFIG)
     def turn_on_filament(self):
         self.logger.info(
             "Turning on filament with electron emission current %s mA...", self._emission_current_mA,
@@ -433,123 +1394,184 @@ class RGAClient:
         self._filament_status = True  # pylint: disable=W0201
         self._send_command("FL", self._emission_current_mA)
         self.logger.debug("Verifying set parameter...")
-        emission_current_mA_readback = self.get_emission_current()
-        if (
-            emission_current_mA_readback < self._emission_current_mA - self._EMISSION_CURRENT_INC
-            or emission_current_mA_readback > self._emission_current_mA + self._EMISSION_CURRENT_INC
-        ):
-            raise RGAException(
-                "Emission current setting readback (%s mA) differs from setpoint (%s mA)"
-                % emission_current_mA_readback,
-                self._emission_current_mA,
-            )
+        self._check_emission_current_readback(self.get_emission_current())
 
     def turn_off_filament(self):
         self.logger.info("Turning off the filament: setting electron emission to 0...")
-        self._filament_status = False  # pylint: disable=W0201
-        self._send_command("FL", 0.0)
-        self.logger.debug("Verifying set parameter...")
-        try:
-            filament_current_mA = self.get_emission_current()
-            if filament_current_mA < 0.0 + self._EMISSION_CURRENT_INC:
-                self.logger.info("Filament is confirmed to be off: %s mA", filament_current_mA)
-                return True
-        except:  # catching all to guarantee delivery of the error message - pylint: disable=W0702
-            pass
+        self._interrupt_acquisition()
+        with self._transaction(_SAFETY):  # aborts a measurement of another thread in progress
+            if self._arbiter.interrupted:
+                self._abort_scan()  # scans streamed to a consumer busy in another thread
+            self._filament_status = False  # pylint: disable=W0201
+            self._send_command("FL", 0.0)
+            self.logger.debug("Verifying set parameter...")
+            try:
+                filament_current_mA = self.get_emission_current()
+                if not self._is_filament_current_on(filament_current_mA):
+                    self.logger.info("Filament is confirmed to be off: %s mA", filament_current_mA)
+                    return True
+            except:  # catching all to guarantee delivery of the error message - pylint: disable=W0702
+                pass
         error_msg = "Cannot confirm that the filament is off! Turn off RGA before venting the system!"
         self.logger.error(error_msg)
         raise RGAException(error_msg)
 
+    @_serialized(_CONFIG)
     def set_cdem_voltage(self, cedm_voltage_V):
         if not self._cdem_present:
             self.logger.info("No CDEM installed, not setting CDEM voltage")
             return
         self.logger.info("Setting CEDM voltage to %s...", cedm_voltage_V)
-        if cedm_voltage_V == "default":
-            self._cedm_voltage_V = self._CEDM_VOLTAGE_DEFAULT
-            self.logger.debug(
-                "Default CDEM voltage specified, setting value: %s V...", self._cedm_voltage_V,
-            )
-            self._send_command("HV", "*")
-        else:
-            if cedm_voltage_V == 0:  # Faraday cup detection
-                self.logger.debug("Turning off electron multiplier (Faraday cup detection)")
-            else:
-                if not isinstance(cedm_voltage_V, int):
-                    raise RGAException("CDEM voltage must be an integer, specified: %s" % cedm_voltage_V)
-                if cedm_voltage_V < self._CEDM_VOLTAGE_MIN or cedm_voltage_V > self._CEDM_VOLTAGE_MAX:
-                    raise RGAException(
-                        "CDEM voltage setting is outside of allowed bounds [%s, %s]" %
-                        (self._CEDM_VOLTAGE_MIN, self._CEDM_VOLTAGE_MAX)
-                    )
-            self._cedm_voltage_V = cedm_voltage_V
-            self._send_command("HV", self._cedm_voltage_V)
+        readback = self._set_with_readback("HV", self._validate_cdem_voltage(cedm_voltage_V))
         self.logger.debug("Verifying set parameter...")
-        cedm_voltage_V_readback = self.get_cdem_voltage()
-        if not self._cedm_voltage_V * 0.9 <= cedm_voltage_V_readback <= self._cedm_voltage_V * 1.1:
-            raise RGAException(
-                "CDEM voltage setting readback (%s V) differs from setpoint (%s V)" %
-                (cedm_voltage_V_readback, self._cedm_voltage_V)
-            )
+        self._check_cdem_voltage_readback(readback)
 
-    def get_cdem_voltage(self):
+    @_serialized(_CONFIG)
+    def get_cdem_voltage(self, refresh=False):
         if not self._cdem_present:
             self.logger.info("No CDEM installed, not querying CDEM voltage")
             return False
+        if self._is_cached("HV", refresh):
+            return self._cache["HV"]
         self.logger.info("Querying CDEM voltage...")
         self._send_command("HV", "?")
-        return int(self._read_buffer_line_ascii())
+        return self._store_cached("HV", int(self._read_buffer_line_ascii()))
 
+    @_serialized(_CONFIG)
     def set_noise_floor(self, noise_floor):
         self.logger.info(
             "Setting noise floor to %s... (0 - max averaging, 7 - min averaging)", noise_floor,
         )
-        if noise_floor == "default":
-            self._noise_floor = self._NOISE_FLOOR_DEFAULT
-            self.logger.debug(
-                "Default noise floor specified, setting value: %s V...", self._noise_floor,
-            )
-            self._send_command("NF", "*")
-        else:
-            if noise_floor not in self._NOISE_FLOORS_ALLOWED:
-                raise RGAException(
-                    "Noise floor must be equal to one of allowed values: %s, specified: %s"
-                    % self._NOISE_FLOORS_ALLOWED,
-                    noise_floor,
-                )
-            self._noise_floor = noise_floor
-            self._send_command("NF", self._noise_floor)
+        readback = self._set_with_readback("NF", self._validate_noise_floor(noise_floor))
         self.logger.debug("Verifying set parameter...")
-        noise_floor_readback = self.get_noise_floor()
-        if noise_floor_readback != self._noise_floor:
-            raise RGAException(
-                "Noise floor setting readback (%s) differs from setpoint (%s)" %
-                (noise_floor_readback, self._noise_floor)
-            )
+        self._check_readback("Noise floor", readback, self._noise_floor)
 
-    def get_noise_floor(self):
+    @_serialized(_CONFIG)
+    def get_noise_floor(self, refresh=False):
+        if self._is_cached("NF", refresh):
+            return self._cache["NF"]
         self.logger.info("Querying noise floor setting...")
         self._send_command("NF", "?")
-        return int(self._read_buffer_line_ascii())
+        return self._store_cached("NF", int(self._read_buffer_line_ascii()))
+
+    def batch(self):
+        """
+        Create a :class:`~.RGABatch` of commands and queries to be sent to RGA in a single write, with responses
+        parsed in order. Can be used as a context manager executing the batch on exit.
+        """
+        return RGABatch(self)
+
+    def _set_with_readback(self, cmd, value, parse=int):
+        """Send a setting followed by its query in a single write, return the parsed (and cached) readback value."""
+        self._invalidate_cache(cmd)
+        batch = self.batch()
+        batch.command(cmd, value)
+        readback = batch.query(cmd, parse)
+        return self._store_cached(cmd, batch.execute()[readback])
+
+    @_serialized(_CONFIG)
+    def _execute_batch(self, entries):
+        full_cmds = "".join(self._format_command(cmd, value) for cmd, value, _ in entries)
+        self.logger.debug("Sending batch of %s commands '%s'...", len(entries), full_cmds)
+        self._last_command = "batch"
+        self._write(full_cmds)
+        results = []
+        try:
+            for cmd, value, parse in entries:
+                self._last_command = cmd
+                if parse is not None:
+                    response = self._read_buffer_line_ascii()
+                    try:
+                        results.append(parse(response))
+                    except (ValueError, StopIteration):
+                        raise RGAException("Cannot parse response '%s' to command %s%s" % (response, cmd, value))
+                elif self._reports_status(cmd, value):
+                    self._check_status_byte()
+                    results.append(None)
+                else:
+                    results.append(None)
+                if parse is None:
+                    self._track_setting(cmd, value)
+        except RGAException:
+            # responses to the rest of the batch are discarded
+            self.invalidate_cache()
+            self._drain_buffer()
+            raise
+        return results
+
+    def _track_setting(self, cmd, value):
+        """Update cache and setpoints after a setting sent in a batch, so that e.g. timeouts follow the noise floor."""
+        self._invalidate_cache("MI,MF,SA" if cmd in ("MI", "MF", "SA") else cmd)
+        value = str(value).strip()
+        if cmd not in self._TRACKED_SETTINGS or not value:
+            return
+        attribute, default = self._TRACKED_SETTINGS[cmd]
+        if value == "*":
+            setpoint = None if default is None else getattr(self, default)
+        elif cmd == "IE":
+            setpoint = self._parse_ion_energy(value)
+        elif cmd == "VF":
+            setpoint = -int(value)  # sent as a negative voltage
+        elif cmd == "FL":
+            setpoint = float(value)
+        else:
+            setpoint = int(value)
+        if cmd == "FL":  # emission current setpoint is kept while the filament is off
+            self._filament_status = self._is_filament_current_on(setpoint)  # pylint: disable=W0201
+            if not self._filament_status:
+                return
+        setattr(self, attribute, setpoint)
+
+    def invalidate_cache(self):
+        """Clear cached values of all settings, so that the next getter calls query RGA."""
+        if self._cache:
+            self.logger.debug("Invalidating settings cache")
+            self._cache.clear()
+
+    def _invalidate_cache(self, key):
+        if self._cache is not None:
+            self._cache.pop(key, None)
+
+    def _is_cached(self, key, refresh):
+        return self._cache is not None and not refresh and key in self._cache
+
+    def _store_cached(self, key, value):
+        if self._cache is not None:
+            self._cache[key] = value
+        return value
+
+    def _transaction(self, priority):
+        """Context of a transaction on the serial link, waiting for transactions of other threads to complete."""
+        if priority != _SAFETY and self.is_acquiring() and threading.current_thread() is not self._acquisition_thread:
+            raise RGAException("Serial port is in use by background acquisition, stop it first")
+        return self._arbiter.transaction(priority)
 
     def _send_command(self, cmd, value=""):
-        full_cmd = "{}{}\r".format(cmd, value)
+        full_cmd = self._format_command(cmd, value)
         self.logger.debug("Sending command '%s'...", full_cmd)
-        ret = self._com_obj.write(full_cmd.encode())
-        if ret != len(full_cmd):
+        self._last_command = cmd
+        self._write(full_cmd)
+        if self._reports_status(cmd, value):
+            try:
+                self._check_status_byte()
+            except RGAException:
+                self.invalidate_cache()
+                raise
+
+    def _write(self, full_cmds):
+        if self.is_acquiring() and threading.current_thread() is not self._acquisition_thread:
+            raise RGAException("Serial port is in use by background acquisition, stop it first")
+        start = time.monotonic()
+        ret = self._com_obj.write(full_cmds.encode())
+        if self._metrics is not None:
+            self._record_metrics("send", start, start, bytes_sent=len(full_cmds), error=ret != len(full_cmds))
+        if ret != len(full_cmds):
+            self.invalidate_cache()
             raise RGAException("Wrong response from serial interface object")
-        if "?" not in full_cmd and cmd in self._STATUS_REPORTING_COMMANDS:
-            self._check_status_byte()
 
     def _check_status_byte(self):
         self.logger.debug("Checking status byte...")
-        status_byte = self._read_buffer_chunked(3, 10)[0]  # last two bytes are \n\r
-        bin_str = list(map(int, "{:08b}".format(status_byte)))
-        if not self._cdem_present:
-            bin_str[3] = 0
-        for s, e in zip(bin_str, self._STATUS_ERROR_BITS):
-            if s == "1" and e:
-                raise RGAException("Error %s reported in status echo!" % e)
+        self._parse_status_byte(self._read_buffer_chunked(3))
 
     def _flush_buffer(self):
         # flush() might not work with USB serial adapters
@@ -557,72 +1579,114 @@ class RGAClient:
             "Flushing buffer, %s bytes read", self._com_obj.read(self._com_obj.in_waiting),
         )
 
+    def _abort_scan(self):
+        self.logger.info("Stopping scan in progress...")
+        self._send_command("ID", "?")  # any command received by RGA stops the scan in progress
+        self._drain_buffer()
+
+    def _drain_buffer(self):
+        """Discard incoming data until serial port stays silent for _DRAIN_QUIET_TIME."""
+        drained = 0
+        self._set_read_timeout(self._DRAIN_QUIET_TIME)
+        while True:
+            data = self._com_obj.read(max(self._com_obj.in_waiting, 1))
+            if not data:
+                break
+            drained += len(data)
+        self.logger.debug("Drained %s bytes from serial port", drained)
+
+    def _set_read_timeout(self, timeout):
+        # pyserial reconfigures the port on every assignment, even of an unchanged value
+        if self._com_obj.timeout != timeout:
+            self._com_obj.timeout = timeout
+
     def _read_buffer_line_ascii(self):
         self.logger.debug("Reading a line from serial port...")
+        start = time.monotonic()
+        buffer_bytes = b""
         try:
+            self._set_read_timeout(self._READ_TIMEOUT)
             buffer_bytes = self._com_obj.readline()  # rely on pyserial timeout
+            if self._metrics is not None:
+                self._record_metrics("read_line", start, bytes_received=len(buffer_bytes))
             _ = self._read_buffer_chunked(1)  # reading extra byte required due to \n\r line termination
             buffer_ascii = buffer_bytes.decode("ascii").strip()
         except:
+            if self._metrics is not None and not buffer_bytes:
+                self._record_metrics("read_line", start, error=True)
+            self.invalidate_cache()
             raise RGAException("Failed to receive buffer line")
         self.logger.debug("Received line from serial port: '%s'", buffer_ascii)
         return buffer_ascii
 
-    def _read_buffer_chunked(self, length_bytes, attempts=10, chunk=64):
-        attempt_sleep = 0.5
-        recv = 0
-        recv_total = 0
-        attempt = 0
-        self.logger.debug("Waiting for serial buffer to fill up...")
-        data_recv = []
-        if length_bytes < chunk:
-            chunk = length_bytes
-        while recv_total < length_bytes:
-            while (recv < chunk) and (recv + recv_total != length_bytes):
-                attempt += 1
-                recv = self._com_obj.in_waiting
-                time.sleep(attempt_sleep)
-                if attempt > attempts:
-                    raise RGAException("Failed to receive buffer")
-                self.logger.debug(
-                    "%s bytes buffered, %s bytes received, out of %s", recv, recv_total, length_bytes,
-                )
-            try:
-                data_recv.append(self._com_obj.read(recv))
-                recv_total += recv
-                time.sleep(attempt_sleep)
-                recv = self._com_obj.in_waiting
-            except:
-                raise RGAException("Failed to receive buffer")
-        buffer_bytes = b"".join(data_recv)[:length_bytes]
-        self.logger.debug("Serial buffer is received: %s", buffer_bytes)
-        return buffer_bytes
-
-    def _decode_spectrum(self, spectrum_bytes):
-        spectrum_sliced = [spectrum_bytes[i : i + 4] for i in range(0, len(spectrum_bytes), 4)]
-        spec_amu = seq(self._amu_min, self._amu_max, 1.0 / self._amu_res)
-        spec_amu = list(map(lambda x: round(x, 2), spec_amu))
-        spec_pres = list(map(self._current_to_partial_pressure, spectrum_sliced[:-1]))
-        if len(spec_amu) != len(spec_pres):
-            raise RGAException(
-                "Cannot parse spectrum:\n    amu array: %s\n    pressures array: %s" %
-                (spec_amu, spec_pres)
-            )
-        spec_pres_sum = self._current_to_total_pressure(spectrum_sliced[-1])
-        return (spec_amu, spec_pres, spec_pres_sum)
-
-    def _decode_bin_current(self, current_bytes):
+    def _read_scan(self, length_bytes):
         """
-        Decode binary encoded ion current data from RGA to floating point format in units of A.
-        Binary encoding: little-endian integer representing a mantissa with an exponent of 1e-16 units of A.
+        Receive a scan of `length_bytes` into the reusable scan buffer, return a memoryview of it.
+        The view is only valid until the next scan is received, so it must be decoded right away.
         """
-        try:  # TODO: too wide of an exception handler
-            return struct.unpack("<i", current_bytes)[0] * self._CURRENT_MULTIPLIER
-        except:
-            raise RGAException("Cannot decode binary current value %s" % current_bytes)
+        if len(self._scan_buffer) < length_bytes:
+            self._scan_buffer = bytearray(length_bytes)
+        scan_view = memoryview(self._scan_buffer)[:length_bytes]
+        self._read_buffer_into(scan_view, self._measurement_timeout(length_bytes))
+        return scan_view
 
-    def _current_to_partial_pressure(self, current_bytes):
-        return self._decode_bin_current(current_bytes) / self._partial_sens_mA_per_Torr * 1000.0
+    def _read_buffer_chunked(self, length_bytes, timeout=None):
+        """
+        Read exactly `length_bytes` from serial port, waiting no longer than `timeout` seconds in total.
+        Blocking reads are used, so this returns as soon as the requested number of bytes is received.
+        """
+        buffer = bytearray(length_bytes)
+        self._read_buffer_into(memoryview(buffer), timeout)
+        buffer_bytes = bytes(buffer)
+        self.logger.debug("Serial buffer is received: %s", buffer_bytes)
+        return buffer_bytes
 
-    def _current_to_total_pressure(self, current_bytes):
-        return self._decode_bin_current(current_bytes) / self._total_sens_mA_per_Torr * 1000.0
+    def _read_buffer_into(self, view, timeout=None):
+        """Fill writable memoryview `view` in place from serial port, see :meth:`_read_buffer_chunked`."""
+        if timeout is None:
+            timeout = self._READ_TIMEOUT
+        length_bytes = len(view)
+        start = time.monotonic()
+        deadline = start + timeout
+        first_byte = None
+        received = 0
+        attempts = 0
+        preemptible = self._arbiter.priority == _MEASUREMENT
+        self.logger.debug("Waiting for %s bytes from serial port...", length_bytes)
+        try:
+            while received < length_bytes:
+                if self._interrupt.is_set():
+                    raise RGAException("Read interrupted")
+                if preemptible and self._arbiter.preempt.is_set():
+                    self._abort_scan()
+                    raise _ReadPreempted("Read aborted by a higher priority command")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.invalidate_cache()
+                    raise RGAException(
+                        "Failed to receive buffer: %s bytes received out of %s within %s s" %
+                        (received, length_bytes, timeout)
+                    )
+                try:
+                    # short reads while acquiring in background or measuring, so that they can be interrupted
+                    # (or preempted by safety commands of other threads) without delay
+                    self._set_read_timeout(min(remaining, self._INTERRUPT_POLL_TIME) if (
+                        preemptible or self._acquisition_thread is not None
+                    ) else remaining)
+                    attempts += 1
+                    if self._metrics is not None and first_byte is None:
+                        # blocking reads return only once the request is fulfilled, wait for the first byte alone
+                        received += self._com_obj.readinto(view[:1])
+                    else:
+                        received += self._com_obj.readinto(view[received:])
+                except Exception:
+                    self.invalidate_cache()
+                    raise RGAException("Failed to receive buffer")
+                if received and first_byte is None:
+                    first_byte = time.monotonic()
+                self.logger.debug("%s bytes received, out of %s", received, length_bytes)
+        finally:
+            if self._metrics is not None:
+                self._record_metrics(
+                    "read", start, first_byte, bytes_received=received, attempts=attempts, error=received < length_bytes
+                )
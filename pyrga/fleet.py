@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""Parallel acquisition from multiple SRS RGAs, one worker thread per serial port."""
+
+import collections
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pyrga.driver import RGAClient, RGAException
+
+FleetReading = collections.namedtuple("FleetReading", ["timestamp", "com_port", "method", "args", "result"])
+FleetReading.__doc__ = "Timestamped result of a single scheduled read from one of the RGAs of a fleet."
+
+DeviceHealth = collections.namedtuple(
+    "DeviceHealth", ["connected", "running", "readings", "errors", "consecutive_errors", "last_reading", "last_error"]
+)
+DeviceHealth.__doc__ = "Snapshot of the state of a single RGA of a fleet."
+
+
+class _Device:
+    def __init__(self, com_port, client_or_kwargs):
+        self.com_port = com_port
+        self.client = None
+        self.client_kwargs = {}
+        self.owns_client = not isinstance(client_or_kwargs, RGAClient)
+        if not self.owns_client:
+            self.client = client_or_kwargs
+        elif client_or_kwargs:
+            self.client_kwargs = dict(client_or_kwargs)
+        self.schedule = []
+        self.running = False
+        self.readings = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.last_reading = None
+        self.last_error = None
+
+
+class RGAFleet:
+    """RGAFleet runs read schedules of several RGAs in parallel
+
+    Every RGA is served by its own worker from a thread pool, which owns the serial port for the duration of the
+    acquisition. Timestamped results of all RGAs are merged into a single queue, available as :attr:`results`.
+
+    :param devices: mapping of serial ports to either :class:`~pyrga.driver.RGAClient` objects or dicts of keyword
+    arguments used to construct them (clients are then connected in parallel by the workers), a list of serial ports
+    is also accepted to use default settings
+    :type devices: dict or list
+    :param results_maxsize: max number of readings held in the results queue, zero for unbounded (workers wait for
+    free space in a full queue, readings still waiting when the fleet is stopped are discarded), defaults to 0
+    :type results_maxsize: int
+    :param reconnect_after: number of consecutive errors after which the client is reconnected, defaults to 3
+    :type reconnect_after: int
+
+    :raises RGAException:
+        - if no devices are specified
+        - if a schedule refers to an unsupported read method
+        - if fleet is started while it is already running
+    """
+
+    _READ_METHODS = ["read_mass", "read_spectrum", "read_histogram"]
+    _RETRY_DELAY = 1.0  # s, delay after an error before the next attempt
+    _PUT_POLL_TIME = 0.1  # s, longest wait for free space in the results queue before checking for stop
+
+    def __init__(self, devices, results_maxsize=0, reconnect_after=3):
+        self.logger = logging.getLogger(__name__)
+        if not isinstance(devices, dict):
+            devices = {com_port: None for com_port in devices}
+        if not devices:
+            raise RGAException("Fleet requires at least one device")
+        self._devices = collections.OrderedDict(
+            (com_port, _Device(com_port, client_or_kwargs)) for com_port, client_or_kwargs in devices.items()
+        )
+        self._reconnect_after = reconnect_after
+        self._stop_event = threading.Event()
+        self._executor = None
+        self._futures = []
+        self.results = queue.Queue(maxsize=results_maxsize)
+
+    @property
+    def clients(self):
+        return {com_port: device.client for com_port, device in self._devices.items()}
+
+    def schedule(self, com_port, method, *args):
+        """Append `method(*args)` (e.g. 'read_mass', 28) to the read schedule of RGA on `com_port`."""
+        if method not in self._READ_METHODS:
+            raise RGAException("Scheduled method must be one of %s, specified: %s" % (self._READ_METHODS, method))
+        self._devices[com_port].schedule.append((method, args))
+
+    def schedule_all(self, method, *args):
+        for com_port in self._devices:
+            self.schedule(com_port, method, *args)
+
+    def connect(self):
+        """Connect all RGAs that are not connected yet in parallel, return dict of exceptions of failed ports."""
+        with ThreadPoolExecutor(max_workers=len(self._devices)) as executor:
+            futures = {
+                com_port: executor.submit(self._connect, device)
+                for com_port, device in self._devices.items()
+                if device.client is None
+            }
+        return {com_port: f.exception() for com_port, f in futures.items() if f.exception() is not None}
+
+    def call(self, method, *args):
+        """Call `method(*args)` of all connected clients in parallel (e.g. turn_on_filament), return dict of results."""
+        if self.is_running():
+            raise RGAException("Cannot call client methods while acquisition is running")
+        with ThreadPoolExecutor(max_workers=len(self._devices)) as executor:
+            futures = {
+                com_port: executor.submit(getattr(device.client, method), *args)
+                for com_port, device in self._devices.items()
+                if device.client is not None
+            }
+        return {com_port: f.result() for com_port, f in futures.items()}
+
+    def start(self, cycles=None, interval=0.0):
+        """
+        Start running schedules of all RGAs in parallel.
+        Every schedule is repeated `cycles` times (indefinitely if None), starting a new cycle at most every `interval`
+        seconds. A cycle in which the RGA cannot be connected counts as completed, without any readings.
+        """
+        if self.is_running():
+            raise RGAException("Fleet acquisition is already running")
+        self.logger.info("Starting acquisition on %s RGAs...", len(self._devices))
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=len(self._devices))
+        self._futures = [
+            self._executor.submit(self._run_device, device, cycles, interval) for device in self._devices.values()
+        ]
+
+    def stop(self, wait=True):
+        """Stop acquisition after the reads in progress are completed."""
+        self.logger.info("Stopping acquisition...")
+        self._stop_event.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def join(self, timeout=None):
+        """Wait for all schedules to complete their cycles, return True if all workers are finished."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in self._futures:
+            try:
+                future.result(None if deadline is None else max(deadline - time.monotonic(), 0))
+            except Exception:  # pylint: disable=W0703
+                return False
+        return True
+
+    def is_running(self):
+        return any(not future.done() for future in self._futures)
+
+    def health(self):
+        return {
+            com_port: DeviceHealth(
+                device.client is not None,
+                device.running,
+                device.readings,
+                device.errors,
+                device.consecutive_errors,
+                device.last_reading,
+                device.last_error,
+            )
+            for com_port, device in self._devices.items()
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _connect(self, device):
+        self.logger.info("Connecting to RGA on port %s...", device.com_port)
+        device.client = RGAClient(device.com_port, **device.client_kwargs)
+
+    def _record_error(self, device, exc):
+        device.errors += 1
+        device.consecutive_errors += 1
+        device.last_error = (time.time(), exc)
+        self.logger.error("RGA on port %s: %s", device.com_port, exc)
+        if device.consecutive_errors >= self._reconnect_after and device.owns_client:
+            try:
+                device.client.close()  # release the port before it is reopened
+            except Exception:  # pylint: disable=W0703
+                pass
+            device.client = None
+        self._stop_event.wait(self._RETRY_DELAY)
+
+    def _publish(self, reading):
+        # a full queue is only drained by the caller, never block without checking for stop
+        while not self._stop_event.is_set():
+            try:
+                self.results.put(reading, timeout=self._PUT_POLL_TIME)
+                return
+            except queue.Full:
+                pass
+
+    def _run_device(self, device, cycles, interval):
+        device.running = True
+        cycle = 0
+        try:
+            while not self._stop_event.is_set() and (cycles is None or cycle < cycles):
+                cycle_start = time.monotonic()
+                schedule = device.schedule
+                if device.client is None:
+                    try:
+                        self._connect(device)
+                    except Exception as exc:  # pylint: disable=W0703
+                        self._record_error(device, exc)
+                        schedule = []  # the failed cycle still counts, bounded acquisitions must come to an end
+                for method, args in schedule:
+                    if self._stop_event.is_set():
+                        break
+                    try:
+                        result = getattr(device.client, method)(*args)
+                    except Exception as exc:  # pylint: disable=W0703
+                        self._record_error(device, exc)
+                        if device.client is None:
+                            break
+                        continue
+                    device.readings += 1
+                    device.consecutive_errors = 0
+                    device.last_reading = time.time()
+                    self._publish(FleetReading(device.last_reading, device.com_port, method, args, result))
+                cycle += 1
+                self._stop_event.wait(max(interval - (time.monotonic() - cycle_start), 0.0))
+        finally:
+            device.running = False
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""Per-command latency and throughput instrumentation of :class:`~pyrga.driver.RGAClient`."""
+
+import bisect
+import collections
+import threading
+import time
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 120.0)
+
+WindowSummary = collections.namedtuple("WindowSummary", ["count", "mean", "p50", "p90", "p99", "max"])
+WindowSummary.__doc__ = "Statistics of the observations of a :class:`RollingHistogram` within its time window."
+
+OperationMetrics = collections.namedtuple(
+    "OperationMetrics",
+    ["count", "errors", "bytes_sent", "bytes_received", "attempts", "duration", "wait", "transfer"],
+)
+OperationMetrics.__doc__ = (
+    "Totals of a single (operation, command) pair since the start, and :class:`WindowSummary` of its durations, "
+    "wait times and transfer times within the rolling window."
+)
+
+
+class RollingHistogram:
+    """RollingHistogram counts observations in fixed buckets, both in total and within a rolling time window
+
+    Totals are monotonic as expected by Prometheus, the window is made of `slots` sub-histograms which are dropped as
+    they age out, so recording and reading both take constant time regardless of the number of observations.
+
+    :param buckets: upper bounds of the buckets, an implicit +Inf bucket is added
+    :type buckets: tuple
+    :param window: length of the rolling window in seconds, defaults to 60
+    :type window: float
+    :param slots: number of sub-histograms the window is split into, defaults to 6
+    :type slots: int
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS, window=60.0, slots=6):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._slot_time = window / slots
+        self._slots = collections.deque(maxlen=slots)  # [slot index, bucket counts, sum, max]
+
+    def observe(self, value, now=None):
+        bucket = bisect.bisect_left(self.buckets, value)
+        self.counts[bucket] += 1
+        self.sum += value
+        self.count += 1
+        slot_index = int((time.monotonic() if now is None else now) // self._slot_time)
+        if not self._slots or self._slots[-1][0] != slot_index:
+            self._slots.append([slot_index, [0] * len(self.counts), 0.0, value])
+        slot = self._slots[-1]
+        slot[1][bucket] += 1
+        slot[2] += value
+        slot[3] = max(slot[3], value)
+
+    def window(self, now=None):
+        """Return (bucket counts, sum, max) of the observations within the rolling window."""
+        first_slot = int((time.monotonic() if now is None else now) // self._slot_time) - self._slots.maxlen + 1
+        counts = [0] * len(self.counts)
+        total = 0.0
+        maximum = 0.0
+        for slot_index, slot_counts, slot_sum, slot_max in self._slots:
+            if slot_index < first_slot:
+                continue
+            counts = [c + s for c, s in zip(counts, slot_counts)]
+            total += slot_sum
+            maximum = max(maximum, slot_max)
+        return counts, total, maximum
+
+    def quantile(self, q, counts=None):
+        """
+        Estimate `q`-quantile of the window (or of `counts`) by linear interpolation within the bucket it falls into,
+        same as `histogram_quantile` of Prometheus. Return None if there are no observations.
+        """
+        if counts is None:
+            counts = self.window()[0]
+        rank = q * sum(counts)
+        if not rank:
+            return None
+        cumulative = 0
+        for bucket, count in enumerate(counts):
+            if cumulative + count >= rank:
+                if bucket == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[bucket - 1] if bucket else 0.0
+                return lower + (self.buckets[bucket] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def summary(self, now=None):
+        counts, total, maximum = self.window(now)
+        count = sum(counts)
+        return WindowSummary(
+            count,
+            total / count if count else None,
+            self.quantile(0.5, counts),
+            self.quantile(0.9, counts),
+            self.quantile(0.99, counts),
+            maximum if count else None,
+        )
+
+
+class _Operation:
+    def __init__(self, buckets, window):
+        self.count = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.attempts = 0
+        self.duration = RollingHistogram(buckets, window)
+        self.wait = RollingHistogram(buckets, window)
+        self.transfer = RollingHistogram(buckets, window)
+
+
+class RGAMetrics:
+    """RGAMetrics collects timing of the serial communication of one or more clients
+
+    Pass an instance as `metrics` to :class:`~pyrga.driver.RGAClient` to record every operation: writing a command
+    ('send'), reading a binary buffer ('read') or an ASCII line ('read_line'), and decoding a scan ('decode'). Each
+    operation is attributed to the last command sent. Wait time is the time until the first bytes are received and
+    transfer time is the rest of the duration; line reads are done in one call, so all of their time counts as wait.
+
+    Any object with a :meth:`record` method with the same signature can be used as a hook instead.
+
+    :param window: length of the rolling window of the histograms in seconds, defaults to 60
+    :type window: float
+    :param buckets: upper bounds of the histogram buckets in seconds, defaults to DURATION_BUCKETS
+    :type buckets: tuple
+    :param labels: constant labels added to every exported series, e.g. {'port': '/dev/ttyUSB0'}, defaults to None
+    :type labels: dict
+    """
+
+    def __init__(self, window=60.0, buckets=DURATION_BUCKETS, labels=None):
+        self._window = window
+        self._buckets = buckets
+        self._labels = dict(labels or {})
+        self._operations = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(
+        self, operation, command, duration, wait=0.0, bytes_sent=0, bytes_received=0, attempts=1, error=False
+    ):
+        """Record a single operation taking `duration` seconds, out of which `wait` seconds were spent idle."""
+        with self._lock:
+            key = (operation, command)
+            stats = self._operations.get(key)
+            if stats is None:
+                stats = self._operations[key] = _Operation(self._buckets, self._window)
+            now = time.monotonic()
+            stats.count += 1
+            stats.errors += int(error)
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.attempts += attempts
+            stats.duration.observe(duration, now)
+            stats.wait.observe(wait, now)
+            stats.transfer.observe(max(duration - wait, 0.0), now)
+
+    def snapshot(self):
+        """Return dict of :class:`OperationMetrics` keyed by (operation, command)."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                key: OperationMetrics(
+                    s.count,
+                    s.errors,
+                    s.bytes_sent,
+                    s.bytes_received,
+                    s.attempts,
+                    s.duration.summary(now),
+                    s.wait.summary(now),
+                    s.transfer.summary(now),
+                )
+                for key, s in self._operations.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._operations.clear()
+
+    def to_prometheus(self, prefix="pyrga"):
+        """Export totals in Prometheus text exposition format."""
+        counters = [
+            ("operations_total", "Number of operations", "count"),
+            ("errors_total", "Number of failed operations", "errors"),
+            ("bytes_sent_total", "Bytes written to serial port", "bytes_sent"),
+            ("bytes_received_total", "Bytes read from serial port", "bytes_received"),
+            ("attempts_total", "Number of read or write calls to serial port", "attempts"),
+        ]
+        histograms = [
+            ("duration_seconds", "Duration of operations", "duration"),
+            ("wait_seconds", "Time waiting for the first bytes of a response", "wait"),
+            ("transfer_seconds", "Time receiving the rest of a response", "transfer"),
+        ]
+        lines = []
+        with self._lock:
+            for name, doc, attr in counters:
+                lines.append("# HELP %s_%s %s" % (prefix, name, doc))
+                lines.append("# TYPE %s_%s counter" % (prefix, name))
+                for key, stats in self._operations.items():
+                    lines.append("%s_%s{%s} %s" % (prefix, name, self._format_labels(key), getattr(stats, attr)))
+            for name, doc, attr in histograms:
+                lines.append("# HELP %s_%s %s" % (prefix, name, doc))
+                lines.append("# TYPE %s_%s histogram" % (prefix, name))
+                for key, stats in self._operations.items():
+                    histogram = getattr(stats, attr)
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                        cumulative += count
+                        labels = self._format_labels(key, le=bound)
+                        lines.append("%s_%s_bucket{%s} %s" % (prefix, name, labels, cumulative))
+                    labels = self._format_labels(key)
+                    lines.append("%s_%s_sum{%s} %r" % (prefix, name, labels, histogram.sum))
+                    lines.append("%s_%s_count{%s} %s" % (prefix, name, labels, histogram.count))
+        return "\n".join(lines) + "\n"
+
+    def _format_labels(self, key, **extra):
+        labels = collections.OrderedDict(self._labels)
+        labels["operation"], labels["command"] = key
+        labels.update(extra)
+        return ",".join('%s="%s"' % (name, str(value).replace('"', '\\"')) for name, value in labels.items())
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""Single mass monitoring (e.g. helium leak checking) polling faster with less averaging when a rise is detected."""
+
+import collections
+import logging
+import math
+import threading
+import time
+
+from pyrga.driver import RGAException
+
+MonitorEvent = collections.namedtuple("MonitorEvent", ["timestamp", "amu", "kind", "pressure", "baseline"])
+MonitorEvent.__doc__ = """
+Alarm or clear event of :class:`LeakMonitor`. `kind` is 'change' for rises found by the change detector of the mass
+and 'threshold' for readings above the alarm threshold of the mass, `baseline` is the pressure level before the rise.
+"""
+
+
+class ChangeDetector:
+    """ChangeDetector flags rises of a stream of readings with a one-sided CUSUM over an adaptive baseline
+
+    The baseline mean and variance are exponentially weighted moving averages of the readings (exact running averages
+    of the first readings), frozen while a rise is flagged. Each reading adds its deviation from the baseline minus
+    `drift` (both in units of standard deviations) to the cumulative sum, which never drops below zero. A rise is
+    flagged when the sum exceeds `limit` and cleared when it falls back to zero. Readings may be taken with different
+    settings (e.g. noise floors) identified by a key. The mean is averaged from readings with the first key only
+    (the most precise ones), the variance is tracked separately for each key, and rises are detected once `warmup`
+    readings with the first key and with the key of the reading were averaged.
+
+    :param alpha: weight of the newest reading in the baseline, defaults to 0.02
+    :type alpha: float
+    :param drift: allowance subtracted from every deviation, about half the smallest rise to detect, defaults to 0.5
+    :type drift: float
+    :param limit: decision limit of the cumulative sum, defaults to 8
+    :type limit: float
+    :param rel_noise: lower bound of the standard deviation relative to the baseline, defaults to 0.02
+    :type rel_noise: float
+    :param warmup: number of readings averaged before rises are detected, defaults to 10
+    :type warmup: int
+    """
+
+    def __init__(self, alpha=0.02, drift=0.5, limit=8.0, rel_noise=0.02, warmup=10):
+        if not 0 < alpha <= 1:
+            raise RGAException("Smoothing factor must be within (0, 1], specified: %s" % alpha)
+        self.alpha = alpha
+        self.drift = drift
+        self.limit = limit
+        self.rel_noise = rel_noise
+        self.warmup = warmup
+        self.reset()
+
+    def reset(self):
+        """Forget the baseline, e.g. to accept the current level after a rise."""
+        self.mean = 0.0
+        self.cusum = 0.0
+        self.rising = False
+        self._reference = None  # key of the readings the mean is averaged from
+        self._noise = {}  # key: [number of readings, variance]
+
+    def readings(self, key=None):
+        """Number of readings with settings `key` averaged into the baseline."""
+        return self._noise.get(key, (0, 0.0))[0]
+
+    def sigma(self, key=None):
+        variance = self._noise.get(key, (0, 0.0))[1]
+        return max(math.sqrt(variance), self.rel_noise * abs(self.mean), 1e-300)
+
+    def update(self, value, key=None):
+        """Add a reading taken with settings `key`, return True while a rise is flagged."""
+        if self._reference is None:
+            self._reference = key
+        noise = self._noise.setdefault(key, [0, 0.0])
+        if noise[0] >= self.warmup and self.readings(self._reference) >= self.warmup:
+            z = (value - self.mean) / self.sigma(key)
+            self.cusum = min(max(self.cusum + z - self.drift, 0.0), 2.0 * self.limit)
+            if self.cusum > self.limit:
+                self.rising = True
+            elif self.cusum == 0.0:
+                self.rising = False
+            if self.rising:
+                return True
+        noise[0] += 1
+        alpha = max(self.alpha, 1.0 / noise[0])
+        deviation = value - self.mean
+        if key == self._reference:
+            self.mean += alpha * deviation
+        noise[1] = (1.0 - alpha) * (noise[1] + alpha * deviation * deviation)
+        return False
+
+
+class LeakMonitor:
+    """LeakMonitor polls single masses, slowly with heavy averaging while readings are stable and fast otherwise
+
+    Every cycle reads all masses with :meth:`~pyrga.driver.RGAClient.read_mass`. Readings feed a
+    :class:`ChangeDetector` per mass and are compared with the alarm threshold of the mass. As soon as any mass rises
+    or exceeds its threshold, the noise floor is switched to `fast_noise_floor` and cycles are started every
+    `fast_interval` seconds, until all masses are back to normal. The first cycles (the warmup of the detectors) run
+    slow to learn the baseline, followed by fast cycles to learn the noise at the fast noise floor. Threshold
+    alarms are active from the first cycle, rises are detected after the warmup. Alarms and clears are reported as
+    :class:`MonitorEvent` to the `on_alarm` and `on_clear` callbacks, called from the monitoring thread. Errors of
+    the client are logged and reported to the `on_error` callback, the failed cycle is retried after the cycle interval
+    and monitoring ends once `max_errors` cycles in a row have failed. Thresholds may be changed while monitoring.
+
+    :param client: connected client with the filament on
+    :type client: RGAClient
+    :param masses: mapping of masses to alarm thresholds in units of Torr (None to only detect rises), a list of
+    masses is also accepted
+    :type masses: dict or list
+    :param on_alarm: called with :class:`MonitorEvent` when a mass rises or exceeds its threshold, defaults to None
+    :type on_alarm: callable
+    :param on_clear: called with :class:`MonitorEvent` when a mass is back to normal, defaults to None
+    :type on_clear: callable
+    :param slow_noise_floor: noise floor while readings are stable, defaults to 2
+    :type slow_noise_floor: int
+    :param fast_noise_floor: noise floor during alarms, defaults to 6
+    :type fast_noise_floor: int
+    :param slow_interval: seconds between the starts of cycles while readings are stable, defaults to 5
+    :type slow_interval: float
+    :param fast_interval: seconds between the starts of cycles during alarms, defaults to 0.2
+    :type fast_interval: float
+    :param detector: keyword arguments of the :class:`ChangeDetector` of each mass, defaults to None
+    :type detector: dict
+    :param on_error: called with the :class:`~pyrga.driver.RGAException` of every failed cycle, defaults to None
+    :type on_error: callable
+    :param max_errors: number of consecutive failed cycles ending monitoring, defaults to 5
+    :type max_errors: int
+
+    :raises RGAException: if the monitor is started while it is already running, and after `max_errors` consecutive
+    errors of the client
+    """
+
+    def __init__(
+        self,
+        client,
+        masses,
+        on_alarm=None,
+        on_clear=None,
+        slow_noise_floor=2,
+        fast_noise_floor=6,
+        slow_interval=5.0,
+        fast_interval=0.2,
+        detector=None,
+        on_error=None,
+        max_errors=5,
+    ):
+        self.logger = logging.getLogger(__name__)
+        for noise_floor in (slow_noise_floor, fast_noise_floor):
+            if noise_floor not in client._NOISE_FLOORS_ALLOWED:  # pylint: disable=W0212
+                raise RGAException(
+                    "Noise floor must be equal to one of allowed values: %s, specified: %s" %
+                    (client._NOISE_FLOORS_ALLOWED, noise_floor)  # pylint: disable=W0212
+                )
+        if not isinstance(masses, dict):
+            masses = {amu: None for amu in masses}
+        if not masses:
+            raise RGAException("At least one mass must be specified")
+        if max_errors < 1:
+            raise RGAException("Number of errors ending monitoring must be at least 1, specified: %s" % max_errors)
+        for amu in masses:
+            client._validate_mass(amu)  # pylint: disable=W0212
+        self.client = client
+        self.thresholds = dict(masses)
+        self.on_alarm = on_alarm
+        self.on_clear = on_clear
+        self.on_error = on_error
+        self.max_errors = max_errors
+        self.slow_noise_floor = slow_noise_floor
+        self.fast_noise_floor = fast_noise_floor
+        self.slow_interval = slow_interval
+        self.fast_interval = fast_interval
+        self._detector = dict(detector or {})
+        self.detectors = {amu: ChangeDetector(**self._detector) for amu in masses}
+        self._warmup = next(iter(self.detectors.values())).warmup
+        self.last = {}  # amu: (timestamp, pressure) of the last reading
+        self.fast = False
+        self._alarms = set()  # (amu, kind) of active alarms
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._error = None
+
+    def step(self):
+        """Run a single cycle: read all masses, update detectors and fire callbacks. Return dict of pressures."""
+        noise_floor = self.fast_noise_floor if self._is_fast() else self.slow_noise_floor
+        if self.client._noise_floor != noise_floor:  # pylint: disable=W0212
+            self.client.set_noise_floor(noise_floor)
+        pressures = {}
+        for amu, threshold in list(self.thresholds.items()):  # may be changed by other threads
+            pressure = self.client.read_mass(amu)
+            timestamp = time.time()
+            self.last[amu] = (timestamp, pressure)
+            pressures[amu] = pressure
+            if amu not in self.detectors:  # mass added while monitoring
+                self.detectors[amu] = ChangeDetector(**self._detector)
+            detector = self.detectors[amu]
+            baseline = detector.mean
+            self._set_alarm(amu, "change", detector.update(pressure, noise_floor), timestamp, pressure, baseline)
+            above = threshold is not None and pressure > threshold
+            self._set_alarm(amu, "threshold", above, timestamp, pressure, baseline)
+        fast = bool(self._alarms)
+        if fast != self.fast:
+            self.logger.info("Switching to %s polling", "fast" if fast else "slow")
+            self.fast = fast
+        return pressures
+
+    def _is_fast(self):
+        if self.fast:
+            return True
+        readings = [
+            (detector.readings(self.slow_noise_floor), detector.readings(self.fast_noise_floor))
+            for detector in list(self.detectors.values())
+        ]
+        return all(slow >= self._warmup for slow, _ in readings) and any(fast < self._warmup for _, fast in readings)
+
+    def _set_alarm(self, amu, kind, active, timestamp, pressure, baseline):
+        key = (amu, kind)
+        if active == (key in self._alarms):
+            return
+        if active:
+            self._alarms.add(key)
+            self.logger.warning("Alarm (%s) on mass %s: %.3g Torr, baseline %.3g Torr", kind, amu, pressure, baseline)
+            callback = self.on_alarm
+        else:
+            self._alarms.discard(key)
+            self.logger.info("Alarm (%s) on mass %s cleared: %.3g Torr", kind, amu, pressure)
+            callback = self.on_clear
+        if callback is not None:
+            try:
+                callback(MonitorEvent(timestamp, amu, kind, pressure, baseline))
+            except Exception:  # pylint: disable=W0703
+                self.logger.exception("Monitor callback failed")
+
+    @property
+    def alarms(self):
+        """Active alarms as sorted list of (amu, kind)."""
+        return sorted(self._alarms)
+
+    def rebaseline(self, amu=None):
+        """Accept the current level of `amu` (all masses if None) as the new baseline, clearing its change alarm."""
+        for mass in list(self.thresholds) if amu is None else [amu]:
+            self.detectors[mass].reset()
+            self._alarms.discard((mass, "change"))
+
+    def run(self, cycles=None):
+        """Run cycles (indefinitely if `cycles` is None) in the calling thread until :meth:`stop` is called."""
+        self._stop_event.clear()
+        self._run(cycles)
+
+    def _run(self, cycles):
+        cycle = 0
+        errors = 0
+        while not self._stop_event.is_set() and (cycles is None or cycle < cycles):
+            cycle_start = time.monotonic()
+            try:
+                self.step()
+                errors = 0
+                cycle += 1
+            except RGAException as exc:
+                errors += 1
+                self._report_error(exc, errors)
+                if errors >= self.max_errors:
+                    raise
+            interval = self.fast_interval if self._is_fast() else self.slow_interval
+            self._stop_event.wait(max(interval - (time.monotonic() - cycle_start), 0.0))
+
+    def _report_error(self, exc, errors):
+        self.logger.error("Monitoring cycle failed (%s of %s in a row): %s", errors, self.max_errors, exc)
+        if self.on_error is not None:
+            try:
+                self.on_error(exc)
+            except Exception:  # pylint: disable=W0703
+                self.logger.exception("Monitor error callback failed")
+
+    def start(self):
+        """Run cycles on a background thread, which uses the client until :meth:`stop` is called."""
+        if self.is_running():
+            raise RGAException("Monitor is already running")
+        self._error = None
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_thread, name="pyrga-monitor", daemon=True)
+        self._thread.start()
+
+    def _run_thread(self):
+        try:
+            self._run(None)
+        except Exception as exc:  # pylint: disable=W0703
+            self.logger.error("Monitoring failed: %s", exc)
+            self._error = exc
+
+    def stop(self):
+        """Stop monitoring after the cycle in progress, raise the error that ended it early if there was one."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
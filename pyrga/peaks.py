@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""Vectorized peak detection, centroiding and integration of analog spectra, and tracking of mass drift."""
+
+import collections
+
+from pyrga.driver import RGAException, Spectrum, _RGAClientBase, np
+
+Peaks = collections.namedtuple("Peaks", ["scans", "centroids", "heights", "areas"])
+Peaks.__doc__ = """
+Peaks found by :func:`find_peaks`: index of the scan each peak belongs to (all zeros for a single spectrum), centroid
+mass, baseline-corrected height and area (in units of pressure * amu) of each peak, as numpy arrays sorted by scan
+and mass.
+"""
+
+
+def _noise_threshold(pressures, baseline, snr):
+    """Robust noise estimate from the median absolute deviation of each spectrum, spectra are mostly baseline."""
+    mad = np.median(np.abs(pressures - baseline), axis=1, keepdims=True)
+    return baseline + snr * 1.4826 * mad
+
+
+def find_peaks(spectra, amu=None, threshold=None, snr=5.0, width=1.0):
+    """
+    Locate peaks of analog `spectra` and compute their centroids, heights and areas.
+
+    `spectra` is either a single spectrum as returned by read_spectrum() (or an (amu, pressures, total) tuple), or a
+    2D array with one spectrum per row (e.g. pressures returned by :meth:`~pyrga.storage.SpectrumLog.query`) with the
+    mass axis given as `amu`; all spectra are processed at once. A peak is the highest point within `width` amu around
+    it and above `threshold` (default: median baseline plus `snr` times the robust noise estimate of the spectrum).
+    Centroid and area are computed over the same `width` above the baseline. Return :class:`Peaks`.
+    """
+    _RGAClientBase._check_numpy()
+    if isinstance(spectra, Spectrum) or isinstance(spectra, tuple) and len(spectra) == 3:
+        amu, spectra = spectra[0], spectra[1]
+    pressures = np.atleast_2d(np.asarray(spectra, dtype=float))
+    amu = None if amu is None else np.asarray(amu, dtype=float)
+    if amu is None or amu.ndim != 1 or len(amu) != pressures.shape[1] or len(amu) < 2:
+        raise RGAException("Mass axis must be specified and match the length of the spectra")
+    step = (amu[-1] - amu[0]) / (len(amu) - 1)
+    half = max(int(round(width / step / 2.0)), 1)
+    points = pressures.shape[1]
+
+    baseline = np.median(pressures, axis=1, keepdims=True)
+    if threshold is None:
+        threshold = _noise_threshold(pressures, baseline, snr)
+    padded = np.pad(pressures, ((0, 0), (half, half)), mode="constant", constant_values=-np.inf)
+    local_max = pressures.copy()
+    for shift in range(2 * half + 1):
+        np.maximum(local_max, padded[:, shift : shift + points], out=local_max)
+    is_peak = (pressures == local_max) & (pressures > threshold)
+    # flat tops: keep only the first point of equal maxima
+    is_peak[:, 1:] &= ~(is_peak[:, :-1] & (pressures[:, 1:] == pressures[:, :-1]))
+    scans, centers = np.nonzero(is_peak)
+
+    window = np.clip(centers[:, None] + np.arange(-half, half + 1)[None, :], 0, points - 1)
+    signal = np.clip(pressures[scans[:, None], window] - baseline[scans], 0.0, None)
+    masses = amu[window]
+    total = signal.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        centroids = np.where(total > 0, (signal * masses).sum(axis=1) / total, amu[centers])
+    heights = pressures[scans, centers] - baseline[scans, 0]
+    areas = total * step
+    return Peaks(scans, centroids, heights, areas)
+
+
+class DriftTracker:
+    """DriftTracker follows the offset of peak centroids from their nominal integer masses across consecutive scans
+
+    Offsets are smoothed per nominal mass with an exponentially weighted moving average, updated in constant time
+    per peak, so mass calibration drift (e.g. after a temperature change) shows up without storing any history.
+
+    :param alpha: weight of the newest scan in the moving average, (0, 1], defaults to 0.1
+    :type alpha: float
+    :param max_offset: peaks further than this from an integer mass (in amu) are ignored, defaults to 0.4
+    :type max_offset: float
+    """
+
+    def __init__(self, alpha=0.1, max_offset=0.4):
+        if not 0 < alpha <= 1:
+            raise RGAException("Smoothing factor must be within (0, 1], specified: %s" % alpha)
+        self.alpha = alpha
+        self.max_offset = max_offset
+        self.scans = 0
+        self._drift = {}  # nominal mass: smoothed offset in amu
+
+    def update(self, peaks):
+        """Update drift with :class:`Peaks` of one or more consecutive scans (in order), return :attr:`drift`."""
+        nominal = np.round(peaks.centroids)
+        offsets = peaks.centroids - nominal
+        keep = np.abs(offsets) <= self.max_offset
+        for mass, offset in zip(nominal[keep].astype(int).tolist(), offsets[keep].tolist()):
+            previous = self._drift.get(mass)
+            self._drift[mass] = offset if previous is None else previous + self.alpha * (offset - previous)
+        self.scans += len(np.unique(peaks.scans))
+        return self.drift
+
+    @property
+    def drift(self):
+        """Smoothed centroid offsets (in amu) keyed by nominal mass."""
+        return dict(sorted(self._drift.items()))
+
+    def mean_drift(self, weights=None):
+        """Mean offset over all tracked masses, optionally weighted by dict of weights keyed by nominal mass."""
+        if not self._drift:
+            return None
+        if weights is None:
+            return sum(self._drift.values()) / len(self._drift)
+        total = sum(weights.get(mass, 0.0) for mass in self._drift)
+        return sum(offset * weights.get(mass, 0.0) for mass, offset in self._drift.items()) / total if total else None
+
+    def reset(self):
+        self._drift.clear()
+        self.scans = 0
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""Scan time estimates and selection of the scan type and noise floor fitting a time budget."""
+
+import collections
+
+from pyrga.driver import _MEASUREMENT, RGAException, Spectrum, _RGAClientBase
+
+MODES = ["analog", "histogram", "mass"]
+
+ScanPlan = collections.namedtuple(
+    "ScanPlan", ["mode", "noise_floor", "amu_min", "amu_max", "amu_res", "masses", "duration"]
+)
+ScanPlan.__doc__ = """
+Read selected by :func:`plan_scan`, run it with :meth:`~pyrga.driver.RGAClient.read_plan`.
+`mode` is one of 'analog' (read_spectrum), 'histogram' (read_histogram) or 'mass' (read_mass of each of `masses`),
+`duration` is the estimated time of the read in seconds.
+"""
+
+
+def estimate_scan_time(mode, noise_floor, amu_min=None, amu_max=None, amu_res=None, masses=None):
+    """
+    Estimated duration in seconds of an 'analog' scan from `amu_min` to `amu_max` with `amu_res` steps per amu,
+    a 'histogram' scan from `amu_min` to `amu_max`, or single 'mass' reads of each of `masses`, at `noise_floor`.
+    Time needed to change settings before the scan is not included.
+    """
+    if noise_floor not in _RGAClientBase._NOISE_FLOORS_ALLOWED:
+        raise RGAException(
+            "Noise floor must be equal to one of allowed values: %s, specified: %s" %
+            (_RGAClientBase._NOISE_FLOORS_ALLOWED, noise_floor)
+        )
+    if mode == "mass":
+        return len(masses) * _RGAClientBase._estimate_read_time(1, noise_floor, 4)
+    if mode == "analog":
+        points = (amu_max - amu_min) * amu_res + 1
+    elif mode == "histogram":
+        points = amu_max - amu_min + 1
+    else:
+        raise RGAException("Scan mode must be one of %s, specified: %s" % (MODES, mode))
+    return _RGAClientBase._estimate_read_time(points, noise_floor, 4 * (points + 1))
+
+
+def _validate_amu_res(amu_res):
+    if amu_res not in range(_RGAClientBase._AMU_RES_MIN, _RGAClientBase._AMU_RES_MAX + 1):
+        raise RGAException(
+            "Steps per amu must be within [%s, %s], specified: %s" %
+            (_RGAClientBase._AMU_RES_MIN, _RGAClientBase._AMU_RES_MAX, amu_res)
+        )
+
+
+def _parse_targets(targets):
+    masses = set()
+    ranges = []
+    for target in targets:
+        if isinstance(target, int):
+            masses.add(target)
+        elif isinstance(target, (tuple, list)) and len(target) == 2 and all(isinstance(t, int) for t in target):
+            if target[0] > target[1]:
+                raise RGAException("Mass range must be specified as (low, high), specified: %s" % (target,))
+            if target[0] == target[1]:  # scans need amu_min < amu_max
+                masses.add(target[0])
+            else:
+                ranges.append(tuple(target))
+        else:
+            raise RGAException("Targets must be integer masses or (low, high) mass ranges, specified: %s" % (target,))
+    if not masses and not ranges:
+        raise RGAException("At least one mass or mass range must be specified")
+    bounds = list(masses) + [t for r in ranges for t in r]
+    return sorted(masses), ranges, min(bounds), max(bounds)
+
+
+def _validate_noise_floors(noise_floors):
+    if noise_floors is None:
+        return _RGAClientBase._NOISE_FLOORS_ALLOWED
+    selected = set(noise_floors)
+    if not selected or not selected.issubset(_RGAClientBase._NOISE_FLOORS_ALLOWED):
+        raise RGAException(
+            "Noise floors must be a non-empty selection of allowed values: %s, specified: %s" %
+            (_RGAClientBase._NOISE_FLOORS_ALLOWED, list(noise_floors))
+        )
+    return selected
+
+
+def plan_scan(targets, budget, amu_res=10, noise_floors=None):
+    """
+    Choose the read covering `targets` (integer masses and/or (low, high) mass ranges) within `budget` seconds.
+
+    Mass ranges are covered by an analog scan with `amu_res` steps per amu if one fits the budget, by a histogram
+    scan otherwise. Single masses (including ranges with low == high) are covered by whichever is faster of single
+    mass reads and a histogram scan. The lowest noise floor (the most averaging) out of `noise_floors` (all by
+    default) that fits the budget is selected.
+    Return :class:`ScanPlan`, raise :class:`~pyrga.driver.RGAException` if no read fits the budget.
+    """
+    masses, ranges, amu_min, amu_max = _parse_targets(targets)
+    _validate_amu_res(amu_res)
+    noise_floors = sorted(_validate_noise_floors(noise_floors))
+    if ranges:
+        candidates = [(nf, ["analog"]) for nf in noise_floors] + [(nf, ["histogram"]) for nf in noise_floors]
+    else:
+        modes = ["mass", "histogram"] if amu_max > amu_min else ["mass"]
+        candidates = [(nf, modes) for nf in noise_floors]
+    fastest = None
+    for noise_floor, modes in candidates:
+        plans = []
+        for mode in modes:
+            res = amu_res if mode == "analog" else None
+            duration = estimate_scan_time(mode, noise_floor, amu_min, amu_max, res, masses)
+            plans.append(ScanPlan(mode, noise_floor, amu_min, amu_max, res, tuple(masses), duration))
+        plan = min(plans, key=lambda p: p.duration)
+        if plan.duration <= budget:
+            return plan
+        if fastest is None or plan.duration < fastest.duration:
+            fastest = plan
+    raise RGAException(
+        "No read fits the time budget of %s s, the fastest one is %s at noise floor %s taking %.3g s" %
+        (budget, fastest.mode, fastest.noise_floor, fastest.duration)
+    )
+
+
+RECONFIGURE_TIME = 0.05  # s, estimated time of changing the scanned mass window (one batch of MI, MF, SA + readback)
+
+ScheduledScan = collections.namedtuple("ScheduledScan", ["amu_min", "amu_max", "amu_res", "windows", "duration"])
+ScheduledScan.__doc__ = """
+Single scan of a schedule made by :func:`schedule_windows`, covering one or more of the requested `windows`.
+`amu_res` is None for histogram scans, `duration` is the estimated time of the scan in seconds.
+"""
+
+
+def _normalize_window(window):
+    if not isinstance(window, (tuple, list)) or len(window) not in (2, 3):
+        raise RGAException(
+            "Windows must be (amu_min, amu_max, amu_res) or (amu_min, amu_max), specified: %s" % (window,)
+        )
+    amu_min, amu_max, amu_res = tuple(window) + (None,) * (3 - len(window))
+    if not isinstance(amu_min, int) or not isinstance(amu_max, int) or amu_min >= amu_max:
+        raise RGAException("Window bounds must be integers with amu_min < amu_max, specified: %s" % (window,))
+    if amu_res is not None:
+        _validate_amu_res(amu_res)
+    return (amu_min, amu_max, amu_res)
+
+
+def _scan_time(amu_min, amu_max, amu_res, noise_floor):
+    return estimate_scan_time("histogram" if amu_res is None else "analog", noise_floor, amu_min, amu_max, amu_res)
+
+
+def schedule_windows(windows, noise_floor, current=None, reconfigure_time=RECONFIGURE_TIME):
+    """
+    Order and merge mass `windows` to minimize changes of the scanned mass window.
+
+    Windows are (amu_min, amu_max, amu_res) for analog scans or (amu_min, amu_max) for histogram scans. Overlapping
+    or nearby windows with the same steps per amu are merged into one scan if scanning the masses in between at
+    `noise_floor` is estimated to take less than `reconfigure_time` plus the extra scan overhead. The scan matching
+    the `current` (amu_min, amu_max, amu_res) of the client is scheduled first, analog and histogram scans over the
+    same masses are scheduled next to each other. Return list of :class:`ScheduledScan`.
+    """
+    by_res = collections.defaultdict(list)
+    for window in map(_normalize_window, windows):
+        by_res[window[2]].append(window)
+    scans = []
+    for amu_res, group in by_res.items():
+        group = sorted(set(group))
+        merged = [group[0]]
+        amu_min, amu_max = group[0][:2]
+        for window in group[1:]:
+            separate = _scan_time(window[0], window[1], amu_res, noise_floor) + reconfigure_time
+            extended = _scan_time(amu_min, max(amu_max, window[1]), amu_res, noise_floor)
+            if extended <= _scan_time(amu_min, amu_max, amu_res, noise_floor) + separate:
+                merged.append(window)
+                amu_max = max(amu_max, window[1])
+                continue
+            scans.append((amu_min, amu_max, amu_res, tuple(merged)))
+            merged = [window]
+            amu_min, amu_max = window[:2]
+        scans.append((amu_min, amu_max, amu_res, tuple(merged)))
+    scans.sort(key=lambda s: (s[0], s[1], s[2] is None, s[2] or 0))
+    if current is not None:
+        for i, scan in enumerate(scans):
+            if scan[:2] == tuple(current[:2]) and scan[2] in (None, current[2]):
+                scans.insert(0, scans.pop(i))
+                break
+    return [ScheduledScan(*scan, duration=_scan_time(scan[0], scan[1], scan[2], noise_floor)) for scan in scans]
+
+
+def read_windows(client, windows, masses=(), as_array=False, reconfigure_time=RECONFIGURE_TIME):
+    """
+    Read all mass `windows` (see :func:`schedule_windows`) and single `masses` with `client` at its current noise
+    floor, changing the scanned mass window as few times as possible. The whole schedule runs as a single transaction,
+    so other threads sharing the client cannot change the mass window or the noise floor in between.
+    Return dict of :class:`~pyrga.driver.Spectrum` keyed by window as a tuple (e.g. (12, 20, 10) or (12, 20)), each
+    carrying the time and sensitivities of the scan it was cut from, and of partial pressures keyed by mass.
+    """
+    keys = {_normalize_window(window): tuple(window) for window in windows}
+    results = {}
+    with client._transaction(_MEASUREMENT):  # pylint: disable=W0212
+        current = (client._amu_min, client._amu_max, client._amu_res)  # pylint: disable=W0212
+        for scan in schedule_windows(keys, client._noise_floor, current, reconfigure_time):  # pylint: disable=W0212
+            if scan.amu_res is None:
+                spectrum = client.read_histogram(scan.amu_min, scan.amu_max, as_array)
+            else:
+                spectrum = client.read_spectrum(scan.amu_min, scan.amu_max, scan.amu_res, as_array)
+            steps = scan.amu_res or 1
+            for window in scan.windows:
+                start = (window[0] - scan.amu_min) * steps
+                stop = (window[1] - scan.amu_min) * steps + 1
+                results[keys[window]] = Spectrum(
+                    spectrum.amu[start:stop],
+                    spectrum.pressures[start:stop],
+                    spectrum.total,
+                    spectrum.timestamp,
+                    spectrum.partial_sens_mA_per_Torr,
+                    spectrum.total_sens_mA_per_Torr,
+                )
+        for mass in masses:
+            results[mass] = client.read_mass(mass)
+    return results
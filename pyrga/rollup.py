@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Incremental multi-resolution rollups (min/max/mean/last) of single mass readings for fast trend queries."""
+
+import array
+import collections
+import os
+import time
+
+from pyrga.driver import RGAException, np
+from pyrga.storage import _ColumnStore
+
+# bucket start, number of readings, min, max, sum and last value, time of the last reading
+_COLUMNS = {"timestamp": 1, "readings": 1, "min": 1, "max": 1, "sum": 1, "last": 1, "updated": 1}
+_QUERIED = ["timestamp", "readings", "min", "max", "sum", "last"]
+
+Rollup = collections.namedtuple(
+    "Rollup", ["resolution", "timestamps", "counts", "minimums", "maximums", "means", "lasts"]
+)
+Rollup.__doc__ = """
+Result of :meth:`MassRollup.query`: aggregates of consecutive buckets of `resolution` seconds, `timestamps` are the
+starts of the buckets.
+"""
+
+
+class MassRollup:
+    """MassRollup aggregates single mass readings into buckets of several time resolutions as they arrive
+
+    Every tier (e.g. 1 s, 1 min and 1 h buckets) of every mass is an append-only memory-mapped log (see
+    :mod:`pyrga.storage`) of the number of readings, minimum, maximum, sum and last value of each bucket. Adding a
+    reading updates the last record of each tier in place, or appends a new bucket once the reading falls past it, so
+    the cost per reading is constant and open buckets are never held only in memory. Queries are answered from the
+    finest tier that covers the requested time range in at most `max_points` buckets, so months of data are read back
+    as a few hundred aggregated records. An existing rollup is reopened and extended.
+
+    :param directory: directory holding the tiers of all masses, created if needed
+    :type directory: str
+    :param resolutions: bucket lengths of the tiers in seconds, defaults to (1, 60, 3600)
+    :type resolutions: tuple
+
+    :raises RGAException:
+        - if timestamps of the readings of a mass decrease
+        - if `directory` holds tiers of different resolutions
+    """
+
+    def __init__(self, directory, resolutions=(1.0, 60.0, 3600.0)):
+        if not resolutions or any(r <= 0 for r in resolutions):
+            raise RGAException("Resolutions must be positive numbers of seconds, specified: %s" % (resolutions,))
+        self.directory = directory
+        self.resolutions = sorted(float(r) for r in resolutions)
+        os.makedirs(directory, exist_ok=True)
+        self._tiers = {}  # amu: [store of each resolution]
+        self._open = {}  # amu: [last bucket [start, count, min, max, sum, last, updated] or None of each resolution]
+        self._last = {}  # amu: timestamp of the last reading
+        for entry in os.listdir(directory):
+            if entry.isdigit():
+                self._load(int(entry))
+
+    @property
+    def masses(self):
+        return sorted(self._tiers)
+
+    def _load(self, amu):
+        tiers = []
+        buckets = []
+        for resolution in self.resolutions:
+            store = _ColumnStore(
+                os.path.join(self.directory, str(amu), "%g" % resolution),
+                "rollup",
+                _COLUMNS,
+                {"amu": amu, "resolution": resolution},
+            )
+            record = store._last_record()  # the last bucket may still receive readings
+            tiers.append(store)
+            buckets.append(None if record is None else [record[name][0] for name in _COLUMNS])
+        self._tiers[amu] = tiers
+        self._open[amu] = buckets
+        self._last[amu] = max([b[6] for b in buckets if b is not None], default=None)
+
+    def append(self, amu, pressure, timestamp=None):
+        """Add partial pressure of `amu`, `timestamp` is in units of s since epoch and defaults to now."""
+        if timestamp is None:
+            timestamp = time.time()
+        if amu not in self._tiers:
+            self._load(amu)
+        last = self._last[amu]
+        if last is not None and timestamp < last:
+            raise RGAException("Timestamps must be non-decreasing, last: %s, specified: %s" % (last, timestamp))
+        self._last[amu] = timestamp
+        buckets = self._open[amu]
+        for i, resolution in enumerate(self.resolutions):
+            start = timestamp - timestamp % resolution
+            bucket = buckets[i]
+            store = self._tiers[amu][i]
+            if bucket is not None and bucket[0] == start:
+                bucket[1] += 1
+                bucket[2] = min(bucket[2], pressure)
+                bucket[3] = max(bucket[3], pressure)
+                bucket[4] += pressure
+                bucket[5] = pressure
+                bucket[6] = timestamp
+                store._update_last(self._bucket_values(bucket))
+            else:
+                buckets[i] = bucket = [start, 1, pressure, pressure, pressure, pressure, timestamp]
+                store._append(start, self._bucket_values(bucket))
+
+    @staticmethod
+    def _bucket_values(bucket):
+        return {name: [value] for name, value in zip(list(_COLUMNS)[1:], bucket[1:])}
+
+    def _time_range(self, amu):
+        return min((store.time_range()[0] for store in self._tiers[amu] if len(store)), default=None), self._last[amu]
+
+    def _select_tier(self, amu, t_start, t_end, max_points):
+        if t_start is None or t_end is None:
+            first, last = self._time_range(amu)
+            t_start = first if t_start is None else t_start
+            t_end = last if t_end is None else t_end
+            if t_start is None or t_end is None:  # no readings
+                return 0
+        span = max(t_end - t_start, 0.0)
+        for i, resolution in enumerate(self.resolutions):
+            if span / resolution <= max_points:
+                return i
+        return len(self.resolutions) - 1
+
+    def query(self, amu, t_start=None, t_end=None, max_points=1000, resolution=None, as_array=False):
+        """
+        Aggregates of `amu` readings with t_start <= timestamp < t_end (all by default), from the tier of `resolution`
+        or the finest tier covering the range in at most `max_points` buckets. The bucket containing t_start is
+        included whole. Return :class:`Rollup` of array('d') or numpy arrays if `as_array` is True.
+        """
+        if as_array and np is None:
+            raise RGAException("numpy is required for array outputs, install it with 'pip install pyrga[numpy]'")
+        if amu not in self._tiers:
+            raise RGAException("No readings of mass %s" % amu)
+        if resolution is None:
+            tier = self._select_tier(amu, t_start, t_end, max_points)
+        elif float(resolution) in self.resolutions:
+            tier = self.resolutions.index(float(resolution))
+        else:
+            raise RGAException("Resolution must be one of %s, specified: %s" % (self.resolutions, resolution))
+        resolution = self.resolutions[tier]
+        store = self._tiers[amu][tier]
+        bucket_start = None if t_start is None else t_start - t_start % resolution
+        start, stop = store._index_range(bucket_start, t_end)
+        columns = [store._read(name, start, stop, False) for name in _QUERIED]
+        timestamps, counts, minimums, maximums, sums, lasts = columns
+        means = array.array("d", (s / c for s, c in zip(sums, counts)))
+        if as_array:
+            timestamps, counts, minimums, maximums, means, lasts = (
+                np.array(c) for c in (timestamps, counts, minimums, maximums, means, lasts)
+            )
+        return Rollup(resolution, timestamps, counts, minimums, maximums, means, lasts)
+
+    def flush(self):
+        """Flush buckets of all tiers to disk."""
+        for tiers in self._tiers.values():
+            for store in tiers:
+                store.flush()
+
+    def close(self):
+        for tiers in self._tiers.values():
+            for store in tiers:
+                store.close()
+        self._tiers.clear()
+        self._open.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""Local server sharing a single RGA between many processes over a Unix or TCP socket."""
+
+import functools
+import itertools
+import json
+import logging
+import os
+import queue
+import socket
+import socketserver
+import stat
+import threading
+import time
+
+from pyrga.driver import RGAClient, RGAException, Spectrum
+
+_SAFETY = 0
+_CONFIG = 1
+_READ = 2
+
+SAFETY_METHODS = ["turn_off_filament"]
+CONFIG_METHODS = ["turn_on_filament", "calibrate_all"] + sorted(m for m in dir(RGAClient) if m.startswith("set_"))
+READ_METHODS = ["read_mass", "read_spectrum", "read_histogram", "get_state"] + sorted(
+    m for m in dir(RGAClient) if m.startswith("get_") and m != "get_state"
+)
+
+
+def _to_json(value):
+    """Encode results that are not JSON types: spectra as objects of all their attributes, arrays as lists."""
+    if isinstance(value, Spectrum):
+        return {name: getattr(value, name) for name in Spectrum.__slots__}
+    if hasattr(value, "tolist"):  # array.array or numpy array
+        return value.tolist()
+    raise TypeError("Object of type %s is not JSON serializable" % type(value).__name__)
+
+
+def _from_json(value):
+    """Decode spectra encoded by :func:`_to_json`, with their mass axis as a tuple."""
+    if isinstance(value, dict) and set(value) == set(Spectrum.__slots__):
+        value["amu"] = tuple(value["amu"])
+        return Spectrum(**value)
+    return value
+
+
+class _Request:
+    def __init__(self, key, priority):
+        self.key = key
+        self.priority = priority
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Serves newline-delimited JSON requests {"id", "method", "args", "max_age"} of a single connection in order."""
+
+    def handle(self):
+        for line in self.rfile:
+            request_id = None
+            try:
+                request = json.loads(line.decode())
+                request_id = request.get("id")
+                result = self.server.rga_server.submit(
+                    request["method"], *request.get("args", []), max_age=request.get("max_age")
+                )
+                response = {"id": request_id, "result": result}
+            except Exception as exc:  # pylint: disable=W0703
+                response = {"id": request_id, "error": str(exc)}
+            self.wfile.write((json.dumps(response, default=_to_json) + "\n").encode())
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class RGAServer:
+    """RGAServer owns an RGA client and serves its reads and settings to many local processes
+
+    Requests are executed one at a time by a dispatcher thread, settings first, then reads. Safety commands (filament
+    off) are executed right away by the thread of the request, aborting a read in progress (see
+    :class:`~pyrga.driver.RGAClient`). Identical reads requested concurrently are executed once and the result is
+    shared, and reads are answered from the results of the last identical read if it is not older than the allowed
+    staleness. Changing any setting clears the cached results, results of reads overlapping with a setting or safety
+    command are not cached. Requests still waiting when the server is stopped fail with
+    :class:`~pyrga.driver.RGAException`.
+
+    :param client: connected client to serve
+    :type client: RGAClient
+    :param address: path of a Unix socket or (host, port) of a TCP socket to listen on
+    :type address: str or tuple
+    :param max_age: default staleness in seconds of cached read results, zero to only share concurrent reads,
+    defaults to 0
+    :type max_age: float
+    """
+
+    def __init__(self, client, address, max_age=0.0):
+        self.logger = logging.getLogger(__name__)
+        self.client = client
+        self.address = address
+        self.max_age = max_age
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = {}  # (method, args): request being executed or waiting in the queue
+        self._cache = {}  # (method, args): (time.monotonic() of completion, result)
+        self._generation = 0  # incremented by settings and safety commands, reads of older generations are not cached
+        self._stopping = False
+        self._server = None
+        self._threads = []
+
+    def start(self):
+        """Start serving in background threads."""
+        if isinstance(self.address, str):
+            if os.path.exists(self.address) and stat.S_ISSOCK(os.stat(self.address).st_mode):
+                os.unlink(self.address)  # left behind by a server that was not stopped
+            self._server = _UnixServer(self.address, _Handler)
+        else:
+            self._server = _TCPServer(tuple(self.address), _Handler)
+            self.address = self._server.server_address  # port 0 binds to any free port
+        self._server.rga_server = self
+        self._stopping = False
+        self._threads = [
+            threading.Thread(target=self._dispatch, name="pyrga-server-dispatch", daemon=True),
+            threading.Thread(target=self._server.serve_forever, name="pyrga-server", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.logger.info("Serving RGA on %s", self.address)
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            self._stopping = True  # no more requests are queued
+        self._queue.put((-1, next(self._counter), None))
+        for thread in self._threads:
+            thread.join()
+        self._fail_queued()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+        self._server = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def submit(self, method, *args, max_age=None):
+        """
+        Execute `method(*args)` of the client in turn with all other requests and return its result. Reads are served
+        from cached results not older than `max_age` seconds (defaults to the server setting).
+        """
+        priority = self._priority(method)
+        key = (method, tuple(args))
+        with self._lock:
+            if self._stopping and priority != _SAFETY:
+                raise RGAException("RGA server is stopped")
+            if priority == _READ:
+                cached = self._cache.get(key)
+                max_age = self.max_age if max_age is None else max_age
+                if cached is not None and time.monotonic() - cached[0] <= max_age:
+                    return cached[1]
+                request = self._pending.get(key)
+                if request is None:
+                    request = self._pending[key] = self._enqueue(key, priority)
+            elif priority == _CONFIG:
+                request = self._enqueue(key, priority)
+            else:
+                request = _Request(key, priority)
+        if priority == _SAFETY:
+            self._execute(request)
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    @staticmethod
+    def _priority(method):
+        if method in SAFETY_METHODS:
+            return _SAFETY
+        if method in CONFIG_METHODS:
+            return _CONFIG
+        if method in READ_METHODS:
+            return _READ
+        raise RGAException(
+            "Method must be one of %s, specified: %s" % (SAFETY_METHODS + CONFIG_METHODS + READ_METHODS, method)
+        )
+
+    def _enqueue(self, key, priority):
+        request = _Request(key, priority)
+        self._queue.put((priority, next(self._counter), request))
+        return request
+
+    def _dispatch(self):
+        while True:
+            _, _, request = self._queue.get()
+            if request is None:
+                return
+            self._execute(request)
+
+    def _fail_queued(self):
+        # the dispatcher has exited, requests left behind the stop sentinel would never be completed
+        while True:
+            try:
+                _, _, request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                request.error = RGAException("RGA server stopped before the request was executed")
+                request.done.set()
+        with self._lock:
+            self._pending.clear()
+
+    def _execute(self, request):
+        method, args = request.key
+        with self._lock:
+            if request.priority != _READ:
+                self._generation += 1  # reads in progress may already see the new setting
+                self._cache.clear()
+            generation = self._generation
+        try:
+            request.result = getattr(self.client, method)(*args)
+        except Exception as exc:  # pylint: disable=W0703
+            request.error = exc if isinstance(exc, RGAException) else RGAException(str(exc))
+        with self._lock:
+            if request.priority == _READ:
+                if self._pending.get(request.key) is request:
+                    del self._pending[request.key]
+                if request.error is None and generation == self._generation:
+                    self._cache[request.key] = (time.monotonic(), request.result)
+            else:
+                self._generation += 1
+                self._cache.clear()
+        request.done.set()
+
+
+class RemoteRGA:
+    """RemoteRGA forwards calls to an :class:`RGAServer`
+
+    Reads, getters and setters of :class:`~pyrga.driver.RGAClient` can be called directly, e.g. `rga.read_mass(28)`,
+    errors are raised as :class:`~pyrga.driver.RGAException`. Results are returned as decoded from JSON, i.e. tuples
+    become lists, except spectra, which are returned as :class:`~pyrga.driver.Spectrum` with their timestamp and
+    sensitivities (and pressures as lists). A single object can be shared between threads.
+
+    :param address: path of a Unix socket or (host, port) of a TCP socket the server listens on
+    :type address: str or tuple
+    :param timeout: socket timeout in seconds, defaults to None (no timeout)
+    :type timeout: float
+    """
+
+    def __init__(self, address, timeout=None):
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = tuple(address)
+        self._socket.settimeout(timeout)
+        try:
+            self._socket.connect(address)
+        except OSError:
+            self._socket.close()
+            raise RGAException("Failed to connect to RGA server at %s" % (address,))
+        self._file = self._socket.makefile("rwb")
+        self._lock = threading.Lock()
+        self._counter = itertools.count()
+
+    def call(self, method, *args, max_age=None):
+        """Call `method(*args)` on the server, accepting cached read results not older than `max_age` seconds."""
+        with self._lock:
+            request_id = next(self._counter)
+            request = {"id": request_id, "method": method, "args": list(args)}
+            if max_age is not None:
+                request["max_age"] = max_age
+            try:
+                self._file.write((json.dumps(request) + "\n").encode())
+                self._file.flush()
+                line = self._file.readline()
+            except OSError:
+                raise RGAException("Connection to RGA server failed")
+        if not line:
+            raise RGAException("Connection to RGA server closed")
+        response = json.loads(line.decode())
+        if "error" in response:
+            raise RGAException(response["error"])
+        return _from_json(response["result"])
+
+    def __getattr__(self, name):
+        if name in SAFETY_METHODS + CONFIG_METHODS + READ_METHODS:
+            return functools.partial(self.call, name)
+        raise AttributeError(name)
+
+    def close(self):
+        self._file.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
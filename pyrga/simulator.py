@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""Simulated SRS RGA for offline testing and benchmarking of RGA clients."""
+
+import collections
+import logging
+import math
+import os
+import random
+import select
+import struct
+import threading
+import time
+
+_DEFAULT_PRESSURES = {  # Torr, typical unbaked vacuum system
+    1: 2e-10,
+    2: 2e-8,
+    14: 2e-9,
+    16: 3e-9,
+    17: 1e-8,
+    18: 5e-8,
+    28: 2e-8,
+    32: 4e-9,
+    40: 5e-10,
+    44: 2e-9,
+}
+
+
+class RGASimulator:
+    """RGASimulator models an SRS RGA100/200/300 head speaking the RS232 protocol used by :class:`~.RGAClient`
+
+    The simulator consumes raw command bytes and produces responses scheduled in time, taking into account response
+    latency, measurement time at the current noise floor and transfer time at 28800 baud. The simulator itself does
+    not perform any I/O, use :class:`~.SimulatedSerial` (pyserial-like object), :meth:`respond`
+    (for :class:`~pyrga.transport.MemoryTransport`) or :class:`~.PtySimulator` (pseudo terminal) to connect a client.
+
+    :param model: one of 'SRSRGA100', 'SRSRGA200', 'SRSRGA300', defaults to 'SRSRGA200'
+    :type model: str
+    :param cdem: whether the electron multiplier option is installed, defaults to False
+    :type cdem: bool
+    :param pressures: partial pressures of the simulated gas in units of Torr keyed by integer mass, defaults to a
+    typical residual gas of an unbaked vacuum system
+    :type pressures: dict
+    :param latency: delay between receiving a command and starting to respond in units of s, defaults to 0.005
+    :type latency: float
+    :param time_scale: multiplier applied to all simulated delays, 0 makes responses available immediately,
+    defaults to 1.0 (real time)
+    :type time_scale: float
+    :param noise: whether to add noise depending on the noise floor setting to ion currents, defaults to True
+    :type noise: bool
+    :param seed: seed of the noise generator, defaults to None
+    :type seed: int
+    """
+
+    BAUDRATE = 28800
+    # approximate measurement time of a single point (single mass or a step of a scan) vs. noise floor setting, s
+    POINT_TIMES = [0.4, 0.2, 0.1, 0.05, 0.025, 0.012, 0.006, 0.003]
+    # approximate RMS noise of ion current measurements vs. noise floor setting, A
+    NOISE_CURRENTS = [5e-16, 1e-15, 2e-15, 5e-15, 1e-14, 2e-14, 5e-14, 1e-13]
+    PEAK_WIDTH = 0.2  # amu, standard deviation of simulated peaks
+    _CURRENT_MULTIPLIER = 1e-16
+    _DEFAULTS = {"EE": 70, "IE": 1, "VF": 90, "HV": 1400, "NF": 4, "FL": 1.0, "MI": 1, "MF": 100, "SA": 10}
+    _STATUS_REPORTING_COMMANDS = ["EE", "FL", "IE", "VF", "CA", "HV"]
+
+    def __init__(
+        self, model="SRSRGA200", cdem=False, pressures=None, latency=0.005, time_scale=1.0, noise=True, seed=None,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.model = model
+        self.amu_max = int(model.replace("SRSRGA", ""))
+        self.cdem = cdem
+        self.pressures = dict(_DEFAULT_PRESSURES if pressures is None else pressures)
+        self.latency = latency
+        self.time_scale = time_scale
+        self.noise = noise
+        self.partial_sens = 0.1  # mA/Torr
+        self.total_sens = 1.0  # mA/Torr
+        self.commands = []  # history of received commands
+        self._random = random.Random(seed)
+        self._input = b""
+        self._params = dict(self._DEFAULTS)
+        self._params.update({"FL": 0.0, "HV": 0})
+
+    def device_id(self):
+        return "%sVER0.24SN19071" % self.model
+
+    def point_time(self):
+        return self.POINT_TIMES[self._params["NF"]]
+
+    def transfer_time(self, length_bytes):
+        return length_bytes * 10.0 / self.BAUDRATE  # 8 data bits, start and stop bits
+
+    def ion_current(self, amu):
+        """Ion current in units of A at (possibly fractional) amu for current settings, with noise if enabled."""
+        current = 0.0
+        if self._params["FL"] > 0:
+            emission_factor = self._params["FL"] / self._DEFAULTS["FL"]
+            for mass, pressure in self.pressures.items():
+                distance = (amu - mass) / self.PEAK_WIDTH
+                if abs(distance) < 6:
+                    current += pressure * self.partial_sens / 1000.0 * emission_factor * math.exp(-0.5 * distance ** 2)
+        if self.noise:
+            current += self._random.gauss(0.0, self.NOISE_CURRENTS[self._params["NF"]])
+        return current
+
+    def total_current(self):
+        if self._params["FL"] <= 0:
+            return 0.0
+        return sum(self.pressures.values()) * self.total_sens / 1000.0 * self._params["FL"] / self._DEFAULTS["FL"]
+
+    def receive(self, data):
+        """
+        Consume raw bytes written by a client, return list of (delay, payload, is_scan) responses to complete commands.
+        Delays are in units of s relative to the moment the bytes are received, scaled by time_scale.
+        """
+        self._input += data
+        responses = []
+        while b"\r" in self._input:
+            command, self._input = self._input.split(b"\r", 1)
+            responses.extend(self.process(command.decode("ascii", "replace").strip()))
+        return responses
+
+    def respond(self, data):
+        """Consume raw bytes and return the complete response at once, ignoring timing (for MemoryTransport)."""
+        return b"".join(payload for _, payload, _ in self.receive(data))
+
+    def process(self, command):
+        self.commands.append(command)
+        self.logger.debug("Simulated RGA received command '%s'", command)
+        cmd, value = command[:2].upper(), command[2:]
+        handler = getattr(self, "_handle_%s" % cmd, None)
+        if handler is None:
+            self.logger.warning("Simulated RGA received unknown command '%s'", command)
+            return []
+        chunks = handler(value)  # list of (measurement time, payload, is_scan)
+        responses = []
+        elapsed = self.latency
+        for measurement_time, payload, is_scan in chunks:
+            elapsed += measurement_time + self.transfer_time(len(payload))
+            responses.append((elapsed * self.time_scale, payload, is_scan))
+        return responses
+
+    def _line(self, value):
+        return [(0.0, ("%s\n\r" % value).encode("ascii"), False)]
+
+    def _status(self):
+        return [(0.0, b"0\n\r", False)]
+
+    def _set_or_query(self, cmd, value, convert=int):
+        if value == "?":
+            return self._line(self._params[cmd])
+        if value in ("", "*"):
+            self._params[cmd] = self._DEFAULTS[cmd]
+        else:
+            self._params[cmd] = abs(convert(value))
+        if cmd in self._STATUS_REPORTING_COMMANDS:
+            return self._status()
+        return []
+
+    def _handle_ID(self, value):
+        return self._line(self.device_id())
+
+    def _handle_EM(self, value):
+        return [(0.0, b"0\n\r" if self.cdem else b"1\n\r", False)]
+
+    def _handle_EE(self, value):
+        return self._set_or_query("EE", value)
+
+    def _handle_IE(self, value):
+        return self._set_or_query("IE", value)
+
+    def _handle_VF(self, value):
+        return self._set_or_query("VF", value)
+
+    def _handle_NF(self, value):
+        if value not in ("?", "", "*") and int(value) not in range(len(self.POINT_TIMES)):
+            return []  # out of range, ignored
+        return self._set_or_query("NF", value)
+
+    def _handle_MI(self, value):
+        return self._set_or_query("MI", value)
+
+    def _handle_MF(self, value):
+        return self._set_or_query("MF", value)
+
+    def _handle_SA(self, value):
+        return self._set_or_query("SA", value)
+
+    def _handle_HV(self, value):
+        if not self.cdem:
+            return self._status() if value != "?" else self._line(0)
+        return self._set_or_query("HV", value)
+
+    def _handle_FL(self, value):
+        if value == "?":
+            return self._line("%.2f" % self._params["FL"])
+        return self._set_or_query("FL", value, float)
+
+    def _handle_SP(self, value):
+        if value == "?":
+            return self._line(self.partial_sens)
+        self.partial_sens = float(value)
+        return []
+
+    def _handle_ST(self, value):
+        if value == "?":
+            return self._line(self.total_sens)
+        self.total_sens = float(value)
+        return []
+
+    def _handle_CA(self, value):
+        return [(self.point_time() * 10, b"0\n\r", False)]
+
+    def _encode_current(self, current):
+        return struct.pack("<i", int(round(current / self._CURRENT_MULTIPLIER)))
+
+    def _handle_MR(self, value):
+        amu = int(value or 0)
+        if amu == 0:  # turns off RF, no response
+            return []
+        return [(self.point_time(), self._encode_current(self.ion_current(amu)), False)]
+
+    def _scans(self, value, points):
+        chunks = []
+        for _ in range(int(value or 1)):
+            for amu in points:
+                chunks.append((self.point_time(), self._encode_current(self.ion_current(amu)), True))
+            chunks.append((0.0, self._encode_current(self.total_current()), True))
+        return chunks
+
+    def _handle_SC(self, value):
+        amu_min, amu_max, amu_res = self._params["MI"], self._params["MF"], self._params["SA"]
+        steps = (amu_max - amu_min) * amu_res
+        return self._scans(value, [amu_min + float(i) / amu_res for i in range(steps + 1)])
+
+    def _handle_HS(self, value):
+        return self._scans(value, list(range(self._params["MI"], self._params["MF"] + 1)))
+
+
+class SimulatedSerial:
+    """SimulatedSerial is a pyserial-like object connected to a :class:`~.RGASimulator`
+
+    Can be passed to :class:`~.RGAClient` or :class:`~pyrga.transport.SerialTransport` in place of a serial port.
+    Responses become readable at the simulated time, and any command received while a scan is in progress stops it,
+    same as with a real RGA.
+
+    :param simulator: simulated RGA, defaults to a new :class:`~.RGASimulator` constructed with `simulator_kwargs`
+    :type simulator: RGASimulator
+    :param timeout: read timeout in units of s, None blocks until requested bytes are received, defaults to None
+    :type timeout: float
+    """
+
+    def __init__(self, simulator=None, timeout=None, **simulator_kwargs):
+        self.simulator = simulator if simulator is not None else RGASimulator(**simulator_kwargs)
+        self.timeout = timeout
+        self.is_open = True
+        self._pending = collections.deque()  # [ready time, payload, is_scan]
+        self._received = bytearray()
+        self._lock = threading.Lock()
+
+    def _deliver(self, now):
+        while self._pending and self._pending[0][0] <= now:
+            self._received += self._pending.popleft()[1]
+
+    def _next_ready(self):
+        return self._pending[0][0] if self._pending else None
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            self._deliver(time.monotonic())
+            return len(self._received)
+
+    def write(self, data):
+        data = bytes(data)
+        with self._lock:
+            now = time.monotonic()
+            self._deliver(now)
+            if b"\r" in data and any(is_scan for _, _, is_scan in self._pending):
+                self._pending = collections.deque(p for p in self._pending if not p[2])  # stop scan in progress
+            start = max(now, self._pending[-1][0]) if self._pending else now  # RGA processes commands in order
+            for delay, payload, is_scan in self.simulator.receive(data):
+                self._pending.append((start + delay, payload, is_scan))
+        return len(data)
+
+    def _wait_for(self, ready):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._deliver(now)
+                if ready() or (deadline is not None and now >= deadline):
+                    return
+                next_ready = self._next_ready()
+            if next_ready is None and deadline is None:
+                return  # nothing will ever arrive
+            wake = min(t for t in (next_ready, deadline) if t is not None)
+            time.sleep(max(wake - now, 0.0))
+
+    def read(self, size=1):
+        self._wait_for(lambda: len(self._received) >= size)
+        with self._lock:
+            data = bytes(self._received[:size])
+            del self._received[:size]
+        return data
+
+    def readinto(self, buffer):
+        size = len(buffer)
+        self._wait_for(lambda: len(self._received) >= size)
+        with self._lock:
+            size = min(size, len(self._received))
+            buffer[:size] = self._received[:size]
+            del self._received[:size]
+        return size
+
+    def readline(self):
+        self._wait_for(lambda: b"\n" in self._received)
+        with self._lock:
+            end = self._received.find(b"\n")
+            end = len(self._received) if end < 0 else end + 1
+            data = bytes(self._received[:end])
+            del self._received[:end]
+        return data
+
+    def reset_input_buffer(self):
+        with self._lock:
+            self._deliver(time.monotonic())
+            self._received.clear()
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+class PtySimulator:
+    """PtySimulator exposes a :class:`~.RGASimulator` on a pseudo terminal (POSIX only)
+
+    The path of the terminal (:attr:`port`) can be passed to :class:`~.RGAClient` as a regular serial port, so the
+    complete stack including pyserial is exercised.
+
+    :param simulator: simulated RGA, defaults to a new :class:`~.RGASimulator` constructed with `simulator_kwargs`
+    :type simulator: RGASimulator
+    """
+
+    _POLL_INTERVAL = 0.05  # s
+
+    def __init__(self, simulator=None, **simulator_kwargs):
+        import tty  # pylint: disable=C0415
+
+        self._serial = SimulatedSerial(simulator, timeout=0, **simulator_kwargs)
+        self.simulator = self._serial.simulator
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="pyrga-pty-simulator", daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while not self._stop_event.is_set():
+            next_ready = self._serial._next_ready()  # pylint: disable=W0212
+            wait = self._POLL_INTERVAL
+            if next_ready is not None:
+                wait = min(max(next_ready - time.monotonic(), 0.0), wait)
+            readable, _, _ = select.select([self._master], [], [], wait)
+            if readable:
+                try:
+                    self._serial.write(os.read(self._master, 4096))
+                except OSError:
+                    return
+            waiting = self._serial.in_waiting
+            if waiting:
+                os.write(self._master, self._serial.read(waiting))
+
+    def close(self):
+        self._stop_event.set()
+        self._thread.join()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
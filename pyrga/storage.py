@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""Append-only, memory-mapped columnar storage of long pressure vs. time logs."""
+
+import array
+import bisect
+import json
+import mmap
+import os
+import sys
+import time
+
+from pyrga.driver import RGAException, amu_axis, np
+
+
+class _Column:
+    """Fixed-width column of float64 values in a memory-mapped file, grown in chunks."""
+
+    _TYPECODE = "d"
+    _ITEMSIZE = 8
+    _GROW_BYTES = 16 * 1024 * 1024
+
+    def __init__(self, path, width):
+        self.path = path
+        self.width = width
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size == 0:
+            size = self._grow_size(0)
+            os.ftruncate(self._fd, size)
+        self._mmap = None
+        self._view = None
+        self._map(size)
+
+    def _grow_size(self, size):
+        record_bytes = self.width * self._ITEMSIZE
+        return size + max(self._GROW_BYTES // record_bytes, 1) * record_bytes
+
+    def _map(self, size):
+        self._mmap = mmap.mmap(self._fd, size)
+        self._view = memoryview(self._mmap).cast(self._TYPECODE)
+
+    def _unmap(self):
+        self._view.release()
+        self._mmap.close()
+
+    @property
+    def capacity(self):
+        return len(self._view) // self.width
+
+    def reserve(self, records):
+        if records <= self.capacity:
+            return
+        size = len(self._mmap)
+        while size // (self.width * self._ITEMSIZE) < records:
+            size = self._grow_size(size)
+        self._unmap()
+        os.ftruncate(self._fd, size)
+        self._map(size)
+
+    def write(self, index, values):
+        self._view[index * self.width : (index + 1) * self.width] = array.array(self._TYPECODE, values)
+
+    def read(self, start, stop):
+        """Copy of records [start, stop) as a flat array('d')."""
+        return array.array(self._TYPECODE, self._view[start * self.width : stop * self.width])
+
+    def values(self, count):
+        """Zero-copy view of the first `count` records, valid until the next append."""
+        return self._view[: count * self.width]
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        self._unmap()
+        os.close(self._fd)
+
+
+class _ColumnStore:
+    """Append-only set of memory-mapped columns sharing a record count, ordered by the timestamp column."""
+
+    _META_FILE = "meta.json"
+    _COUNT_FILE = "count"
+
+    def __init__(self, directory, kind, columns, attributes):
+        if self._META_FILE in columns or self._COUNT_FILE in columns:
+            raise RGAException("Column names %s are reserved" % [self._META_FILE, self._COUNT_FILE])
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, self._META_FILE)
+        meta = {"kind": kind, "byteorder": sys.byteorder, "columns": columns, "attributes": attributes}
+        existing = self._read_meta(directory)
+        if existing is None:
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+        elif existing != meta:
+            raise RGAException("Log in %s does not match requested layout: %s" % (directory, existing))
+        self.attributes = attributes
+        self._count_fd = os.open(os.path.join(directory, self._COUNT_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+        if os.fstat(self._count_fd).st_size == 0:
+            os.ftruncate(self._count_fd, 8)
+        self._count_mmap = mmap.mmap(self._count_fd, 8)
+        self._count = memoryview(self._count_mmap).cast("q")
+        self._columns = {name: _Column(os.path.join(directory, name), width) for name, width in columns.items()}
+        self._timestamps = self._columns["timestamp"]
+
+    @classmethod
+    def _read_meta(cls, directory):
+        try:
+            with open(os.path.join(directory, cls._META_FILE), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def __len__(self):
+        return self._count[0]
+
+    def _append(self, timestamp, values):
+        count = self._count[0]
+        if timestamp is None:
+            timestamp = time.time()
+        last_timestamp = self._timestamps.values(count)[count - 1] if count else None
+        if count and timestamp < last_timestamp:
+            raise RGAException(
+                "Timestamps must be non-decreasing, last: %s, specified: %s" % (last_timestamp, timestamp)
+            )
+        for column in self._columns.values():
+            column.reserve(count + 1)
+        self._timestamps.write(count, [timestamp])
+        for name, value in values.items():
+            self._columns[name].write(count, value)
+        self._count[0] = count + 1  # record becomes visible only once all columns are written
+
+    def _last_record(self):
+        """Return the last record as dict of column values (None if the log is empty)."""
+        count = self._count[0]
+        if not count:
+            return None
+        return {name: column.read(count - 1, count) for name, column in self._columns.items()}
+
+    def _update_last(self, values):
+        """Overwrite values of the last record in place, the timestamp is kept."""
+        index = self._count[0] - 1
+        for name, value in values.items():
+            self._columns[name].write(index, value)
+
+    def _index_range(self, t_start=None, t_end=None):
+        count = self._count[0]
+        timestamps = self._timestamps.values(count)
+        start = 0 if t_start is None else bisect.bisect_left(timestamps, t_start, 0, count)
+        stop = count if t_end is None else bisect.bisect_left(timestamps, t_end, start, count)
+        return start, stop
+
+    def _read(self, name, start, stop, as_array):
+        values = self._columns[name].read(start, stop)
+        if as_array:
+            values = np.array(values)
+            width = self._columns[name].width
+            return values if width == 1 else values.reshape(-1, width)
+        return values
+
+    def time_range(self):
+        """Timestamps of the first and the last records, None if the log is empty."""
+        count = self._count[0]
+        if not count:
+            return None
+        timestamps = self._timestamps.values(count)
+        return (timestamps[0], timestamps[count - 1])
+
+    def flush(self):
+        """Flush all columns to disk."""
+        for column in self._columns.values():
+            column.flush()
+        self._count_mmap.flush()
+
+    def close(self):
+        self.flush()
+        for column in self._columns.values():
+            column.close()
+        self._count.release()
+        self._count_mmap.close()
+        os.close(self._count_fd)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MassLog(_ColumnStore):
+    """MassLog stores timestamped single mass readings (e.g. from :meth:`~.RGAClient.read_mass`)
+
+    Records are appended to memory-mapped column files in `directory` in O(1), and time ranges are located by binary
+    search, so neither appending nor querying loads the whole history into memory. An existing log is reopened.
+
+    :param directory: directory holding the column files, created if needed
+    :type directory: str
+
+    :raises RGAException:
+        - if `directory` holds a log of a different kind
+        - if timestamps of appended readings decrease
+    """
+
+    def __init__(self, directory):
+        super().__init__(directory, "mass", {"timestamp": 1, "amu": 1, "pressure": 1}, {})
+
+    def append(self, amu, pressure, timestamp=None):
+        """Append partial pressure of `amu`, `timestamp` is in units of s since epoch and defaults to now."""
+        self._append(timestamp, {"amu": [amu], "pressure": [pressure]})
+
+    def query(self, t_start=None, t_end=None, amu=None, as_array=False):
+        """
+        Readings with t_start <= timestamp < t_end (whole log by default), optionally of a single mass only.
+        Return (timestamps, amus, pressures) as array('d') or numpy arrays if `as_array` is True.
+        """
+        if as_array and np is None:
+            raise RGAException("numpy is required for array outputs, install it with 'pip install pyrga[numpy]'")
+        start, stop = self._index_range(t_start, t_end)
+        timestamps = self._read("timestamp", start, stop, as_array)
+        amus = self._read("amu", start, stop, as_array)
+        pressures = self._read("pressure", start, stop, as_array)
+        if amu is None:
+            return (timestamps, amus, pressures)
+        if as_array:
+            mask = amus == amu
+            return (timestamps[mask], amus[mask], pressures[mask])
+        selected = [i for i, a in enumerate(amus) if a == amu]
+        return tuple(array.array("d", (column[i] for i in selected)) for column in (timestamps, amus, pressures))
+
+
+class SpectrumLog(_ColumnStore):
+    """SpectrumLog stores timestamped spectra or histograms together with their total pressures
+
+    All spectra of a log share the same mass axis, defined by `amu_min`, `amu_max` and `amu_res` (None for histogram
+    scans); these are only required when a new log is created. Partial pressures of each spectrum are stored as a
+    single fixed-width record of a memory-mapped column file.
+
+    :param directory: directory holding the column files, created if needed
+    :type directory: str
+    :param amu_min: lower bound of the mass axis
+    :type amu_min: int
+    :param amu_max: upper bound of the mass axis
+    :type amu_max: int
+    :param amu_res: steps per amu for analog scans, None for histograms
+    :type amu_res: int
+
+    :raises RGAException:
+        - if `directory` holds a log of a different kind or mass axis
+        - if the length of an appended spectrum doesn't match the mass axis
+        - if timestamps of appended spectra decrease
+    """
+
+    def __init__(self, directory, amu_min=None, amu_max=None, amu_res=None):
+        if amu_min is None and amu_max is None:
+            meta = self._read_meta(directory)
+            if meta is None:
+                raise RGAException("Mass axis must be specified to create a new log in %s" % directory)
+            amu_min, amu_max, amu_res = (meta["attributes"][key] for key in ["amu_min", "amu_max", "amu_res"])
+        self.amu = amu_axis(amu_min, amu_max, amu_res)
+        super().__init__(
+            directory,
+            "histogram" if amu_res is None else "spectrum",
+            {"timestamp": 1, "total": 1, "pressures": len(self.amu)},
+            {"amu_min": amu_min, "amu_max": amu_max, "amu_res": amu_res},
+        )
+
+    def append(self, spectrum, timestamp=None):
+        """
+        Append `spectrum` as returned by read_spectrum() or read_histogram(), or (amu, pressures, total).
+        `timestamp` defaults to the time the spectrum was received, or to now.
+        """
+        _, pressures, total = spectrum
+        if timestamp is None:
+            timestamp = getattr(spectrum, "timestamp", None)
+        if len(pressures) != len(self.amu):
+            raise RGAException(
+                "Spectrum of %s points does not match mass axis of the log (%s points)"
+                % (len(pressures), len(self.amu))
+            )
+        self._append(timestamp, {"total": [total], "pressures": pressures})
+
+    def query(self, t_start=None, t_end=None, as_array=False):
+        """
+        Spectra with t_start <= timestamp < t_end (whole log by default).
+        Return (timestamps, amu, pressures, totals); pressures are a list of array('d') per spectrum, or a 2D numpy
+        array with one spectrum per row if `as_array` is True.
+        """
+        if as_array and np is None:
+            raise RGAException("numpy is required for array outputs, install it with 'pip install pyrga[numpy]'")
+        start, stop = self._index_range(t_start, t_end)
+        timestamps = self._read("timestamp", start, stop, as_array)
+        totals = self._read("total", start, stop, as_array)
+        pressures = self._read("pressures", start, stop, as_array)
+        amu = self.amu
+        if as_array:
+            amu = np.array(amu, dtype=float)
+        else:
+            width = len(self.amu)
+            pressures = [pressures[i * width : (i + 1) * width] for i in range(stop - start)]
+        return (timestamps, amu, pressures, totals)
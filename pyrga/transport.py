@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""Asynchronous byte transports used by :class:`~pyrga.aio.AsyncRGAClient`."""
+
+import asyncio
+import functools
+import serial
+
+from pyrga.driver import RGAException
+
+
+class AsyncTransport:
+    """Interface of an asynchronous byte stream connected to SRS RGA
+
+    Implementations only move bytes: framing, validation and decoding is done by the client.
+    """
+
+    async def write(self, data):
+        raise NotImplementedError
+
+    async def read_exactly(self, length_bytes, timeout):
+        """Read exactly `length_bytes`, raise :class:`~.RGAException` if not received within `timeout` seconds."""
+        raise NotImplementedError
+
+    async def read_line(self, timeout):
+        """Read bytes up to and including the next b'\\n', raise :class:`~.RGAException` on timeout."""
+        raise NotImplementedError
+
+    async def drain(self, quiet_time):
+        """Discard incoming bytes until the stream stays silent for `quiet_time` seconds, return number of bytes."""
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class StreamTransport(AsyncTransport):
+    """Transport over a pair of asyncio streams, e.g. the ones returned by `serial_asyncio.open_serial_connection`
+
+    :param reader: stream to read RGA responses from
+    :type reader: asyncio.StreamReader
+    :param writer: stream to write commands to, any object with `write` and optional `drain` and `close` methods
+    :type writer: asyncio.StreamWriter
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def open_serial(cls, com_port, **kwargs):
+        """Open serial port natively in the event loop, requires `pyserial-asyncio` package to be installed."""
+        try:
+            import serial_asyncio  # pylint: disable=C0415
+        except ImportError:
+            raise RGAException("pyserial-asyncio is required for native asyncio serial streams")
+        serial_kwargs = dict(baudrate=28800, rtscts=1, bytesize=8, stopbits=1, parity="N")
+        serial_kwargs.update(kwargs)
+        try:
+            reader, writer = await serial_asyncio.open_serial_connection(url=com_port, **serial_kwargs)
+        except Exception:
+            raise RGAException("Failed to open serial interface %s" % com_port)
+        return cls(reader, writer)
+
+    async def write(self, data):
+        self._writer.write(data)
+        drain = getattr(self._writer, "drain", None)
+        if drain is not None:
+            await drain()
+
+    async def read_exactly(self, length_bytes, timeout):
+        try:
+            return await asyncio.wait_for(self._reader.readexactly(length_bytes), timeout)
+        except asyncio.TimeoutError:
+            raise RGAException("Failed to receive %s bytes within %s s" % (length_bytes, timeout))
+        except asyncio.IncompleteReadError:
+            raise RGAException("Stream closed before %s bytes were received" % length_bytes)
+
+    async def read_line(self, timeout):
+        try:
+            return await asyncio.wait_for(self._reader.readuntil(b"\n"), timeout)
+        except asyncio.TimeoutError:
+            raise RGAException("Failed to receive buffer line within %s s" % timeout)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            raise RGAException("Failed to receive buffer line")
+
+    async def drain(self, quiet_time):
+        drained = 0
+        while True:
+            try:
+                data = await asyncio.wait_for(self._reader.read(4096), quiet_time)
+            except asyncio.TimeoutError:
+                return drained
+            if not data:
+                return drained
+            drained += len(data)
+
+    async def close(self):
+        close = getattr(self._writer, "close", None)
+        if close is not None:
+            close()
+
+
+class MemoryTransport(StreamTransport):
+    """In-memory transport feeding every written command to a responder instead of a serial port
+
+    :param responder: callable receiving each written chunk of bytes and returning bytes to be read back (may be empty)
+    :type responder: callable
+    :param latency: delay in seconds before the response becomes available, defaults to 0
+    :type latency: float
+    """
+
+    def __init__(self, responder, latency=0.0):
+        self._stream_reader = None
+        super().__init__(None, None)
+        self._responder = responder
+        self._latency = latency
+
+    @property
+    def _reader(self):
+        if self._stream_reader is None:  # created on first use, within the running event loop
+            self._stream_reader = asyncio.StreamReader()
+        return self._stream_reader
+
+    @_reader.setter
+    def _reader(self, reader):
+        self._stream_reader = reader
+
+    async def write(self, data):
+        response = self._responder(data)
+        if not response:
+            return
+        if self._latency:
+            asyncio.get_running_loop().call_later(self._latency, self._reader.feed_data, response)
+        else:
+            self._reader.feed_data(response)
+
+    async def close(self):
+        self._reader.feed_eof()
+
+
+class SerialTransport(AsyncTransport):
+    """Transport over a blocking pyserial port, blocking calls are run in the default executor of the event loop
+
+    :param com_port: serial port name (e.g. '/dev/ttyUSB0' or 'COM4') or an already opened serial object
+    :type com_port: str or serial.Serial
+    """
+
+    def __init__(self, com_port):
+        if isinstance(com_port, str):
+            try:
+                self._com_obj = serial.Serial(
+                    com_port, timeout=0, baudrate=28800, rtscts=1, bytesize=8, stopbits=1, parity="N",
+                )
+            except Exception:
+                raise RGAException("Failed to open serial interface %s" % com_port)
+        else:
+            self._com_obj = com_port
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+    def _read_blocking(self, length_bytes, timeout):
+        self._com_obj.timeout = timeout
+        return self._com_obj.read(length_bytes)
+
+    def _read_line_blocking(self, timeout):
+        self._com_obj.timeout = timeout
+        return self._com_obj.readline()
+
+    async def write(self, data):
+        ret = await self._run(self._com_obj.write, data)
+        if ret != len(data):
+            raise RGAException("Wrong response from serial interface object")
+
+    async def read_exactly(self, length_bytes, timeout):
+        data = await self._run(self._read_blocking, length_bytes, timeout)
+        if len(data) != length_bytes:
+            raise RGAException(
+                "Failed to receive buffer: %s bytes received out of %s within %s s" % (len(data), length_bytes, timeout)
+            )
+        return data
+
+    async def read_line(self, timeout):
+        data = await self._run(self._read_line_blocking, timeout)
+        if not data.endswith(b"\n"):
+            raise RGAException("Failed to receive buffer line within %s s" % timeout)
+        return data
+
+    async def drain(self, quiet_time):
+        drained = 0
+        while True:
+            data = await self._run(self._read_blocking, 4096, quiet_time)
+            if not data:
+                return drained
+            drained += len(data)
+
+    async def close(self):
+        await self._run(self._com_obj.close)
@@ -26,6 +26,7 @@ setup(
     license="MIT License",
     packages=find_packages(),
     install_requires=requires,
+    extras_require={"numpy": ["numpy"], "asyncio": ["pyserial-asyncio"]},
     author="Ruslan Nagimov",
     author_email="nagimov@outlook.com",
     classifiers=[
@@ -35,7 +36,6 @@ setup(
         "Operating System :: OS Independent",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.4",
         "Programming Language :: Python :: 3.5",
         "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import logging
+
+import pytest
+
+from pyrga.driver import RGAClient
+from pyrga.simulator import RGASimulator, SimulatedSerial
+
+logging.getLogger("pyrga").setLevel(logging.WARNING)
+
+
+def make_client(time_scale=0, noise_floor=7, **kwargs):
+    """Client of a simulated RGA, `time_scale=0` makes responses available immediately."""
+    simulator = RGASimulator(time_scale=time_scale, seed=1)
+    return RGAClient(SimulatedSerial(simulator), noise_floor=noise_floor, **kwargs)
+
+
+@pytest.fixture
+def client():
+    client = make_client()
+    client.turn_on_filament()
+    return client
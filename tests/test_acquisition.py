@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pyrga.driver import RGAException, Spectrum
+from pyrga.planner import ScanPlan
+
+
+def test_acquisition_queues_timestamped_spectra(client):
+    client.start_acquisition(ScanPlan("analog", 7, 1, 10, 10, (), 0.0), maxsize=4)
+    try:
+        spectra = [client.acquired.get(timeout=5) for _ in range(3)]
+    finally:
+        client.stop_acquisition()
+    assert all(isinstance(spectrum, Spectrum) for spectrum in spectra)
+    assert all(len(spectrum.pressures) == 91 for spectrum in spectra)
+    assert spectra[0].timestamp <= spectra[1].timestamp <= spectra[2].timestamp
+
+
+def test_acquisition_owns_the_port_until_filament_off(client):
+    client.start_acquisition(ScanPlan("mass", 7, 28, 44, None, (28, 44), 0.0), maxsize=4)
+    spectrum = client.acquired.get(timeout=5)
+    assert tuple(spectrum.amu) == (28, 44) and spectrum.total is None
+    with pytest.raises(RGAException):
+        client.read_mass(18)
+    client.turn_off_filament()
+    assert not client.is_acquiring()
+    client.stop_acquisition()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from pyrga.aio import AsyncRGAClient
+from pyrga.driver import RGAException
+from pyrga.simulator import RGASimulator
+from pyrga.transport import MemoryTransport
+
+
+async def _connect(responder, latency=0.001):
+    client = await AsyncRGAClient.connect(MemoryTransport(responder, latency=latency), noise_floor=7)
+    await client.turn_on_filament()
+    return client
+
+
+def test_tasks_scanning_different_ranges():
+    async def scan(client, amu_min, amu_max):
+        for _ in range(10):
+            amu, pressures, _ = await client.read_spectrum(amu_min, amu_max, 10)
+            assert amu[0] == amu_min and len(pressures) == (amu_max - amu_min) * 10 + 1
+            _, pressures, _ = await client.read_histogram(amu_min + 1, amu_max + 1)
+            assert len(pressures) == amu_max - amu_min + 1
+
+    async def main():
+        client = await _connect(RGASimulator(time_scale=0, seed=1).respond)
+        await asyncio.gather(scan(client, 1, 10), scan(client, 20, 40), scan(client, 5, 8))
+
+    asyncio.run(main())
+
+
+def test_concurrent_setters_verify_their_own_value():
+    async def main():
+        client = await _connect(RGASimulator(time_scale=0, seed=1).respond)
+        await asyncio.gather(*[client.set_noise_floor(nf) for nf in (2, 5, 7, 3)] * 3)
+        await asyncio.gather(*[client.set_electron_energy(ee) for ee in (50, 70, 90)] * 3)
+
+    asyncio.run(main())
+
+
+def test_partial_response_is_drained():
+    simulator = RGASimulator(time_scale=0, seed=1)
+    cut = []
+
+    def responder(data):
+        response = simulator.respond(data)
+        if data.startswith(b"MR") and not cut:
+            cut.append(data)
+            return response[:2]
+        return response
+
+    async def main():
+        client = await _connect(responder)
+        client._READ_TIMEOUT = 0.2
+        with pytest.raises(RGAException):
+            await client.read_mass(28)
+        assert await client.get_noise_floor() == 7
+        assert await client.read_mass(28) > 0
+
+    asyncio.run(main())
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from pyrga.driver import RGAException, Spectrum
+
+from conftest import make_client
+
+
+def test_iter_spectra_validates_at_call_site(client):
+    with pytest.raises(RGAException):
+        client.iter_spectra(1, 10, 10, count=0)
+    client.turn_off_filament()
+    with pytest.raises(RGAException):
+        client.iter_spectra(1, 10, 10, count=2)
+
+
+def test_iter_spectra_yields_count_scans(client):
+    scans = list(client.iter_spectra(1, 10, 10, count=3))
+    assert len(scans) == 3
+    assert all(isinstance(scan, Spectrum) and len(scan.pressures) == 91 for scan in scans)
+
+
+def test_batch_replies_stay_aligned(client):
+    with client.batch() as batch:
+        nf = batch.query("NF", int)
+        batch.command("NF", 3)
+        nf_after = batch.query("NF", int)
+        ee = batch.query("EE", int)
+    assert batch.results[nf] == 7
+    assert batch.results[nf_after] == 3
+    assert batch.results[ee] == client.get_electron_energy()
+    assert client.get_noise_floor() == 3
+    assert client.read_mass(28) > 0
+
+
+@pytest.mark.parametrize("cmd", ["MR", "SC", "HS"])
+def test_batch_rejects_measurement_commands(client, cmd):
+    batch = client.batch()
+    with pytest.raises(RGAException):
+        batch.command(cmd, 28)
+    assert len(batch) == 0
+
+
+def test_iter_spectra_settings_are_not_changed_by_other_threads(client):
+    stop = threading.Event()
+
+    def other_reads():
+        while not stop.is_set():
+            client.read_spectrum(1, 20, 10)
+
+    thread = threading.Thread(target=other_reads)
+    thread.start()
+    try:
+        for _ in range(20):
+            for spectrum in client.iter_spectra(1, 10, 10, count=2):
+                assert spectrum.amu[-1] == 10 and len(spectrum.pressures) == 91
+    finally:
+        stop.set()
+        thread.join()
+
+
+def test_consumer_of_streamed_scans_cannot_send_other_requests(client):
+    blocked = threading.Thread(target=client.get_noise_floor, kwargs={"refresh": True})
+    scans = client.iter_spectra(1, 10, 10, count=3)
+    next(scans)
+    blocked.start()  # waits for the stream to complete
+    with pytest.raises(RGAException):
+        client.read_mass(28)  # must neither deadlock nor interleave with the stream
+    assert len(list(scans)) == 2
+    blocked.join(5)
+    assert not blocked.is_alive()
+
+
+def test_filament_off_aborts_stream_while_consumer_is_busy():
+    client = make_client(time_scale=1)
+    client.turn_on_filament()
+    scans = client.iter_spectra(1, 50, 10)
+    next(scans)
+    start = time.monotonic()
+    turn_off = threading.Thread(target=client.turn_off_filament)
+    turn_off.start()  # the consumer is busy, the generator is not resumed meanwhile
+    turn_off.join(5)
+    assert not turn_off.is_alive()
+    assert time.monotonic() - start < 1.0
+    with pytest.raises(RGAException):
+        next(scans)
+    assert client.get_noise_floor(refresh=True) == 7  # the link is free and in sync
+
+
+def test_filament_off_preempts_read_in_progress():
+    client = make_client(time_scale=1, noise_floor=0)
+    client.turn_on_filament()
+    errors = []
+
+    def read():
+        try:
+            client.read_spectrum(1, 100, 10)
+        except RGAException as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=read)
+    thread.start()
+    time.sleep(0.3)  # the scan takes many seconds at noise floor 0
+    start = time.monotonic()
+    client.turn_off_filament()
+    assert time.monotonic() - start < 1.0
+    thread.join(5)
+    assert len(errors) == 1
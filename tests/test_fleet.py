@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pyrga.driver import RGAException
+from pyrga.fleet import RGAFleet
+
+from conftest import make_client
+
+
+def test_fleet_requires_devices():
+    with pytest.raises(RGAException):
+        RGAFleet({})
+
+
+def test_bounded_acquisition_ends_when_connect_keeps_failing():
+    client = make_client()
+    client.turn_on_filament()
+    fleet = RGAFleet({"/dev/nonexistent-rga": {}, "simulated": client})
+    fleet._RETRY_DELAY = 0
+    fleet.schedule_all("read_mass", 28)
+    fleet.start(cycles=3)
+    try:
+        assert fleet.join(timeout=5)
+    finally:
+        fleet.stop()
+    health = fleet.health()
+    assert health["/dev/nonexistent-rga"].errors == 3
+    assert health["/dev/nonexistent-rga"].readings == 0
+    assert health["simulated"].readings == 3
+    assert fleet.results.qsize() == 3
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from pyrga.driver import RGAException
+from pyrga.monitor import LeakMonitor
+
+
+def _failing_reads(client, failures):
+    """Make the first `failures` calls of read_mass of `client` raise RGAException."""
+    read_mass = client.read_mass
+    calls = []
+
+    def read(amu):
+        calls.append(amu)
+        if len(calls) <= failures:
+            raise RGAException("Transient error")
+        return read_mass(amu)
+
+    client.read_mass = read
+    return calls
+
+
+def test_monitor_retries_transient_errors(client):
+    _failing_reads(client, 2)
+    errors = []
+    monitor = LeakMonitor(client, [4, 28], on_error=errors.append, slow_interval=0.0, max_errors=3)
+    monitor.run(cycles=3)
+    assert len(errors) == 2
+    assert set(monitor.last) == {4, 28}
+
+
+def test_monitor_ends_after_max_errors(client):
+    _failing_reads(client, 100)
+    errors = []
+    monitor = LeakMonitor(client, [4], on_error=errors.append, slow_interval=0.0, max_errors=2)
+    with pytest.raises(RGAException):
+        monitor.run(cycles=10)
+    assert len(errors) == 2
+
+
+def test_monitor_thresholds_can_change_while_monitoring(client):
+    monitor = LeakMonitor(client, {4: None}, slow_interval=0.0)
+    read_mass = client.read_mass
+
+    def read(amu):
+        monitor.thresholds[28] = 1.0  # e.g. from another thread
+        return read_mass(amu)
+
+    client.read_mass = read
+    monitor.run(cycles=2)
+    assert set(monitor.last) == {4, 28}
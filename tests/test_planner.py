@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import pytest
+
+from pyrga.driver import RGAException, Spectrum
+from pyrga.planner import plan_scan, read_windows
+
+
+@pytest.mark.parametrize("noise_floors", [[], [3, 12], [3, "4"]])
+def test_plan_scan_rejects_invalid_noise_floors(noise_floors):
+    with pytest.raises(RGAException):
+        plan_scan([28], budget=1.0, noise_floors=noise_floors)
+
+
+def test_plan_scan_selects_from_noise_floors():
+    plan = plan_scan([28, 44], budget=100.0, noise_floors=[5, 3])
+    assert plan.mode == "mass" and plan.noise_floor == 3
+
+
+def test_read_windows_accepts_list_windows(client):
+    results = read_windows(client, [[1, 5, 10], [12, 20, 10], [12, 20]], masses=[28])
+    assert set(results) == {(1, 5, 10), (12, 20, 10), (12, 20), 28}
+    spectrum = results[(12, 20, 10)]
+    assert isinstance(spectrum, Spectrum)
+    assert spectrum.timestamp is not None
+    assert spectrum.amu[0] == 12 and spectrum.amu[-1] == 20 and len(spectrum.pressures) == 81
+    histogram = results[(12, 20)]
+    assert list(histogram.amu) == list(range(12, 21)) and len(histogram.pressures) == 9
+    assert results[28] > 0
+
+
+def test_read_windows_is_not_interleaved_with_other_threads(client):
+    stop = threading.Event()
+
+    def other_reads():
+        while not stop.is_set():
+            client.read_spectrum(30, 40, 20)
+
+    thread = threading.Thread(target=other_reads)
+    thread.start()
+    try:
+        for _ in range(5):
+            results = read_windows(client, [(1, 5, 10), (12, 20, 10)])
+            assert results[(1, 5, 10)].amu[0] == 1 and len(results[(1, 5, 10)].pressures) == 41
+            assert results[(12, 20, 10)].amu[0] == 12 and len(results[(12, 20, 10)].pressures) == 81
+    finally:
+        stop.set()
+        thread.join()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pytest
+
+from pyrga.driver import RGAException, Spectrum
+from pyrga.server import RemoteRGA, RGAServer
+
+
+def _gate(client, method):
+    """Make `method` of `client` wait for the returned event after reading from RGA, return event set on entry."""
+    entered, release = threading.Event(), threading.Event()
+    read = getattr(client, method)
+
+    def gated(*args):
+        result = read(*args)
+        entered.set()
+        release.wait(5)
+        return result
+
+    setattr(client, method, gated)
+    return entered, release
+
+
+def _submit(server, errors, method, *args):
+    try:
+        server.submit(method, *args)
+    except RGAException as exc:
+        errors.append(exc)
+
+
+def test_stop_fails_queued_requests(client, tmp_path):
+    entered, release = _gate(client, "read_mass")
+    server = RGAServer(client, str(tmp_path / "rga.sock"))
+    server.start()
+    errors = []
+    busy = threading.Thread(target=_submit, args=(server, errors, "read_mass", 28))
+    busy.start()
+    assert entered.wait(5)
+    queued = threading.Thread(target=_submit, args=(server, errors, "read_mass", 44))
+    queued.start()
+    while not server._pending.get(("read_mass", (44,))):
+        time.sleep(0.01)
+    stopper = threading.Thread(target=server.stop)
+    stopper.start()
+    while not server._stopping:
+        time.sleep(0.01)
+    release.set()
+    for thread in (stopper, busy, queued):
+        thread.join(5)
+        assert not thread.is_alive()
+    assert len(errors) == 1 and "stopped" in str(errors[0])
+    with pytest.raises(RGAException):
+        server.submit("read_mass", 28)
+
+
+def test_read_overlapping_filament_off_is_not_cached(client, tmp_path):
+    entered, release = _gate(client, "read_mass")
+    with RGAServer(client, str(tmp_path / "rga.sock"), max_age=60.0) as server:
+        errors = []
+        read = threading.Thread(target=_submit, args=(server, errors, "read_mass", 28))
+        read.start()
+        assert entered.wait(5)
+        server.submit("turn_off_filament")
+        release.set()
+        read.join(5)
+        assert not errors
+        assert server._cache == {}
+        with pytest.raises(RGAException):  # filament is off, the stale result must not be served
+            server.submit("read_mass", 28)
+
+
+def test_remote_spectrum_keeps_timestamp_and_sensitivities(client, tmp_path):
+    with RGAServer(client, str(tmp_path / "rga.sock")) as server:
+        with RemoteRGA(server.address, timeout=5) as remote:
+            spectrum = remote.read_spectrum(1, 10, 10)
+    assert isinstance(spectrum, Spectrum)
+    assert spectrum.timestamp is not None
+    assert spectrum.partial_sens_mA_per_Torr == client._partial_sens_mA_per_Torr
+    amu, pressures, total = spectrum
+    assert amu[0] == 1 and len(pressures) == 91 and total > 0